@@ -0,0 +1,75 @@
+"""
+Measures cold start of a scoring worker: a fresh interpreter that loads the
+trained model and scores one row, for the pickled sklearn model versus the
+compact binary format with its NumPy-only loader.
+
+    python -m benchmarks.bench_cold_start
+"""
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import click
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import DataCleaning, DataPreprocessStrategy
+from src.model_dev import get_model
+from src.model_export import export_model
+from src.schema import FEATURE_TRANSFORM
+
+PICKLE_WORKER = """
+import pickle, numpy as np
+with open({path!r}, "rb") as f:
+    model = pickle.load(f)
+model.predict(np.zeros((1, {n_features}), dtype=np.float32))
+"""
+
+COMPACT_WORKER = """
+import numpy as np
+from src.compact_model import load
+load({path!r}).predict(np.zeros((1, {n_features}), dtype=np.float32))
+"""
+
+
+def _cold_start(code: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+@click.command()
+@click.option("--model-name", default="LinearRegression")
+@click.option("--repeat", default=5)
+def main(model_name: str, repeat: int):
+    df = DataCleaning(pd.read_csv("Data/data.csv"), DataPreprocessStrategy()).handle_data()
+    model = get_model(model_name).train(FEATURE_TRANSFORM.transform(df), FEATURE_TRANSFORM.target(df))
+    n_features = FEATURE_TRANSFORM.n_features
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = os.path.join(tmp, "model.pkl")
+        with open(pickle_path, "wb") as f:
+            pickle.dump(model, f)
+        compact_path = export_model(model, os.path.join(tmp, "model.cmdl"))
+
+        baseline = _cold_start("import numpy", repeat)
+        for name, template, path in (
+            ("pickle", PICKLE_WORKER, pickle_path),
+            ("compact", COMPACT_WORKER, compact_path),
+        ):
+            seconds = _cold_start(template.format(path=path, n_features=n_features), repeat)
+            print(
+                f"{name:>8}: {seconds * 1e3:8.1f} ms to first prediction "
+                f"({(seconds - baseline) * 1e3:8.1f} ms over a bare numpy import), "
+                f"{os.path.getsize(path):,} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
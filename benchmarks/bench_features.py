@@ -0,0 +1,58 @@
+"""
+Measures FeatureTransform throughput, raw columns plus the state encoding
+and derived call-usage features, on a resampled frame, and checks that the
+batch path and the single-row (online) path produce identical matrices:
+
+    python -m benchmarks.bench_features --rows 10000000
+"""
+import sys
+import time
+
+import click
+import numpy as np
+import pandas as pd
+
+from src.schema import CHURN_SCHEMA, FEATURE_TRANSFORM
+
+
+def check_online_offline(data: pd.DataFrame) -> int:
+    """Returns the number of rows whose single-row features differ from the batch features."""
+    batch = FEATURE_TRANSFORM.transform(data)
+    rows = np.vstack([FEATURE_TRANSFORM.transform_row(row) for row in data.to_dict("records")])
+    # Compare bit patterns so NaNs and signed zeros count as mismatches too
+    return int((batch.view(np.uint32) != rows.view(np.uint32)).any(axis=1).sum())
+
+
+@click.command()
+@click.option("--rows", default=10_000_000, help="Rows resampled from Data/data.csv")
+@click.option("--repeat", default=3)
+@click.option("--check-rows", default=20_000, help="Rows compared between the batch and single-row paths")
+def main(rows: int, repeat: int, check_rows: int):
+    source = pd.read_csv("Data/data.csv", usecols=CHURN_SCHEMA.columns, dtype=CHURN_SCHEMA.dtypes)
+    index = np.random.default_rng(42).integers(0, len(source), rows)
+    data = source.iloc[index].reset_index(drop=True)
+
+    mismatched = check_online_offline(data.iloc[:check_rows])
+    print(f"online/offline: {mismatched} of {min(rows, check_rows):,} rows differ")
+
+    out = np.empty((rows, FEATURE_TRANSFORM.n_features), dtype=FEATURE_TRANSFORM.dtype)
+    FEATURE_TRANSFORM.transform(data, out=out)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        FEATURE_TRANSFORM.transform(data, out=out)
+    elapsed = (time.perf_counter() - start) / repeat
+    print(
+        f"transform: {rows / elapsed:,.0f} rows/s ({elapsed:.2f} s for {rows:,} rows, "
+        f"{FEATURE_TRANSFORM.n_features} features)"
+    )
+
+    start = time.perf_counter()
+    FEATURE_TRANSFORM.transform_row(data.iloc[0].to_dict())
+    for row in data.iloc[:1000].to_dict("records"):
+        FEATURE_TRANSFORM.transform_row(row)
+    print(f"transform_row: {(time.perf_counter() - start) / 1001 * 1e6:.1f} us/row")
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
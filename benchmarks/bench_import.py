@@ -0,0 +1,106 @@
+"""
+Guards startup latency of the entry points. Each case runs in a fresh
+interpreter under `-X importtime`; the benchmark reports wall time and the
+slowest imports, and fails when a case exceeds its budget or pulls in a
+heavy stack it should not need.
+
+    python -m benchmarks.bench_import --budget-ms 1500
+"""
+import subprocess
+import sys
+import time
+
+import click
+import numpy as np
+
+# Stacks that only training and deployment should import
+HEAVY_MODULES = ("zenml", "mlflow", "sklearn", "lightgbm", "xgboost", "catboost", "optuna")
+
+CASES = {
+    "run_deployment --help": (
+        "import runpy, sys\n"
+        "sys.argv = ['run_deployment.py', '--help']\n"
+        "try:\n"
+        "    runpy.run_path('run_deployment.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    ),
+    "run_serving --help": (
+        "import runpy, sys\n"
+        "sys.argv = ['run_serving.py', '--help']\n"
+        "try:\n"
+        "    runpy.run_path('run_serving.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    ),
+    "predict path": (
+        "import numpy as np\n"
+        "from pipelines.service import find_prediction_service\n"
+        "from src.compact_model import load\n"
+        "from src.schema import FEATURE_TRANSFORM\n"
+        "from src.scoring import LinearScorer, get_scorer\n"
+        "from src.serving import MicroBatcher, PredictionServer\n"
+        "row = dict.fromkeys(FEATURE_TRANSFORM.names, 1.0)\n"
+        "LinearScorer(np.ones(FEATURE_TRANSFORM.n_features), 0.0).predict(FEATURE_TRANSFORM.transform_row(row))\n"
+    ),
+}
+
+REPORT_MODULES = (
+    "import sys\n"
+    "print('\\nLOADED ' + ' '.join(sorted({{name.split('.')[0] for name in sys.modules}} & {heavy!r})))\n"
+)
+
+
+def _parse_importtime(stderr: str) -> list:
+    """Returns (cumulative_us, module) for top-level imports, slowest first."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)
+
+
+def run_case(code: str, repeat: int) -> dict:
+    code += REPORT_MODULES.format(heavy=set(HEAVY_MODULES))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True
+        )
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+    loaded = result.stdout.rsplit("LOADED", 1)[1].split()
+    return {
+        "wall_ms": float(np.median(timings)) * 1e3,
+        "heavy_modules": loaded,
+        "slowest_imports": _parse_importtime(result.stderr)[:5],
+    }
+
+
+@click.command()
+@click.option("--budget-ms", default=1500.0, help="Maximum median wall time per case")
+@click.option("--repeat", default=3)
+def main(budget_ms: float, repeat: int):
+    failures = []
+    for name, code in CASES.items():
+        report = run_case(code, repeat)
+        print("{:<24} {:>8.0f} ms".format(name, report["wall_ms"]))
+        for cumulative, module in report["slowest_imports"]:
+            print("    {:>8.1f} ms  {}".format(cumulative / 1e3, module))
+        if report["wall_ms"] > budget_ms:
+            failures.append("{}: {:.0f} ms over the {:.0f} ms budget".format(name, report["wall_ms"], budget_ms))
+        if report["heavy_modules"]:
+            failures.append("{}: imports {}".format(name, ", ".join(report["heavy_modules"])))
+
+    for failure in failures:
+        print("REGRESSION " + failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
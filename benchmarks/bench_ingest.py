@@ -0,0 +1,69 @@
+"""
+Compares peak RSS and wall time of eager vs streaming ingestion.
+
+Each mode runs in its own subprocess so peak RSS is measured independently:
+
+    python -m benchmarks.bench_ingest --rows 10000000
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import click
+
+from benchmarks.synthetic import generate_synthetic_data
+
+
+def _run_mode(mode: str, data_path: str, chunksize: int) -> dict:
+    from steps.ingest_data import IngestData
+    from src.data_cleaning import DataCleaning, DataPreprocessStrategy
+
+    ingest_data = IngestData(data_path)
+    start = time.perf_counter()
+    rows = 0
+    churned = 0
+    if mode == "eager":
+        df = DataCleaning(ingest_data.get_data(), DataPreprocessStrategy()).handle_data()
+        rows, churned = len(df), int(df["churn"].sum())
+    else:
+        for chunk in ingest_data.iter_clean_chunks(chunksize):
+            rows += len(chunk)
+            churned += int(chunk["churn"].sum())
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {"mode": mode, "rows": rows, "churned": churned, "seconds": elapsed, "peak_rss_bytes": peak_rss}
+
+
+@click.command()
+@click.option("--rows", default=10_000_000, help="Rows in the synthetic file")
+@click.option("--chunksize", default=500_000, help="Rows per streamed chunk")
+@click.option("--data-path", default="bench_data/synthetic_churn.csv")
+@click.option("--worker", type=click.Choice(["eager", "streaming"]), default=None, hidden=True)
+def main(rows: int, chunksize: int, data_path: str, worker: str):
+    if worker:
+        print(json.dumps(_run_mode(worker, data_path, chunksize)))
+        return
+
+    if not os.path.exists(data_path):
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        generate_synthetic_data(data_path, rows)
+
+    for mode in ("eager", "streaming"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_ingest", "--worker", mode,
+             "--data-path", data_path, "--chunksize", str(chunksize)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(
+            f"{mode:>9}: {result['rows']:,} rows in {result['seconds']:.2f}s, "
+            f"peak RSS {result['peak_rss_bytes'] / 2**20:,.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
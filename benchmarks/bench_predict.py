@@ -0,0 +1,66 @@
+"""
+Reports p50/p99 prediction latency for single rows and 10k-row batches on
+the legacy JSON round-trip path and the in-process LinearScorer path:
+
+    python -m benchmarks.bench_predict [--service-url http://127.0.0.1:8000/invocations]
+
+With --service-url the legacy path also includes the HTTP call to the MLflow
+prediction server; without it only the serialization overhead is measured.
+"""
+import json
+import time
+import urllib.request
+
+import click
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import DataCleaning, DataPreprocessStrategy
+from src.model_dev import LinearRegressionModel
+from src.schema import CHURN_SCHEMA, FEATURE_TRANSFORM
+from src.scoring import LinearScorer
+
+
+def _percentiles(fn, batch, repeat: int):
+    latencies = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(batch)
+        latencies[i] = time.perf_counter() - start
+    return np.percentile(latencies, 50) * 1e3, np.percentile(latencies, 99) * 1e3
+
+
+@click.command()
+@click.option("--service-url", default=None, help="MLflow /invocations URL for the HTTP path")
+@click.option("--repeat", default=200)
+def main(service_url: str, repeat: int):
+    df = DataCleaning(pd.read_csv("Data/data.csv"), DataPreprocessStrategy()).handle_data()
+    model = LinearRegressionModel().train(FEATURE_TRANSFORM.transform(df), FEATURE_TRANSFORM.target(df))
+    scorer = LinearScorer.from_model(model)
+
+    def legacy(batch: pd.DataFrame):
+        json_list = json.loads(json.dumps(list(batch.T.to_dict().values())))
+        data = np.array(json_list)
+        if service_url:
+            request = urllib.request.Request(
+                service_url,
+                data=json.dumps({"instances": data.tolist()}).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            with urllib.request.urlopen(request) as response:
+                return json.loads(response.read())
+        return model.predict(data)
+
+    def in_process(batch: pd.DataFrame):
+        return scorer.predict(FEATURE_TRANSFORM.transform(batch))
+
+    features = df[CHURN_SCHEMA.inputs]
+    for rows in (1, 10_000):
+        batch = features.sample(n=rows, replace=True, random_state=0)
+        for name, fn in (("legacy", legacy), ("in-process", in_process)):
+            p50, p99 = _percentiles(fn, batch, repeat if rows == 1 else max(repeat // 10, 5))
+            print(f"{rows:>6} rows {name:>10}: p50 {p50:8.3f} ms  p99 {p99:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
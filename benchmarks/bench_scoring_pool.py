@@ -0,0 +1,65 @@
+"""
+Measures SharedScoringPool throughput on one large batch as workers are
+added, and the private memory (USS) each worker adds on top of the shared
+model and arenas:
+
+    python -m benchmarks.bench_scoring_pool --model-name XGBoost --rows 2000000
+"""
+import os
+import tempfile
+import time
+
+import click
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import DataCleaning, DataPreprocessStrategy
+from src.model_dev import get_model
+from src.model_export import export_model
+from src.schema import FEATURE_TRANSFORM
+from src.scoring_pool import SharedScoringPool
+
+
+def _private_bytes(pid: int) -> int:
+    """Unique set size of a process (Linux), the memory only it holds."""
+    with open("/proc/{}/smaps_rollup".format(pid)) as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line)
+    return sum(int(fields[name].split()[0]) * 1024 for name in ("Private_Clean", "Private_Dirty"))
+
+
+@click.command()
+@click.option("--model-name", default="XGBoost")
+@click.option("--rows", default=2_000_000)
+@click.option("--max-workers", default=0, help="Largest pool measured, 0 for one worker per CPU")
+@click.option("--repeat", default=3)
+def main(model_name: str, rows: int, max_workers: int, repeat: int):
+    df = DataCleaning(pd.read_csv("Data/data.csv"), DataPreprocessStrategy()).handle_data()
+    X = FEATURE_TRANSFORM.transform(df)
+    model = get_model(model_name).train(X, FEATURE_TRANSFORM.target(df))
+    batch = X[np.random.default_rng(0).integers(0, len(X), rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_model(model, os.path.join(tmp, "model.cmdl"))
+        print("model: {} ({:,} bytes)".format(model_name, os.path.getsize(path)))
+        workers = 1
+        baseline = None
+        while workers <= (max_workers or os.cpu_count()):
+            with SharedScoringPool.from_file(path, n_workers=workers, max_batch_rows=rows) as pool:
+                pool.input[:rows] = batch
+                pool.predict(pool.input[:rows])  # warm-up, written in place: no copy
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    pool.predict(pool.input[:rows])
+                rows_per_sec = rows * repeat / (time.perf_counter() - start)
+                private = [_private_bytes(process.pid) for process in pool._processes]
+            baseline = baseline or rows_per_sec
+            print(
+                "{:>3} workers: {:>14,.0f} rows/s  {:>5.2f}x  {:>7.1f} MiB private per worker".format(
+                    workers, rows_per_sec, rows_per_sec / baseline, np.mean(private) / 2**20
+                )
+            )
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
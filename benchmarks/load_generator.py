@@ -0,0 +1,89 @@
+"""
+Local load generator for the prediction servers. Opens `--concurrency`
+keep-alive connections, each sending single-row requests back to back,
+and reports throughput and latency percentiles.
+
+Micro-batched server vs per-request scoring:
+
+    python run_serving.py --max-batch-size 64 &
+    python -m benchmarks.load_generator --url http://127.0.0.1:8080/predict
+    python run_serving.py --max-batch-size 1 &
+    python -m benchmarks.load_generator --url http://127.0.0.1:8080/predict
+
+Against the MLflow daemon started by run_deployment.py:
+
+    python -m benchmarks.load_generator --url http://127.0.0.1:8000/invocations --payload mlflow
+"""
+import asyncio
+import json
+import time
+from urllib.parse import urlparse
+
+import click
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import DataCleaning, DataPreprocessStrategy
+from src.schema import CHURN_SCHEMA
+
+
+async def _client(url, bodies, deadline: float, latencies: list):
+    parsed = urlparse(url)
+    reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            body = bodies[i % len(bodies)]
+            i += 1
+            started = time.perf_counter()
+            writer.write(
+                "POST {} HTTP/1.1\r\nHost: {}\r\nContent-Type: application/json\r\n"
+                "Content-Length: {}\r\n\r\n".format(parsed.path, parsed.netloc, len(body)).encode()
+                + body
+            )
+            await writer.drain()
+            await reader.readline()
+            content_length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b""):
+                    break
+                name, _, value = header.decode().partition(":")
+                if name.strip().lower() == "content-length":
+                    content_length = int(value)
+            await reader.readexactly(content_length)
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def _run(url, bodies, concurrency: int, duration: float) -> list:
+    latencies = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(_client(url, bodies, deadline, latencies) for _ in range(concurrency)))
+    return latencies
+
+
+@click.command()
+@click.option("--url", default="http://127.0.0.1:8080/predict")
+@click.option("--payload", type=click.Choice(["features", "mlflow"]), default="features")
+@click.option("--concurrency", default=64, help="Concurrent keep-alive connections")
+@click.option("--duration", default=10.0, help="Seconds to generate load for")
+def main(url: str, payload: str, concurrency: int, duration: float):
+    df = DataCleaning(pd.read_csv("Data/data.csv"), DataPreprocessStrategy()).handle_data()
+    rows = df[CHURN_SCHEMA.inputs].sample(n=1000, replace=True, random_state=0)
+    if payload == "features":
+        bodies = [json.dumps(record).encode() for record in rows.to_dict(orient="records")]
+    else:
+        bodies = [json.dumps({"instances": [row]}).encode() for row in rows.values.tolist()]
+
+    latencies = np.array(asyncio.run(_run(url, bodies, concurrency, duration)))
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    print(
+        f"{len(latencies):,} requests in {duration:.0f}s: {len(latencies) / duration:,.0f} req/s, "
+        f"p50 {p50:.2f} ms, p99 {p99:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
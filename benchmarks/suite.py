@@ -0,0 +1,163 @@
+"""
+End-to-end benchmark suite over marginal-matching synthetic churn data:
+ingestion, cleaning, training, evaluation and the predictor's scoring path.
+
+Every run is appended to a JSON history. With --baseline the run is
+compared against a stored run and the exit status is nonzero when any
+benchmark's throughput drops by more than --tolerance:
+
+    python -m benchmarks.suite --rows 10000000 --save-baseline
+    python -m benchmarks.suite --rows 10000000 --baseline
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import click
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_marginal_data
+from src.data_cleaning import DataCleaning, DataDivideStrategy, DataPreprocessStrategy
+from src.evaluation import EvaluationEngine
+from src.model_dev import LinearRegressionModel
+from src.schema import FEATURE_TRANSFORM
+from src.scoring import LinearScorer
+from steps.ingest_data import IngestData
+
+DEFAULT_HISTORY = os.path.join("bench_data", "history.json")
+
+
+def _time(fn: Callable, rows: Optional[int], repeat: int) -> Tuple[Dict[str, float], object]:
+    """Median wall time of `fn` over `repeat` calls; `rows` defaults to len() of its result."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    seconds = float(np.median(timings))
+    rows = len(result) if rows is None else rows
+    return {"seconds": seconds, "rows": rows, "rows_per_sec": rows / seconds}, result
+
+
+def run_suite(data_path: str, repeat: int, score_rows: int) -> Dict[str, dict]:
+    results = {}
+    results["ingest"], df = _time(lambda: IngestData(data_path, use_cache=False).get_data(), None, repeat)
+    n_rows = len(df)
+    IngestData(data_path).get_data()  # populate the columnar cache
+    results["ingest_cached"], _ = _time(lambda: IngestData(data_path).get_data(), n_rows, repeat)
+
+    def clean():
+        processed = DataCleaning(df, DataPreprocessStrategy()).handle_data()
+        return DataCleaning(processed, DataDivideStrategy()).handle_data()
+
+    results["clean"], (X_train, X_test, y_train, y_test) = _time(clean, n_rows, repeat)
+    del df
+
+    X = FEATURE_TRANSFORM.transform(X_train)
+    y = y_train.to_numpy()
+    results["train"], model = _time(lambda: LinearRegressionModel().train(X, y), len(X), repeat)
+
+    X_eval = FEATURE_TRANSFORM.transform(X_test)
+    y_eval = y_test.to_numpy()
+    results["evaluate"], _ = _time(
+        lambda: EvaluationEngine().update(y_eval, model.predict(X_eval)).compute(), len(X_eval), repeat
+    )
+
+    # The predictor step's in-process path: JSON payload -> frame -> features -> scores
+    payload = X_test.iloc[:score_rows].to_json(orient="split", index=False)
+    scorer = LinearScorer.from_model(model)
+
+    def score():
+        data = json.loads(payload)
+        frame = pd.DataFrame(data["data"], columns=data["columns"])
+        return scorer.predict(FEATURE_TRANSFORM.transform(frame)).copy()
+
+    results["score"], _ = _time(score, min(score_rows, len(X_test)), repeat)
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_history(path: str) -> list:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_history(path: str, history: list):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(history, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def compare(run: dict, baseline: dict, tolerance: float) -> list:
+    """Returns a line per benchmark whose throughput dropped by more than `tolerance`."""
+    regressions = []
+    for name, result in run["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        change = result["rows_per_sec"] / reference["rows_per_sec"] - 1
+        print("{:<14} {:>14,.0f} rows/s  {:>+7.1%} vs {}".format(name, result["rows_per_sec"], change, baseline["commit"]))
+        if change < -tolerance:
+            regressions.append("{}: {:+.1%} rows/s".format(name, change))
+    return regressions
+
+
+@click.command()
+@click.option("--rows", default=1_000_000, help="Synthetic rows (generated once per size)")
+@click.option("--repeat", default=3)
+@click.option("--score-rows", default=10_000, help="Rows in the predictor payload")
+@click.option("--history", "history_path", default=DEFAULT_HISTORY)
+@click.option("--save-baseline", is_flag=True, default=False, help="Mark this run as the baseline")
+@click.option("--baseline", "use_baseline", is_flag=True, default=False, help="Compare against the stored baseline")
+@click.option("--tolerance", default=0.10, help="Allowed fractional throughput drop before flagging a regression")
+def main(rows: int, repeat: int, score_rows: int, history_path: str, save_baseline: bool, use_baseline: bool, tolerance: float):
+    data_path = os.path.join("bench_data", "synthetic_marginal_{}.csv".format(rows))
+    if not os.path.exists(data_path):
+        os.makedirs("bench_data", exist_ok=True)
+        generate_marginal_data(data_path, rows)
+
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "rows": rows,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "baseline": save_baseline,
+        "results": run_suite(data_path, repeat, score_rows),
+    }
+    history = load_history(history_path)
+    baselines = [entry for entry in history if entry.get("baseline") and entry["rows"] == rows]
+    history.append(run)
+    save_history(history_path, history)
+
+    for name, result in run["results"].items():
+        print("{:<14} {:>10.3f} s  {:>14,.0f} rows/s".format(name, result["seconds"], result["rows_per_sec"]))
+
+    if use_baseline:
+        if not baselines:
+            print("No baseline with {:,} rows in {}".format(rows, history_path))
+            sys.exit(1)
+        regressions = compare(run, baselines[-1], tolerance)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
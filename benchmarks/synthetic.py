@@ -0,0 +1,149 @@
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv
+
+
+def generate_synthetic_data(
+    output_path: str,
+    n_rows: int,
+    source_path: str = "Data/data.csv",
+    chunk_rows: int = 1_000_000,
+    seed: int = 42,
+) -> str:
+    """
+    Writes a synthetic version of the churn data by resampling rows of the
+    source file, one chunk at a time so memory stays bounded.
+
+    Args:
+        output_path: str
+        n_rows: number of rows to write
+        source_path: str
+        chunk_rows: rows generated per write
+        seed: int
+    Returns:
+        output_path: str
+    """
+    source = pd.read_csv(source_path)
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(output_path, "w", newline="") as f:
+        while written < n_rows:
+            size = min(chunk_rows, n_rows - written)
+            chunk = source.iloc[rng.integers(0, len(source), size)]
+            chunk.to_csv(f, header=written == 0, index=False)
+            written += size
+            logging.info("Wrote %d/%d synthetic rows", written, n_rows)
+    return output_path
+
+
+class MarginalSampler:
+    """
+    Samples synthetic churn rows column by column from the marginal
+    distributions of a source frame, so the output can be any size without
+    repeating source rows.
+
+    Low-cardinality and string columns are drawn from their empirical
+    frequencies, continuous columns by inverse-CDF interpolation between
+    source quantiles, rounded to the source precision. `*_charge` columns
+    keep their fixed per-minute tariff, and churn is drawn from its rate
+    given the service-call count and international plan, so the overall
+    churn rate matches the source and models still have signal to learn.
+    """
+
+    def __init__(self, source: pd.DataFrame, n_quantiles: int = 1001, max_discrete: int = 64):
+        self.columns = list(source.columns)
+        self.discrete = {}
+        self.continuous = {}
+        self.charges = {}
+        for name in self.columns:
+            column = source[name]
+            if name == "churn":
+                continue
+            if name.endswith("_charge") and name.replace("_charge", "_minutes") in source:
+                minutes = source[name.replace("_charge", "_minutes")]
+                self.charges[name] = float((column[minutes > 0] / minutes[minutes > 0]).median())
+            elif column.dtype == object or column.nunique() <= max_discrete:
+                frequencies = column.value_counts(normalize=True)
+                self.discrete[name] = (frequencies.index.to_numpy(), frequencies.to_numpy())
+            else:
+                probabilities = np.linspace(0, 1, n_quantiles)
+                decimals = next(d for d in range(7) if np.allclose(column, column.round(d)))
+                self.continuous[name] = (probabilities, column.quantile(probabilities).to_numpy(), decimals)
+
+        risk = source["number_customer_service_calls"].clip(upper=5)
+        self.churn_rate = source.groupby([risk, source["international_plan"]])["churn"].mean()
+
+    def sample(self, n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+        data = {}
+        for name, (values, probabilities) in self.discrete.items():
+            data[name] = values[rng.choice(len(values), size=n_rows, p=probabilities)]
+        for name, (probabilities, quantiles, decimals) in self.continuous.items():
+            values = np.interp(rng.random(n_rows), probabilities, quantiles).round(decimals)
+            data[name] = values.astype(np.int64) if decimals == 0 else values
+        for name, rate in self.charges.items():
+            data[name] = (data[name.replace("_charge", "_minutes")] * rate).round(2)
+
+        risk = np.minimum(data["number_customer_service_calls"], 5)
+        index = pd.MultiIndex.from_arrays([risk, data["international_plan"]])
+        rate = self.churn_rate.reindex(index).fillna(self.churn_rate.mean()).to_numpy()
+        data["churn"] = (rng.random(n_rows) < rate).astype(np.int64)
+        return pd.DataFrame(data, columns=self.columns)
+
+
+def _write_marginal_part(args) -> str:
+    sampler, path, n_rows, seed = args
+    chunk = sampler.sample(n_rows, np.random.default_rng(seed))
+    # Arrow's CSV writer is several times faster than DataFrame.to_csv
+    csv.write_csv(
+        pa.Table.from_pandas(chunk, preserve_index=False), path, csv.WriteOptions(include_header=False)
+    )
+    return path
+
+
+def generate_marginal_data(
+    output_path: str,
+    n_rows: int,
+    source_path: str = "Data/data.csv",
+    chunk_rows: int = 1_000_000,
+    seed: int = 42,
+    max_workers: int = 0,
+) -> str:
+    """
+    Writes `n_rows` rows sampled by MarginalSampler. Chunks are generated in
+    parallel into part files (each with its own seed, so the output does not
+    depend on the worker count) and concatenated in order, keeping memory
+    bounded by `max_workers * chunk_rows` rows; 100M rows is routine.
+
+    Args:
+        output_path: str
+        n_rows: number of rows to write
+        source_path: str
+        chunk_rows: rows generated per part
+        seed: int
+        max_workers: processes generating parts, 0 for one per CPU
+    Returns:
+        output_path: str
+    """
+    sampler = MarginalSampler(pd.read_csv(source_path))
+    seeds = np.random.SeedSequence(seed).generate_state((n_rows + chunk_rows - 1) // chunk_rows)
+    parts_dir = output_path + ".parts"
+    os.makedirs(parts_dir, exist_ok=True)
+    tasks = [
+        (sampler, os.path.join(parts_dir, "part-{:05d}.csv".format(i)), min(chunk_rows, n_rows - start), int(s))
+        for i, (start, s) in enumerate(zip(range(0, n_rows, chunk_rows), seeds))
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool, open(output_path, "wb") as out:
+        out.write((",".join(sampler.columns) + "\n").encode())
+        for i, path in enumerate(pool.map(_write_marginal_part, tasks)):
+            with open(path, "rb") as part:
+                shutil.copyfileobj(part, out, length=16 * 2**20)
+            os.remove(path)
+            logging.info("Wrote %d/%d synthetic rows", min((i + 1) * chunk_rows, n_rows), n_rows)
+    os.rmdir(parts_dir)
+    return output_path
@@ -0,0 +1,63 @@
+import logging
+from typing import Optional
+
+import mlflow
+from typing_extensions import Annotated
+from zenml import pipeline, step
+from zenml.config import DockerSettings
+from zenml.integrations.constants import MLFLOW
+from zenml.integrations.mlflow.services import MLFlowDeploymentService
+
+from src.batch_scoring import BatchScorer
+from src.explanations import get_explainer
+from .inference_pipeline import prediction_service_loader
+
+docker_settings = DockerSettings(required_integrations=[MLFLOW])
+
+@step(enable_cache=False)
+def batch_scorer(
+    service: MLFlowDeploymentService,
+    input_path: str,
+    output_dir: str,
+    chunksize: int = 1_000_000,
+    max_workers: int = 0,
+    explain: bool = False,
+    key_column: Optional[str] = None,
+) -> Annotated[float, "rows_per_sec"]:
+    """
+    Scores every row of `input_path` with the deployed model into partitioned
+    Parquet, keyed by `key_column` (the row number when unset), with
+    per-feature contributions next to each score if `explain`.
+    """
+    try:
+        model = mlflow.sklearn.load_model(service.config.model_uri)
+        explainer = get_explainer(model) if explain else None
+        scorer = BatchScorer(
+            model, output_dir, chunksize=chunksize, max_workers=max_workers, key_column=key_column, explainer=explainer,
+            model_version=service.config.model_uri,
+        )
+        report = scorer.run(input_path)
+        return report["rows_per_sec"]
+    except Exception as e:
+        logging.error("Error in batch scoring step: {}".format(e))
+        raise e
+
+@pipeline(enable_cache=False, settings={"docker": docker_settings})
+def batch_scoring_pipeline(
+    pipeline_name: str,
+    pipeline_step_name: str,
+    input_path: str,
+    output_dir: str,
+    chunksize: int = 1_000_000,
+    explain: bool = False,
+    key_column: Optional[str] = None,
+):
+    service = prediction_service_loader(
+        pipeline_name=pipeline_name,
+        pipeline_step_name=pipeline_step_name,
+        running=False,
+    )
+    batch_scorer(
+        service=service, input_path=input_path, output_dir=output_dir, chunksize=chunksize, explain=explain,
+        key_column=key_column,
+    )
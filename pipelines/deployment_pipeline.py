@@ -1,20 +1,28 @@
-import numpy as np
-import pandas as pd
-import json
-from .utils import get_data_for_test
+import logging
+from typing import Optional
+
 from zenml import pipeline, step
 from zenml.config import DockerSettings
 from zenml.constants import DEFAULT_SERVICE_START_STOP_TIMEOUT
 from zenml.integrations.constants import MLFLOW
-from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import (
-    MLFlowModelDeployer
-)
-from zenml.integrations.mlflow.services import MLFlowDeploymentService
 from zenml.integrations.mlflow.steps import mlflow_model_deployer_step
 from zenml.steps import BaseParameters, Output
 
+# Inference steps live in their own module so prediction-only callers do
+# not import the training stack; re-exported here for existing imports.
+from .inference_pipeline import (
+    dynamic_importer,
+    inference_pipeline,
+    prediction_service_loader,
+    predictor,
+)
 from steps.clean_data import clean_df
-from steps.evaluation import evaluate_model
+from steps.config import CrossValidationConfig
+from steps.cross_validation import cross_validate_model
+from steps.drift import commit_drift_reference, drift_score
+from steps.evaluation import evaluate_model, evaluate_model_bootstrap
+from steps.export_model import export_compact_model
+from steps.incremental_train import incremental_train_model
 from steps.ingest_data import ingest_df
 from steps.model_train import train_model
 
@@ -23,111 +31,96 @@ docker_settings = DockerSettings(required_integrations=[MLFLOW])
 class DeploymentTriggerConfig(BaseParameters):
     """Parameters that are used to trigger the deployment"""
     min_accuracy: float = 0
-
-@step(enable_cache=False)
-def dynamic_importer() -> str:
-    """Downloads the latest data from a mock API."""
-    data = get_data_for_test()
-    return data
+    # Redeploy only once inference inputs drifted at least this far (max PSI); 0 ignores drift
+    min_drift: float = 0
+    # Never replace the served model: the candidate is exported as a
+    # challenger for shadow scoring instead
+    shadow: bool = False
 
 @step
 def deployment_trigger(
     accuracy: float,
-    config: DeploymentTriggerConfig
+    drift: float,
+    config: DeploymentTriggerConfig,
+    beats_champion: bool = True,
+    cv_accuracy: Optional[float] = None,
 ) -> bool:
     """Implements a simple model deployment trigger that looks at the
-    input model accuracy and decides if it is good enough to deploy"""
-    return accuracy > config.min_accuracy
+    input model accuracy and decides if it is good enough to deploy.
+    `accuracy` may be a point estimate or a lower confidence bound;
+    `drift` is the drift score of the inputs seen by the deployed model;
+    `beats_champion` is False when cross-validation found the candidate
+    no better than the deployed model; the candidate's mean fold score
+    `cv_accuracy`, when given, must clear `min_accuracy` as well. The drift
+    gate only applies while a
+    model is deployed: with nothing served, there is nothing to drift from."""
+    if config.shadow:
+        return False
+    if not (beats_champion and accuracy > config.min_accuracy):
+        return False
+    if cv_accuracy is not None and not cv_accuracy > config.min_accuracy:
+        return False
+    if drift >= config.min_drift:
+        return True
+    # Deferred: only needed when the drift gate would block, and pulls in the deployer
+    from pipelines.service import find_prediction_service
 
-class MLFlowDeploymentLoaderStepParameters(BaseParameters):
-    """MLflow deployment getter parameters"""
-    pipeline_name: str
-    step_name: str
-    running: bool = True
-    model_name: str = "model"
-
-@step(enable_cache=False)
-def prediction_service_loader(
-    pipeline_name: str,
-    pipeline_step_name: str,
-    running: bool = True,
-    model_name: str = "model",
-) -> MLFlowDeploymentService:
-    """Get the prediction service started by the deployment pipeline."""
-    mlflow_model_deployer_component = MLFlowModelDeployer.get_active_model_deployer()
-    existing_services = mlflow_model_deployer_component.find_model_server(
-        pipeline_name=pipeline_name,
-        pipeline_step_name=pipeline_step_name,
-        model_name=model_name,
-        running=running,
-    )
-    if not existing_services:
-        raise RuntimeError(
-            f"No MLflow prediction service deployed by the "
-            f"{pipeline_step_name} step in the {pipeline_name} "
-            f"pipeline for the '{model_name}' model is currently "
-            f"running."
-        )
-    return existing_services[0]
-
-@step
-def predictor(
-    service: MLFlowDeploymentService,
-    data: str,
-) -> np.ndarray:
-    """Run an inference request against a prediction service"""
-    service.start(timeout=10)
-    data = json.loads(data)
-    data.pop("columns")
-    data.pop("index")
-    columns_for_df = [
-        "account_length",
-        "international_plan",
-        "voice_mail_plan",
-        "number_vmail_messages",
-        "total_day_calls",
-        "total_eve_calls",
-        "total_night_calls",
-        "total_intl_calls",
-        "number_customer_service_calls",
-        "area_code_encoded",
-        "total_day_minutes",
-        "total_eve_minutes",
-        "total_night_minutes",
-        "total_intl_minutes",
-    ]
-    df = pd.DataFrame(data["data"], columns=columns_for_df)
-    json_list = json.loads(json.dumps(list(df.T.to_dict().values())))
-    data = np.array(json_list)
-    prediction = service.predict(data)
-    return prediction
+    if find_prediction_service(running=False) is None:
+        logging.info("No model deployed yet; bypassing the drift gate")
+        return True
+    return False
 
 @pipeline(enable_cache=False, settings={"docker": docker_settings})
 def continuous_deployment_pipeline(
     data_path: str,
     min_accuracy: float = 0,
     workers: int = 1,
-    timeout: int = DEFAULT_SERVICE_START_STOP_TIMEOUT
+    timeout: int = DEFAULT_SERVICE_START_STOP_TIMEOUT,
+    gate_on_lower_bound: bool = False,
+    incremental: bool = False,
+    min_drift: float = 0,
+    cross_validate: bool = False,
+    n_folds: int = 5,
+    shadow: bool = False,
 ):
-    df = ingest_df(data_path=data_path)
-    X_train, X_test, y_train, y_test = clean_df(df)
-    model = train_model(X_train, X_test, y_train, y_test)
+    drift = drift_score()
+    if incremental:
+        # Only the delta is read, unless cross-validation needs the full training split
+        if cross_validate:
+            X_train, _, y_train, _ = clean_df(ingest_df(data_path=data_path))
+        # Evaluated on the holdout rows of the deltas it was trained from, after
+        # clean_df so the drift reference staged from them is the one kept
+        model, X_test, y_test = incremental_train_model(
+            data_path=data_path, after="clean_df" if cross_validate else None
+        )
+    else:
+        df = ingest_df(data_path=data_path)
+        X_train, X_test, y_train, y_test = clean_df(df)
+        model = train_model(X_train, X_test, y_train, y_test)
     r2_score, rmse = evaluate_model(model, X_test, y_test)
-    deployment_decision = deployment_trigger(r2_score)
+    if gate_on_lower_bound:
+        r2_score, rmse = evaluate_model_bootstrap(model, X_test, y_test)
+    beats_champion, cv_score = True, None
+    if cross_validate:
+        # Gated next to the holdout score (or its lower bound), not instead of it
+        cv_score, beats_champion = cross_validate_model(
+            model, X_train, y_train, config=CrossValidationConfig(n_folds=n_folds)
+        )
+    deployment_decision = deployment_trigger(
+        accuracy=r2_score,
+        drift=drift,
+        config=DeploymentTriggerConfig(min_accuracy=min_accuracy, min_drift=min_drift, shadow=shadow),
+        beats_champion=beats_champion,
+        cv_accuracy=cv_score,
+    )
+    if shadow:
+        export_compact_model(model, path="models/challenger.cmdl")
+    else:
+        export_compact_model(model, deploy_decision=deployment_decision)
     mlflow_model_deployer_step(
         model=model,
         deploy_decision=deployment_decision,
         workers=workers,
         timeout=timeout,
     )
-
-@pipeline(enable_cache=False, settings={"docker": docker_settings})
-def inference_pipeline(pipeline_name: str, pipeline_step_name: str):
-    data = dynamic_importer()
-    service = prediction_service_loader(
-        pipeline_name=pipeline_name,
-        pipeline_step_name=pipeline_step_name,
-        running=False,
-    )
-    prediction = predictor(service=service, data=data)
-    return prediction
+    commit_drift_reference(deployment_decision)
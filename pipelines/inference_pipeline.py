@@ -0,0 +1,116 @@
+import logging
+import numpy as np
+import pandas as pd
+import json
+from .service import find_prediction_service
+from .utils import get_data_for_test
+from zenml import pipeline, step
+from zenml.config import DockerSettings
+from zenml.integrations.constants import MLFLOW
+from zenml.integrations.mlflow.services import MLFlowDeploymentService
+from zenml.steps import BaseParameters
+from typing import Tuple
+from typing_extensions import Annotated
+
+from src.drift import DriftMonitor, log_drift_metrics
+from src.explanations import get_explainer_for_uri
+from src.prediction_cache import PredictionCache
+from src.profiling import profile_step
+from src.schema import FEATURE_TRANSFORM
+from src.scoring import get_scorer
+
+docker_settings = DockerSettings(required_integrations=[MLFLOW])
+
+@step(enable_cache=False)
+def dynamic_importer() -> str:
+    """Downloads the latest data from a mock API."""
+    data = get_data_for_test()
+    return data
+
+class MLFlowDeploymentLoaderStepParameters(BaseParameters):
+    """MLflow deployment getter parameters"""
+    pipeline_name: str
+    step_name: str
+    running: bool = True
+    model_name: str = "model"
+
+@step(enable_cache=False)
+def prediction_service_loader(
+    pipeline_name: str,
+    pipeline_step_name: str,
+    running: bool = True,
+    model_name: str = "model",
+) -> MLFlowDeploymentService:
+    """Get the prediction service started by the deployment pipeline."""
+    service = find_prediction_service(
+        pipeline_name=pipeline_name,
+        pipeline_step_name=pipeline_step_name,
+        running=running,
+        model_name=model_name,
+    )
+    if service is None:
+        raise RuntimeError(
+            f"No MLflow prediction service deployed by the "
+            f"{pipeline_step_name} step in the {pipeline_name} "
+            f"pipeline for the '{model_name}' model is currently "
+            f"running."
+        )
+    return service
+
+@step
+def predictor(
+    service: MLFlowDeploymentService,
+    data: str,
+    in_process: bool = True,
+    explain: bool = False,
+    use_cache: bool = True,
+) -> Tuple[Annotated[np.ndarray, "prediction"], Annotated[np.ndarray, "contributions"]]:
+    """
+    Run an inference request in-process, falling back to the prediction
+    service. With `explain`, also returns each row's per-feature
+    contributions to the model output (empty otherwise). With `use_cache`,
+    rows this model already scored in an earlier run are answered from the
+    on-disk prediction cache and only the rest are sent to the service.
+    """
+    with profile_step("predictor") as profile:
+        data = json.loads(data)
+        df = pd.DataFrame(data["data"], columns=data["columns"])
+        profile.rows = len(df)
+        data = FEATURE_TRANSFORM.transform(df)
+        try:
+            log_drift_metrics(DriftMonitor().update(data))
+        except Exception as e:
+            # Monitoring must not block predictions
+            logging.warning("Drift monitoring skipped: {}".format(e))
+        prediction = None
+        if in_process:
+            try:
+                prediction = get_scorer(service.config.model_uri).predict(data).copy()
+            except Exception as e:
+                logging.warning("In-process scoring unavailable, using the prediction service: {}".format(e))
+        if prediction is None:
+            if not service.is_running:
+                service.start(timeout=10)
+            if use_cache:
+                cache = PredictionCache.load()
+                prediction = cache.predict(data, service.predict, service.config.model_uri)
+                # Rewrites the cache file only when this request added entries
+                cache.save()
+                logging.info("Prediction cache: %s", cache.stats())
+            else:
+                prediction = service.predict(data)
+        contributions = np.empty((0, FEATURE_TRANSFORM.n_features), dtype=np.float32)
+        if explain:
+            contributions = get_explainer_for_uri(service.config.model_uri).explain(data)
+    return prediction, contributions
+
+@pipeline(enable_cache=False, settings={"docker": docker_settings})
+def inference_pipeline(pipeline_name: str, pipeline_step_name: str):
+    data = dynamic_importer()
+    service = prediction_service_loader(
+        pipeline_name=pipeline_name,
+        pipeline_step_name=pipeline_step_name,
+        running=False,
+    )
+    prediction, contributions = predictor(service=service, data=data)
+    return prediction
@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.explanations import get_explainer, get_explainer_for_uri
+from src.prediction_cache import PredictionCache
+from src.schema import FEATURE_TRANSFORM
+from src.scoring import get_scorer
+from src.shadow import ShadowScorer
+
+DEPLOYMENT_PIPELINE_NAME = "continuous_deployment_pipeline"
+DEPLOYER_STEP_NAME = "mlflow_model_deployer_step"
+
+
+def find_prediction_service(
+    pipeline_name: str = DEPLOYMENT_PIPELINE_NAME,
+    pipeline_step_name: str = DEPLOYER_STEP_NAME,
+    running: bool = True,
+    model_name: str = "model",
+):
+    """
+    Returns the MLflow prediction service started by the deployment
+    pipeline, or None. Only the MLflow deployer is imported, and only when
+    this is called, so callers that just need the service do not pay for
+    the training stack.
+    """
+    from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import (
+        MLFlowModelDeployer
+    )
+
+    existing_services = MLFlowModelDeployer.get_active_model_deployer().find_model_server(
+        pipeline_name=pipeline_name,
+        pipeline_step_name=pipeline_step_name,
+        model_name=model_name,
+        running=running,
+    )
+    return existing_services[0] if existing_services else None
+
+
+def deployed_model_metrics(
+    pipeline_name: str = DEPLOYMENT_PIPELINE_NAME,
+    pipeline_step_name: str = DEPLOYER_STEP_NAME,
+) -> Dict[str, float]:
+    """
+    Metrics logged by the MLflow run that produced the deployed model, or
+    an empty dict when nothing is deployed or the run cannot be resolved.
+    """
+    service = find_prediction_service(pipeline_name, pipeline_step_name, running=False)
+    if service is None:
+        return {}
+    model_uri = service.config.model_uri
+    if model_uri.startswith("runs:/"):
+        run_id = model_uri[len("runs:/"):].split("/")[0]
+    else:
+        # Local artifact stores: .../<experiment_id>/<run_id>/artifacts/<path>
+        parts = model_uri.rstrip("/").split("/")
+        if "artifacts" not in parts:
+            return {}
+        run_id = parts[parts.index("artifacts") - 1]
+    import mlflow
+
+    try:
+        return dict(mlflow.get_run(run_id).data.metrics)
+    except Exception as e:
+        logging.warning("Could not read the metrics of deployed run {}: {}".format(run_id, e))
+        return {}
+
+
+class PredictionServiceHandle:
+    """
+    Process-wide handle on the deployed model.
+
+    The deployer is queried at most once per `ttl_seconds`; in between, a
+    prediction costs only the scoring call. When the deployer reports a new
+    model URI (a new model version) the handle reloads the model and runs a
+    warm-up prediction before swapping it in. Models that can be scored
+    in-process are; others go through the prediction service, which is
+    health-checked on refresh and restarted if it is not running. With a
+    `shadow` scorer attached, every scored batch is also queued for the
+    challenger, off the request path. With a `cache`, rows scored through
+    the prediction service are looked up first and only the misses are
+    sent; the model URI is the cache version, so a new deployment
+    invalidates it. In-process scoring is cheaper than a lookup and is not
+    cached.
+    """
+
+    def __init__(
+        self,
+        pipeline_name: str = DEPLOYMENT_PIPELINE_NAME,
+        pipeline_step_name: str = DEPLOYER_STEP_NAME,
+        ttl_seconds: float = 30.0,
+        in_process: bool = True,
+        start_timeout: int = 10,
+        shadow: Optional[ShadowScorer] = None,
+        cache: Optional[PredictionCache] = None,
+    ):
+        self.pipeline_name = pipeline_name
+        self.pipeline_step_name = pipeline_step_name
+        self.ttl_seconds = ttl_seconds
+        self.in_process = in_process
+        self.start_timeout = start_timeout
+        self.shadow = shadow
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._service = None
+        self._scorer = None
+        self._explainer = None
+        self._model_uri = None
+        self._checked_at = float("-inf")
+        self.warmup_ms = 0.0
+
+    @property
+    def model_uri(self) -> Optional[str]:
+        return self._model_uri
+
+    def _score(self, service, scorer, X: np.ndarray) -> np.ndarray:
+        if scorer is not None:
+            return scorer.predict(X).copy()
+        return np.asarray(service.predict(X))
+
+    def _refresh(self):
+        service = find_prediction_service(self.pipeline_name, self.pipeline_step_name, running=False)
+        if service is None:
+            raise RuntimeError(
+                "No model has been deployed by the {} step of the {} pipeline".format(
+                    self.pipeline_step_name, self.pipeline_name
+                )
+            )
+        model_uri = service.config.model_uri
+        scorer = self._scorer if model_uri == self._model_uri else None
+        if model_uri != self._model_uri and self.in_process:
+            try:
+                scorer = get_scorer(model_uri)
+            except Exception as e:
+                logging.warning("In-process scoring unavailable, using the prediction service: {}".format(e))
+        if scorer is None and not service.is_running:
+            logging.info("Starting prediction service %s", service.uuid)
+            service.start(timeout=self.start_timeout)
+
+        if model_uri != self._model_uri:
+            self._explainer = None
+            logging.info("Loaded model %s", model_uri)
+            start = time.perf_counter()
+            self._score(service, scorer, np.zeros((1, FEATURE_TRANSFORM.n_features), dtype=np.float32))
+            self.warmup_ms = (time.perf_counter() - start) * 1e3
+        self._service, self._scorer, self._model_uri = service, scorer, model_uri
+        self._checked_at = time.monotonic()
+
+    def warm_up(self):
+        """Resolves the deployed model and runs one prediction so the first request is not cold."""
+        with self._lock:
+            self._refresh()
+
+    def invalidate(self):
+        """Forces the next prediction to query the deployer again."""
+        with self._lock:
+            self._checked_at = float("-inf")
+
+    def predict(self, X: np.ndarray) -> Tuple[np.ndarray, Dict[str, float]]:
+        """
+        Args:
+            X: float32 matrix in schema feature order
+        Returns:
+            prediction: model output per row
+            timings: milliseconds spent resolving the model, scoring and,
+                with a shadow scorer, queueing the batch for the challenger
+        """
+        start = time.perf_counter()
+        with self._lock:
+            if time.monotonic() - self._checked_at > self.ttl_seconds:
+                self._refresh()
+            service, scorer, model_uri = self._service, self._scorer, self._model_uri
+        resolved = time.perf_counter()
+        try:
+            if scorer is None and self.cache is not None:
+                prediction = self.cache.predict(X, lambda rows: self._score(service, None, rows), model_uri)
+            else:
+                prediction = self._score(service, scorer, X)
+        except Exception as e:
+            logging.error("Error in prediction: {}".format(e))
+            self.invalidate()
+            raise e
+        scored = time.perf_counter()
+        timings = {
+            "resolve_ms": (resolved - start) * 1e3,
+            "score_ms": (scored - resolved) * 1e3,
+        }
+        if self.shadow is not None:
+            self.shadow.submit(X, prediction)
+            timings["shadow_ms"] = (time.perf_counter() - scored) * 1e3
+        return prediction, timings
+
+    def explain(self, X: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Returns:
+            contributions: per-feature contributions to the model output of each row
+            expected_value: model output the contributions are relative to
+        """
+        with self._lock:
+            if self._model_uri is None:
+                self._refresh()
+            if self._explainer is None:
+                self._explainer = (
+                    get_explainer(self._scorer) if self._scorer is not None
+                    else get_explainer_for_uri(self._model_uri)
+                )
+            explainer = self._explainer
+        return explainer.explain(X), explainer.expected_value
+
+
+_handle: Optional[PredictionServiceHandle] = None
+_handle_lock = threading.Lock()
+
+
+def get_service_handle(**kwargs) -> PredictionServiceHandle:
+    """Returns the process-wide PredictionServiceHandle, creating it on first use."""
+    global _handle
+    with _handle_lock:
+        if _handle is None:
+            _handle = PredictionServiceHandle(**kwargs)
+        return _handle
@@ -1,19 +1,24 @@
 from zenml import pipeline
 from steps.ingest_data import ingest_df
-from steps.clean_data import clean_df
+from steps.clean_data import clean_df, stream_clean_df
 from steps.model_train import train_model
 from steps.evaluation import evaluate_model
 
 @pipeline(enable_cache=True)
-def train_pipeline(data_path: str):
+def train_pipeline(data_path: str, chunksize: int = 0):
     """
     Args:
         data_path: str
+        chunksize: if > 0, ingest and split the source in chunks of this
+            many rows with bounded memory
     Returns:
         mse: float
         rmse: float
     """
-    df = ingest_df(data_path)
-    X_train, X_test, y_train, y_test = clean_df(df)
+    if chunksize > 0:
+        X_train, X_test, y_train, y_test = stream_clean_df(data_path, chunksize=chunksize)
+    else:
+        df = ingest_df(data_path)
+        X_train, X_test, y_train, y_test = clean_df(df)
     model = train_model(X_train, X_test, y_train, y_test)
     r2_score, rmse = evaluate_model(model, X_test, y_test)
\ No newline at end of file
@@ -1,11 +1,11 @@
 import logging
 
-import pandas as pd
-from src.data_cleaning import DataCleaning, DataPreprocessStrategy
+from src.data_cache import DataCache
+from src.data_cleaning import COLUMN_DTYPES, DataCleaning, DataPreprocessStrategy
 
 def get_data_for_test():
     try:
-        df = pd.read_csv("Data/data.csv")
+        df = DataCache().load("Data/data.csv", columns=list(COLUMN_DTYPES))
         df = df.sample(n=100)
         preprocess_strategy = DataPreprocessStrategy()
         data_cleaning = DataCleaning(df, preprocess_strategy)
@@ -1,48 +1,154 @@
-from pipelines.deployment_pipeline import continuous_deployment_pipeline, inference_pipeline
+# Pipelines, ZenML and MLflow are imported inside `main`, per mode, so
+# `--help` and prediction-only runs do not import the training stack.
+from typing import Optional
+
 import click
-from rich import print
-from zenml.integrations.mlflow.mlflow_utils import get_tracking_uri
-from zenml.integrations.mlflow.model_deployers.mlflow_model_deployer import (
-    MLFlowModelDeployer
-)
-from zenml.integrations.mlflow.services import MLFlowDeploymentService
-from typing import cast
 
 DEPLOY = "deploy"
 PREDICT = "predict"
 DEPLOY_AND_PREDICT = "deploy_and_predict"
+BATCH = "batch"
 
 @click.command()
 @click.option(
     "--config",
     "-c",
-    type=click.Choice([DEPLOY, PREDICT, DEPLOY_AND_PREDICT]),
+    type=click.Choice([DEPLOY, PREDICT, DEPLOY_AND_PREDICT, BATCH]),
     default=DEPLOY_AND_PREDICT,
     help="Optionally you can choose to only run the deployment "
     "pipeline to train and deploy a model (`deploy`), or to "
     "only run a prediction against the deployed model "
     "(`predict`). By default both will be run "
-    "(`deploy_and_predict`).",
+    "(`deploy_and_predict`). `batch` scores every row of "
+    "--input-path with the deployed model.",
 )
 @click.option(
     "--min-accuracy",
     default=0,
     help="Minimum accuracy required to deploy the model",
 )
-def main(config: str, min_accuracy: float):
-    mlflow_model_deployer_component = MLFlowModelDeployer.get_active_model_deployer()
+@click.option(
+    "--gate-on-lower-bound",
+    is_flag=True,
+    default=False,
+    help="Gate deployment on the bootstrap lower confidence bound of the "
+    "R2 score instead of its point estimate",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Retrain from only the rows appended to the data since the last deployment run",
+)
+@click.option(
+    "--min-drift",
+    default=0.0,
+    help="Only redeploy once the inference inputs drifted at least this far "
+    "from the training data (maximum PSI over features); 0 ignores drift, "
+    "and so does the first deployment",
+)
+@click.option(
+    "--cross-validate",
+    is_flag=True,
+    default=False,
+    help="Gate deployment on the mean K-fold score of the training split, "
+    "stopping early once the candidate cannot beat the deployed model",
+)
+@click.option(
+    "--n-folds",
+    default=5,
+    help="Folds used with --cross-validate",
+)
+@click.option(
+    "--shadow",
+    is_flag=True,
+    default=False,
+    help="Keep serving the deployed model and export the new one to "
+    "models/challenger.cmdl for `run_serving.py --challenger-compact-model`",
+)
+@click.option(
+    "--input-path",
+    default="Data/data.csv",
+    help="CSV of customers to score in `batch` mode",
+)
+@click.option(
+    "--output-dir",
+    default="predictions",
+    help="Directory of Parquet parts written in `batch` mode; rerunning "
+    "into the same directory resumes after the last completed chunk",
+)
+@click.option(
+    "--explain",
+    is_flag=True,
+    default=False,
+    help="Write per-feature contributions next to every score in `batch` mode",
+)
+@click.option(
+    "--chunksize",
+    default=1_000_000,
+    help="Rows per chunk in `batch` mode",
+)
+@click.option(
+    "--key-column",
+    default=None,
+    help="Input column written as the customer key in `batch` mode; "
+    "defaults to the row number",
+)
+def main(
+    config: str,
+    min_accuracy: float,
+    gate_on_lower_bound: bool,
+    incremental: bool,
+    min_drift: float,
+    cross_validate: bool,
+    n_folds: int,
+    shadow: bool,
+    input_path: str,
+    output_dir: str,
+    explain: bool,
+    chunksize: int,
+    key_column: Optional[str],
+):
+    from rich import print
+    from zenml.integrations.mlflow.mlflow_utils import get_tracking_uri
+
+    from pipelines.service import find_prediction_service
+
     deploy = config == DEPLOY or config == DEPLOY_AND_PREDICT
     predict = config == PREDICT or config == DEPLOY_AND_PREDICT
 
     if deploy:
+        from pipelines.deployment_pipeline import continuous_deployment_pipeline
+
         continuous_deployment_pipeline(
             data_path="Data/data.csv",
             min_accuracy=min_accuracy,
             workers=3,
-            timeout=240
+            timeout=240,
+            gate_on_lower_bound=gate_on_lower_bound,
+            incremental=incremental,
+            min_drift=min_drift,
+            cross_validate=cross_validate,
+            n_folds=n_folds,
+            shadow=shadow,
+        )
+
+    if config == BATCH:
+        from pipelines.batch_pipeline import batch_scoring_pipeline
+
+        batch_scoring_pipeline(
+            pipeline_name="continuous_deployment_pipeline",
+            pipeline_step_name="mlflow_model_deployer_step",
+            input_path=input_path,
+            output_dir=output_dir,
+            chunksize=chunksize,
+            explain=explain,
+            key_column=key_column,
         )
 
     if predict:
+        from pipelines.inference_pipeline import inference_pipeline
+
         inference_pipeline(
             pipeline_name="continuous_deployment_pipeline",
             pipeline_step_name="mlflow_model_deployer_step"
@@ -57,14 +163,9 @@ def main(config: str, min_accuracy: float):
         "compare two or more runs.\n\n"
     )
 
-    existing_services = mlflow_model_deployer_component.find_model_server(
-        pipeline_name="continuous_deployment_pipeline",
-        pipeline_step_name="mlflow_model_deployer_step",
-        model_name="model",
-    )
+    service = find_prediction_service(running=False)
 
-    if existing_services:
-        service = cast(MLFlowDeploymentService, existing_services[0])
+    if service is not None:
         if service.is_running:
             print(
                 f"The MLflow prediction server is running locally as a daemon "
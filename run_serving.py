@@ -0,0 +1,90 @@
+import asyncio
+import logging
+
+import click
+
+from pipelines.service import find_prediction_service
+from src.compact_model import load as load_compact_model
+from src.schema import FEATURE_TRANSFORM
+from src.scoring import get_scorer
+from src.scoring_pool import SharedScoringPool
+from src.shadow import ShadowScorer
+from src.serving import MicroBatcher, PredictionServer
+
+
+def deployed_model_uri() -> str:
+    """Returns the model URI of the service started by the deployment pipeline."""
+    service = find_prediction_service(running=False)
+    if service is None:
+        raise RuntimeError(
+            "No model has been deployed yet. Run `python run_deployment.py --config deploy` first."
+        )
+    return service.config.model_uri
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=8080)
+@click.option("--model-uri", default=None, help="MLflow model URI; defaults to the deployed model")
+@click.option("--compact-model", default=None, help="Compact model file to score with instead of an MLflow model")
+@click.option("--workers", default=1, help="Scoring processes sharing one copy of the compact model")
+@click.option("--challenger-model-uri", default=None, help="MLflow model URI to shadow-score every batch with")
+@click.option("--challenger-compact-model", default=None, help="Compact model file to shadow-score every batch with")
+@click.option("--shadow-queue", default=32, help="Batches waiting for the challenger before new ones are dropped")
+@click.option("--max-batch-size", default=64, help="Maximum rows coalesced into one batch")
+@click.option("--max-wait-ms", default=2.0, help="Maximum time a request waits for its batch to fill")
+def main(
+    host: str,
+    port: int,
+    model_uri: str,
+    compact_model: str,
+    workers: int,
+    challenger_model_uri: str,
+    challenger_compact_model: str,
+    shadow_queue: int,
+    max_batch_size: int,
+    max_wait_ms: float,
+):
+    logging.basicConfig(level=logging.INFO)
+    pool = None
+    if compact_model and workers > 1:
+        pool = SharedScoringPool.from_file(
+            compact_model,
+            n_workers=workers,
+            max_batch_rows=max_batch_size,
+            min_rows_per_worker=max(1, max_batch_size // workers),
+        )
+        predict_fn = pool.predict
+    elif compact_model:
+        predict_fn = load_compact_model(compact_model).predict
+    else:
+        predict_fn = get_scorer(model_uri or deployed_model_uri()).predict
+    shadow = None
+    if challenger_compact_model or challenger_model_uri:
+        challenger = (
+            load_compact_model(challenger_compact_model) if challenger_compact_model
+            else get_scorer(challenger_model_uri)
+        )
+        # Responses are served by the champion; the challenger sees copies off the request path
+        shadow = ShadowScorer(challenger.predict, max_queue=shadow_queue)
+        predict_fn = shadow.wrap(predict_fn)
+    batcher = MicroBatcher(
+        predict_fn,
+        n_features=FEATURE_TRANSFORM.n_features,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+        # Batches are assembled in the pool's shared arena: no copy per batch
+        buffer=pool.input if pool is not None else None,
+    )
+    try:
+        asyncio.run(PredictionServer(batcher, shadow=shadow).serve(host, port))
+    finally:
+        # Stops the workers and unlinks the shared-memory segments
+        if pool is not None:
+            pool.close()
+        if shadow is not None:
+            shadow.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data_cache import file_sha256
+from src.explanations import Explainer
+from src.model_dev import predict_scores
+from src.schema import CHURN_SCHEMA, FEATURE_TRANSFORM
+
+PART_PATTERN = re.compile(r"^part-(\d{5})\.parquet$")
+MANIFEST_NAME = "manifest.json"
+
+_worker_model = None
+_worker_explainer = None
+
+
+def _init_worker(model, explainer=None):
+    global _worker_model, _worker_explainer
+    _worker_model = model
+    _worker_explainer = explainer
+
+
+def _score_chunk(chunk_index: int, chunk: pd.DataFrame, key_column: str, output_dir: str) -> int:
+    """Scores one chunk in a worker and writes it as an atomically renamed Parquet part."""
+    X = FEATURE_TRANSFORM.transform(chunk)
+    scores = predict_scores(_worker_model, X)
+    columns = {
+        key_column: chunk[key_column].to_numpy(),
+        "churn_score": np.asarray(scores, dtype=np.float32),
+    }
+    if _worker_explainer is not None:
+        contributions = _worker_explainer.explain(X)
+        for j, name in enumerate(FEATURE_TRANSFORM.names):
+            columns["contrib_" + name] = contributions[:, j]
+    table = pa.table(columns)
+    if _worker_explainer is not None:
+        table = table.replace_schema_metadata({"expected_value": str(_worker_explainer.expected_value)})
+    path = os.path.join(output_dir, "part-{:05d}.parquet".format(chunk_index))
+    pq.write_table(table, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return len(chunk)
+
+
+class BatchScorer:
+    """
+    Scores a CSV of customers in chunks across a process pool and writes one
+    Parquet part per chunk with the customer key and churn score.
+
+    A part only appears once it is fully written, so a rerun into the same
+    output directory resumes after the last contiguous completed chunk and
+    skips any later parts that already exist. The output directory's
+    manifest records the input's content hash, the chunking and the
+    `model_version` that scored it; a rerun whose input, chunksize, key
+    column, explain setting or model differs from the manifest is refused
+    rather than mixed with parts that number different rows or hold another
+    model's scores. Without a key column the
+    global row number is used as the key. With an explainer every part also
+    carries one `contrib_<feature>` column per feature, and the explainer's
+    expected value is stored in the Parquet schema metadata.
+    """
+
+    def __init__(
+        self,
+        model,
+        output_dir: str,
+        chunksize: int = 1_000_000,
+        max_workers: int = 0,
+        key_column: Optional[str] = None,
+        explainer: Optional[Explainer] = None,
+        model_version: Optional[str] = None,
+    ):
+        self.model = model
+        self.model_version = model_version
+        self.explainer = explainer
+        self.output_dir = output_dir
+        self.chunksize = chunksize
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.key_column = key_column
+
+    def completed_chunks(self) -> set:
+        if not os.path.isdir(self.output_dir):
+            return set()
+        return {
+            int(match.group(1))
+            for match in map(PART_PATTERN.match, os.listdir(self.output_dir))
+            if match
+        }
+
+    def _manifest(self, input_path: str) -> dict:
+        return {
+            "input_sha256": file_sha256(input_path),
+            "chunksize": self.chunksize,
+            "key_column": self.key_column,
+            "explain": self.explainer is not None,
+            "model_version": self.model_version,
+        }
+
+    def _check_manifest(self, manifest: dict, completed: set):
+        """Records `manifest` for a fresh output directory, or checks it matches the one being resumed."""
+        path = os.path.join(self.output_dir, MANIFEST_NAME)
+        if completed:
+            try:
+                with open(path) as f:
+                    existing = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                existing = None
+            if existing != manifest:
+                raise ValueError(
+                    "{} holds parts written for another input, chunking or model ({} != {}); "
+                    "score into an empty output directory".format(self.output_dir, existing, manifest)
+                )
+            return
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def _iter_chunks(self, input_path: str, first_chunk: int):
+        usecols = CHURN_SCHEMA.inputs + ([self.key_column] if self.key_column else [])
+        dtypes = {name: CHURN_SCHEMA.dtypes[name] for name in CHURN_SCHEMA.inputs}
+        header = list(pd.read_csv(input_path, nrows=0).columns)
+        reader = pd.read_csv(
+            input_path,
+            header=None,
+            names=header,
+            usecols=usecols,
+            dtype=dtypes,
+            chunksize=self.chunksize,
+            # Header and completed leading chunks are skipped without being
+            # parsed; a count, since pandas turns a range into a set of rows
+            skiprows=first_chunk * self.chunksize + 1,
+        )
+        with reader:
+            for offset, chunk in enumerate(reader):
+                if chunk.empty:
+                    # Every row was already scored
+                    return
+                chunk_index = first_chunk + offset
+                if not self.key_column:
+                    start = chunk_index * self.chunksize
+                    chunk["row_id"] = np.arange(start, start + len(chunk), dtype=np.int64)
+                yield chunk_index, chunk
+
+    def run(self, input_path: str) -> dict:
+        """
+        Args:
+            input_path: CSV with the schema features (and the key column)
+        Returns:
+            report: rows scored, chunks written and skipped, rows/sec
+        """
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            completed = self.completed_chunks()
+            self._check_manifest(self._manifest(input_path), completed)
+            first_chunk = 0
+            while first_chunk in completed:
+                first_chunk += 1
+            if completed:
+                logging.info("Resuming batch scoring at chunk %d", first_chunk)
+
+            key_column = self.key_column or "row_id"
+            rows = 0
+            written = 0
+            skipped = first_chunk
+            started = time.perf_counter()
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_worker, initargs=(self.model, self.explainer)
+            ) as pool:
+                pending = set()
+                for chunk_index, chunk in self._iter_chunks(input_path, first_chunk):
+                    if chunk_index in completed:
+                        skipped += 1
+                        continue
+                    # Bound the number of chunks held in memory at once
+                    if len(pending) >= 2 * self.max_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            rows += future.result()
+                            written += 1
+                    pending.add(pool.submit(_score_chunk, chunk_index, chunk, key_column, self.output_dir))
+                for future in pending:
+                    rows += future.result()
+                    written += 1
+            elapsed = time.perf_counter() - started
+
+            report = {
+                "rows": rows,
+                "chunks_written": written,
+                "chunks_skipped": skipped,
+                "seconds": elapsed,
+                "rows_per_sec": rows / elapsed if elapsed else 0.0,
+            }
+            logging.info("Batch scoring report: %s", report)
+            return report
+        except Exception as e:
+            logging.error("Error in batch scoring: {}".format(e))
+            raise e
@@ -0,0 +1,147 @@
+"""
+Compact, versioned binary model format and a NumPy-only scorer.
+
+Layout (little-endian, every array 8-byte aligned):
+
+    header   64 bytes   magic, version, kind, link, split rule, n_features,
+                        n_trees, n_nodes, max_depth, base score
+    linear:  coef       float64[n_features]
+    trees:   roots      int32[n_trees]       absolute node index of each root
+             feature    int32[n_nodes]       -1 marks a leaf
+             threshold  float64[n_nodes]
+             left       int32[n_nodes]       absolute child indices
+             right      int32[n_nodes]
+             missing    uint8[n_nodes]       1 if NaN goes left
+             value      float64[n_nodes]     leaf outputs (margin)
+
+The file is memory-mapped on load, so starting a scorer costs one mmap
+and a header parse; nothing outside NumPy is imported.
+"""
+import struct
+from typing import Dict, Union
+
+import numpy as np
+
+MAGIC = b"CHURNMDL"
+VERSION = 1
+KIND_LINEAR = 1
+KIND_TREES = 2
+LINK_IDENTITY = 0
+LINK_SIGMOID = 1
+SPLIT_LE = 0  # go left when x <= threshold (LightGBM)
+SPLIT_LT = 1  # go left when x < threshold (XGBoost)
+
+_HEADER = struct.Struct("<8sIIIIIIIId")
+HEADER_SIZE = 64
+
+_TREE_ARRAYS = (
+    ("feature", np.int32),
+    ("threshold", np.float64),
+    ("left", np.int32),
+    ("right", np.int32),
+    ("missing", np.uint8),
+    ("value", np.float64),
+)
+
+
+def _pad(n_bytes: int) -> int:
+    return (n_bytes + 7) & ~7
+
+
+def pack(
+    kind: int,
+    n_features: int,
+    link: int = LINK_IDENTITY,
+    base_score: float = 0.0,
+    coef: np.ndarray = None,
+    trees: Dict[str, np.ndarray] = None,
+    split_rule: int = SPLIT_LE,
+    max_depth: int = 0,
+) -> bytes:
+    """Serializes a model into the compact format."""
+    n_trees = n_nodes = 0
+    arrays = []
+    if kind == KIND_LINEAR:
+        arrays.append(np.ascontiguousarray(coef, dtype=np.float64))
+    else:
+        n_trees = len(trees["roots"])
+        n_nodes = len(trees["feature"])
+        arrays.append(np.ascontiguousarray(trees["roots"], dtype=np.int32))
+        arrays.extend(np.ascontiguousarray(trees[name], dtype=dtype) for name, dtype in _TREE_ARRAYS)
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, kind, link, split_rule, n_features, n_trees, n_nodes, max_depth, base_score
+    )
+    chunks = [header.ljust(HEADER_SIZE, b"\0")]
+    for array in arrays:
+        raw = array.tobytes()
+        chunks.append(raw.ljust(_pad(len(raw)), b"\0"))
+    return b"".join(chunks)
+
+
+class CompactModel:
+    """Scores float32/float64 feature matrices from a compact model buffer."""
+
+    def __init__(self, buffer: Union[bytes, memoryview, np.ndarray]):
+        buffer = np.frombuffer(buffer, dtype=np.uint8)
+        (magic, version, self.kind, self.link, self.split_rule, self.n_features,
+         n_trees, n_nodes, self.max_depth, self.base_score) = _HEADER.unpack_from(buffer[:_HEADER.size].tobytes())
+        if magic != MAGIC:
+            raise ValueError("Not a compact model file")
+        if version != VERSION:
+            raise ValueError("Unsupported compact model version {}".format(version))
+
+        offset = HEADER_SIZE
+
+        def take(dtype, count):
+            nonlocal offset
+            array = buffer[offset:offset + count * np.dtype(dtype).itemsize].view(dtype)
+            offset += _pad(array.nbytes)
+            return array
+
+        if self.kind == KIND_LINEAR:
+            self.coef = take(np.float64, self.n_features)
+        elif self.kind == KIND_TREES:
+            self.roots = take(np.int32, n_trees)
+            for name, dtype in _TREE_ARRAYS:
+                setattr(self, name, take(dtype, n_nodes))
+        else:
+            raise ValueError("Unknown model kind {}".format(self.kind))
+
+    def _tree_margin(self, X: np.ndarray) -> np.ndarray:
+        n_rows = X.shape[0]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.roots.shape[0])).copy()
+        rows = np.arange(n_rows)[:, None]
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            internal = feature >= 0
+            if not internal.any():
+                break
+            x = X[rows, np.maximum(feature, 0)]
+            threshold = self.threshold[nodes]
+            go_left = x <= threshold if self.split_rule == SPLIT_LE else x < threshold
+            go_left = np.where(np.isnan(x), self.missing[nodes].astype(bool), go_left)
+            children = np.where(go_left, self.left[nodes], self.right[nodes])
+            nodes = np.where(internal, children, nodes)
+        return self.value[nodes].sum(axis=1) + self.base_score
+
+    def predict(self, X: np.ndarray, chunk_rows: int = 65_536) -> np.ndarray:
+        """
+        Returns:
+            scores: churn probability for sigmoid-link models, raw prediction otherwise
+        """
+        X = np.asarray(X)
+        if self.kind == KIND_LINEAR:
+            margin = X @ self.coef + self.base_score
+        else:
+            margin = np.concatenate(
+                [self._tree_margin(X[i:i + chunk_rows]) for i in range(0, X.shape[0], chunk_rows)]
+            ) if X.shape[0] else np.empty(0)
+        if self.link == LINK_SIGMOID:
+            return 1.0 / (1.0 + np.exp(-margin))
+        return margin
+
+
+def load(path: str) -> CompactModel:
+    """Memory-maps a compact model file."""
+    return CompactModel(np.memmap(path, dtype=np.uint8, mode="r"))
@@ -0,0 +1,164 @@
+import logging
+import multiprocessing as mp
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from src.data_cleaning import IndexSplitStrategy, SharedSplit
+from src.evaluation import EvaluationEngine
+from src.model_dev import get_model, predict_scores
+
+# Best value each gating metric can reach, used to bound the folds not yet scored
+BEST_POSSIBLE = {
+    "r2_score": 1.0, "auc": 1.0, "accuracy": 1.0, "precision": 1.0, "recall": 1.0,
+    "mse": 0.0, "rmse": 0.0, "mae": 0.0, "log_loss": 0.0,
+}
+LOWER_IS_BETTER = ("mse", "rmse", "mae", "log_loss")
+
+
+def _fit_fold(
+    directory: str, fold: int, model_name: str, params: dict, n_threads: int
+) -> Tuple[int, EvaluationEngine, float]:
+    """Fits on every block but `fold` of the shared split and scores the held-out block."""
+    started = time.perf_counter()
+    shared = SharedSplit(directory)
+    train_rows = shared.complement_index(fold)
+    X_val, y_val = shared.block(fold)
+    model = get_model(model_name)
+    params = dict(params)
+    params.setdefault(model.threads_param, n_threads)
+    with threadpool_limits(limits=n_threads):
+        trained = model.train(shared.X[train_rows], shared.y[train_rows], **params)
+        engine = EvaluationEngine().update(y_val, predict_scores(trained, X_val))
+    # Scratch buffers are rebuilt on demand; do not pickle them back
+    engine._buffers = None
+    return fold, engine, time.perf_counter() - started
+
+
+def _fit_fold_star(args):
+    return _fit_fold(*args)
+
+
+class CrossValidator:
+    """
+    Stratified K-fold evaluation of one model family with the folds fitted
+    in parallel processes.
+
+    The folds are blocks of one memory-mapped SharedSplit matrix, so workers
+    map the same pages instead of each receiving a pickled copy; the
+    held-out block is scored straight from the map and only the training
+    complement is gathered. Each worker gets `n_cpus // max_workers` threads,
+    as in ParallelTrainer.
+
+    Given a `champion_score`, folds are collected as they finish and the
+    run stops once the candidate's mean score cannot beat the champion even
+    if every remaining fold scored the best possible value; the pool is then
+    terminated, so running fits are not waited for.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        n_folds: int = 5,
+        metric: str = "r2_score",
+        max_workers: int = 0,
+        params: Optional[dict] = None,
+        random_state: int = 42,
+        cache_dir: str = os.path.join(".cache", "splits"),
+    ):
+        if metric not in BEST_POSSIBLE:
+            raise ValueError("Cannot cross-validate on metric {}".format(metric))
+        self.model_name = model_name
+        self.n_folds = n_folds
+        self.metric = metric
+        n_cpus = os.cpu_count() or 1
+        self.max_workers = max_workers or min(n_folds, n_cpus)
+        self.threads_per_worker = max(1, n_cpus // self.max_workers)
+        self.params = params or {}
+        self.splitter = IndexSplitStrategy(random_state=random_state, cache_dir=cache_dir)
+        self.fold_metrics: Dict[int, dict] = {}
+        self.aborted = False
+
+    def _better(self, score: float, champion: float) -> bool:
+        return score < champion if self.metric in LOWER_IS_BETTER else score > champion
+
+    def upper_bound(self) -> float:
+        """Best mean fold score still reachable given the folds scored so far."""
+        scores = [metrics[self.metric] for metrics in self.fold_metrics.values()]
+        remaining = self.n_folds - len(scores)
+        return (sum(scores) + remaining * BEST_POSSIBLE[self.metric]) / self.n_folds
+
+    def run(self, data: pd.DataFrame, champion_score: Optional[float] = None) -> dict:
+        """
+        Args:
+            data: features plus the churn target
+            champion_score: the deployed model's score on `metric`, if any
+        Returns:
+            metrics: `cv_<metric>_mean` / `_std` over the scored folds,
+                the pooled metrics of all scored rows as `cv_<metric>`,
+                `cv_folds_scored` and `cv_aborted`
+        """
+        try:
+            shared = self.splitter.split(data, n_blocks=self.n_folds)
+            logging.info(
+                "Cross-validating %s on %d folds with %d workers of %d threads",
+                self.model_name, self.n_folds, self.max_workers, self.threads_per_worker,
+            )
+            tasks = [
+                (shared.directory, fold, self.model_name, self.params, self.threads_per_worker)
+                for fold in range(self.n_folds)
+            ]
+            pooled = EvaluationEngine()
+            self.fold_metrics, self.aborted = {}, False
+            pool = mp.Pool(processes=self.max_workers)
+            try:
+                for fold, engine, seconds in pool.imap_unordered(_fit_fold_star, tasks):
+                    self.fold_metrics[fold] = engine.compute()
+                    pooled.merge(engine)
+                    logging.info(
+                        "Fold %d: %s %.4f in %.1fs", fold, self.metric, self.fold_metrics[fold][self.metric], seconds
+                    )
+                    if champion_score is not None and not self._better(self.upper_bound(), champion_score):
+                        self.aborted = len(self.fold_metrics) < self.n_folds
+                        logging.info(
+                            "Stopping after %d folds: %s cannot exceed %.4f, champion has %.4f",
+                            len(self.fold_metrics), self.metric, self.upper_bound(), champion_score,
+                        )
+                        break
+            finally:
+                pool.terminate()
+                pool.join()
+
+            scores = np.array([metrics[self.metric] for metrics in self.fold_metrics.values()])
+            results = {"cv_" + name: value for name, value in pooled.compute().items()}
+            results.update({
+                "cv_{}_mean".format(self.metric): float(scores.mean()),
+                "cv_{}_std".format(self.metric): float(scores.std()),
+                "cv_folds_scored": float(len(scores)),
+                "cv_aborted": float(self.aborted),
+            })
+            return results
+        except Exception as e:
+            logging.error("Error in cross-validation: {}".format(e))
+            raise e
+
+    def beats(self, champion_score: Optional[float]) -> bool:
+        """Whether the completed run's mean fold score beats the champion (always, without one)."""
+        if champion_score is None:
+            return True
+        if self.aborted:
+            return False
+        scores = [metrics[self.metric] for metrics in self.fold_metrics.values()]
+        return self._better(float(np.mean(scores)), champion_score)
+
+    def fold_series(self) -> List[Tuple[int, str, float]]:
+        """(fold, metric name, value) for every scored fold, for per-step logging."""
+        return [
+            (fold, "cv_fold_" + name, value)
+            for fold, metrics in sorted(self.fold_metrics.items())
+            for name, value in metrics.items()
+        ]
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import os
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "data")
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """Streams a file through sha256 without loading it into memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DataCache:
+    """
+    On-disk columnar cache of parsed CSV sources stored as uncompressed Arrow
+    IPC files, so repeat reads are memory-mapped instead of re-parsed.
+
+    Entries are keyed by the source's absolute path, size, mtime and content
+    hash. The content hash is only recomputed when size or mtime change, and
+    an entry whose source has changed is evicted when it is replaced.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_manifest(self, manifest: dict):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _evict(self, entry: dict):
+        path = os.path.join(self.cache_dir, entry["file"])
+        if os.path.exists(path):
+            logging.info("Evicting stale cache entry %s", path)
+            os.remove(path)
+
+    def _build(self, source_path: str, cache_path: str):
+        logging.info("Parsing %s into columnar cache %s", source_path, cache_path)
+        table = pa.Table.from_pandas(pd.read_csv(source_path), preserve_index=False)
+        tmp_path = cache_path + ".tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, cache_path)
+
+    def get_path(self, source_path: str) -> str:
+        """
+        Returns the path of an up-to-date Arrow IPC file for `source_path`,
+        (re)building it if the source changed since it was cached.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        source_path = os.path.abspath(source_path)
+        stat = os.stat(source_path)
+        manifest = self._read_manifest()
+        entry = manifest.get(source_path)
+
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            cache_path = os.path.join(self.cache_dir, entry["file"])
+            if os.path.exists(cache_path):
+                return cache_path
+
+        content_hash = file_sha256(source_path)
+        key = hashlib.sha256(
+            f"{source_path}|{stat.st_size}|{stat.st_mtime_ns}|{content_hash}".encode()
+        ).hexdigest()[:16]
+        file_name = "{}-{}.arrow".format(os.path.splitext(os.path.basename(source_path))[0], key)
+        cache_path = os.path.join(self.cache_dir, file_name)
+
+        if entry and entry["file"] != file_name:
+            self._evict(entry)
+        if not os.path.exists(cache_path):
+            self._build(source_path, cache_path)
+
+        manifest[source_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": content_hash,
+            "file": file_name,
+        }
+        self._write_manifest(manifest)
+        return cache_path
+
+    def load(self, source_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Args:
+            source_path: path of the CSV source
+            columns: optional subset of columns to load
+        Returns:
+            df: pd.DataFrame backed by the memory-mapped cache where possible
+        """
+        try:
+            cache_path = self.get_path(source_path)
+            with pa.memory_map(cache_path, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+            if columns is not None:
+                table = table.select(columns)
+            return table.to_pandas(split_blocks=True)
+        except Exception as e:
+            logging.error("Error loading {} from the data cache: {}".format(source_path, e))
+            raise e
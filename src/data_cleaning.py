@@ -1,11 +1,20 @@
+import json
 import logging
+import os
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import Iterable, List, Tuple, Union
 
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from src.schema import CHURN_SCHEMA, FEATURE_TRANSFORM, FeatureSchema
+from src.step_cache import fingerprint, schema_fingerprint
+
+# Columns (and their on-disk dtypes) that survive DataPreprocessStrategy.
+# Used by streaming ingestion to skip parsing everything else.
+COLUMN_DTYPES = CHURN_SCHEMA.dtypes
+
 class DataStrategy(ABC):
     """
     Abstract Class defining strategy for handling data
@@ -14,34 +23,225 @@ class DataStrategy(ABC):
     def handle_data(self, data: pd.DataFrame) -> Union[pd.DataFrame, pd.Series]:
         pass
 class DataPreprocessStrategy(DataStrategy):
+    """
+    Keeps the schema's feature and target columns, in schema order, with a
+    single column selection.
+    """
+
+    def __init__(self, schema: FeatureSchema = CHURN_SCHEMA):
+        self.schema = schema
 
     def handle_data(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        Removes columns which are not required, fills missing values with median average values, and converts the data type to float.
+        Removes columns which are not required by the schema, keeping the target when present.
         """
         try:
-            # Remove the next line to keep the "churn" column
-            # data = data.select_dtypes(include=[np.number])
-            data = data.select_dtypes(include=[np.number])
-            cols_to_drop = ["total_day_charge", "total_eve_charge","total_night_charge","total_intl_charge"]
-            data = data.drop(cols_to_drop, axis=1)
-            return data
+            columns = [col for col in self.schema.columns if col in data.columns]
+            return data.loc[:, columns]
         except Exception as e:
             logging.error(e)
             raise e
 
 class DataDivideStrategy:
+    def __init__(self, test_size: float = 0.2, random_state: int = 42):
+        self.test_size = test_size
+        self.random_state = random_state
+
     def handle_data(self, data):
         try:
             logging.info("Data columns before division: %s", data.columns)
             X = data.drop("churn", axis=1)
             y = data["churn"]
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=self.test_size, random_state=self.random_state
+            )
             return X_train, X_test, y_train, y_test
         except Exception as e:
             logging.error("Error in handling data: %s", e)
             raise e
 
+class SharedSplit:
+    """
+    One memory-mapped float32 feature matrix whose rows are ordered so that
+    every split block (train/test for a holdout, one block per fold for
+    K-fold) is contiguous. Blocks are returned as views into the shared
+    buffer; only the complement of a fold has to be gathered.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        self.bounds: List[int] = meta["bounds"]
+        self.feature_names: List[str] = meta["feature_names"]
+        self.X = np.load(os.path.join(directory, "X.npy"), mmap_mode="r")
+        self.y = np.load(os.path.join(directory, "y.npy"), mmap_mode="r")
+        # Original row position of every matrix row
+        self.row_index = np.load(os.path.join(directory, "row_index.npy"), mmap_mode="r")
+
+    @property
+    def n_blocks(self) -> int:
+        return len(self.bounds) - 1
+
+    def block(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Features and labels of block `i` as views."""
+        start, end = self.bounds[i], self.bounds[i + 1]
+        return self.X[start:end], self.y[start:end]
+
+    def complement_index(self, i: int) -> np.ndarray:
+        """Matrix row positions outside block `i`, e.g. the training rows of fold `i`."""
+        start, end = self.bounds[i], self.bounds[i + 1]
+        return np.r_[0:start, end:self.bounds[-1]]
+
+    @classmethod
+    def build(
+        cls,
+        data: pd.DataFrame,
+        directory: str,
+        n_blocks: int = 2,
+        test_size: float = 0.2,
+        random_state: int = 42,
+        target: str = "churn",
+        chunk_rows: int = 1_000_000,
+    ) -> "SharedSplit":
+        """
+        Writes a stratified split of `data` into `directory`. With
+        n_blocks=2 the blocks are (train, test) with `test_size` of each
+        class held out; otherwise they are `n_blocks` stratified folds.
+        """
+        y = data[target].to_numpy()
+        order, bounds = cls._assign_blocks(y, n_blocks, test_size, random_state)
+        X = cls._open_matrix(directory, len(data))
+        for start in range(0, len(data), chunk_rows):
+            rows = order[start:start + chunk_rows]
+            FEATURE_TRANSFORM.transform(data.iloc[rows], out=X[start:start + len(rows)])
+        return cls._finish(directory, X, y, order, bounds)
+
+    @classmethod
+    def build_from_chunks(
+        cls,
+        y: np.ndarray,
+        chunks: Iterable[pd.DataFrame],
+        directory: str,
+        n_blocks: int = 2,
+        test_size: float = 0.2,
+        random_state: int = 42,
+    ) -> "SharedSplit":
+        """
+        Same split as `build`, written from the labels and a stream of
+        preprocessed chunks in source row order: each chunk is transformed
+        and scattered to its rows' positions in the memory-mapped matrix, so
+        only one chunk is held in memory at a time.
+        """
+        order, bounds = cls._assign_blocks(np.asarray(y), n_blocks, test_size, random_state)
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        X = cls._open_matrix(directory, len(order))
+        start = 0
+        for chunk in chunks:
+            X[position[start:start + len(chunk)]] = FEATURE_TRANSFORM.transform(chunk)
+            start += len(chunk)
+        if start != len(order):
+            raise ValueError("Chunks held {} rows, expected {}".format(start, len(order)))
+        return cls._finish(directory, X, np.asarray(y), order, bounds)
+
+    @staticmethod
+    def _assign_blocks(y: np.ndarray, n_blocks: int, test_size: float, random_state: int):
+        """Row order that makes every stratified block contiguous, and the block bounds."""
+        rng = np.random.default_rng(random_state)
+        block_of_row = np.empty(len(y), dtype=np.int64)
+        for label in np.unique(y):
+            rows = rng.permutation(np.flatnonzero(y == label))
+            if n_blocks == 2:
+                n_test = int(round(len(rows) * test_size))
+                block_of_row[rows[:n_test]] = 1
+                block_of_row[rows[n_test:]] = 0
+            else:
+                block_of_row[rows] = np.arange(len(rows)) % n_blocks
+        order = np.argsort(block_of_row, kind="stable")
+        bounds = np.searchsorted(block_of_row[order], np.arange(n_blocks + 1)).tolist()
+        return order, bounds
+
+    @staticmethod
+    def _open_matrix(directory: str, n_rows: int) -> np.ndarray:
+        os.makedirs(directory, exist_ok=True)
+        return np.lib.format.open_memmap(
+            os.path.join(directory, "X.npy"), mode="w+",
+            dtype=FEATURE_TRANSFORM.dtype, shape=(n_rows, FEATURE_TRANSFORM.n_features),
+        )
+
+    @classmethod
+    def _finish(
+        cls, directory: str, X: np.ndarray, y: np.ndarray, order: np.ndarray, bounds: List[int]
+    ) -> "SharedSplit":
+        X.flush()
+        del X
+        np.save(os.path.join(directory, "y.npy"), y[order].astype(FEATURE_TRANSFORM.dtype))
+        np.save(os.path.join(directory, "row_index.npy"), order)
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({"bounds": bounds, "feature_names": FEATURE_TRANSFORM.names}, f)
+        return cls(directory)
+
+class IndexSplitStrategy(DataStrategy):
+    """
+    Stratified holdout split backed by a SharedSplit: the returned frames
+    wrap views of one memory-mapped matrix instead of four copies.
+    """
+
+    def __init__(self, test_size: float = 0.2, random_state: int = 42, cache_dir: str = os.path.join(".cache", "splits")):
+        self.test_size = test_size
+        self.random_state = random_state
+        self.cache_dir = cache_dir
+
+    def split(self, data: pd.DataFrame, n_blocks: int = 2) -> SharedSplit:
+        """Builds (or reuses) the shared split for `data`."""
+        directory = os.path.join(
+            self.cache_dir, fingerprint(data, n_blocks, self.test_size, self.random_state)[:16]
+        )
+        if os.path.exists(os.path.join(directory, "meta.json")):
+            return SharedSplit(directory)
+        return SharedSplit.build(
+            data, directory, n_blocks=n_blocks, test_size=self.test_size, random_state=self.random_state
+        )
+
+    def split_chunks(self, y: np.ndarray, chunks: Iterable[pd.DataFrame], source_key: str) -> SharedSplit:
+        """
+        Builds (or reuses) the shared split from labels and a stream of
+        preprocessed chunks. `source_key` identifies the source content
+        and the schema fingerprint its preprocessing, so a schema change
+        rebuilds the split rather than reusing the old columns.
+        """
+        directory = os.path.join(
+            self.cache_dir,
+            fingerprint(source_key, schema_fingerprint(), 2, self.test_size, self.random_state)[:16],
+        )
+        if os.path.exists(os.path.join(directory, "meta.json")):
+            return SharedSplit(directory)
+        return SharedSplit.build_from_chunks(
+            y, chunks, directory, test_size=self.test_size, random_state=self.random_state
+        )
+
+    @staticmethod
+    def frames(shared: SharedSplit, index: pd.Index):
+        """(X_train, X_test, y_train, y_test) frames wrapping views of a two-block split."""
+        outputs = []
+        for i in range(2):
+            X, y = shared.block(i)
+            block_index = pd.Index(index[shared.row_index[shared.bounds[i]:shared.bounds[i + 1]]])
+            outputs.append((
+                pd.DataFrame(X, columns=shared.feature_names, index=block_index, copy=False),
+                pd.Series(y, index=block_index, name="churn", copy=False),
+            ))
+        (X_train, y_train), (X_test, y_test) = outputs
+        return X_train, X_test, y_train, y_test
+
+    def handle_data(self, data: pd.DataFrame):
+        try:
+            return self.frames(self.split(data), data.index)
+        except Exception as e:
+            logging.error("Error in handling data: %s", e)
+            raise e
+
 class DataCleaning:
     """
     Data cleaning class which preprocesses the data and divides it into train and test data.
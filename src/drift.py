@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.schema import FEATURE_TRANSFORM
+
+DEFAULT_STATE_DIR = os.path.join(".cache", "drift")
+
+
+class FeatureSketch:
+    """
+    Fixed-size, mergeable summary of a float feature matrix.
+
+    Every feature is histogrammed over bins whose edges are the quantiles
+    of a reference sample, with one extra slot for NaNs, next to running
+    counts, sums, sums of squares, minima and maxima. Updating costs
+    O(batch) and memory does not grow with the rows seen; two sketches with
+    the same edges merge by addition. Quantiles are estimated by
+    interpolating the cumulative histogram.
+    """
+
+    def __init__(self, edges: np.ndarray, names: List[str]):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.names = list(names)
+        n_features, n_edges = self.edges.shape
+        self.n_bins = n_edges + 1
+        self.counts = np.zeros((n_features, self.n_bins + 1), dtype=np.int64)
+        self.n_rows = 0
+        self.sums = np.zeros(n_features)
+        self.sums_sq = np.zeros(n_features)
+        self.minima = np.full(n_features, np.inf)
+        self.maxima = np.full(n_features, -np.inf)
+
+    @classmethod
+    def from_reference(
+        cls,
+        X: np.ndarray,
+        names: List[str],
+        n_bins: int = 20,
+        sample_rows: int = 200_000,
+        seed: int = 0,
+    ) -> "FeatureSketch":
+        """Takes bin edges from the quantiles of (a sample of) `X` and counts all of `X`."""
+        sample = X
+        if X.shape[0] > sample_rows:
+            rows = np.random.default_rng(seed).choice(X.shape[0], size=sample_rows, replace=False)
+            sample = X[np.sort(rows)]
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+        edges = np.nanquantile(np.asarray(sample, dtype=np.float64), quantiles, axis=0).T
+        return cls(edges, names).update(X)
+
+    def update(self, X: np.ndarray) -> "FeatureSketch":
+        X = np.asarray(X)
+        if X.shape[0] == 0:
+            return self
+        n_features = self.edges.shape[0]
+        bins = np.empty(X.shape, dtype=np.int64)
+        for j in range(n_features):
+            bins[:, j] = np.searchsorted(self.edges[j], X[:, j], side="right")
+        missing = np.isnan(X)
+        bins[missing] = self.n_bins
+        # One bincount over all features: bin b of feature j lands in slot j * (n_bins + 1) + b
+        bins += np.arange(n_features) * (self.n_bins + 1)
+        self.counts += np.bincount(bins.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+
+        values = np.where(missing, 0.0, X.astype(np.float64))
+        self.n_rows += X.shape[0]
+        self.sums += values.sum(axis=0)
+        self.sums_sq += np.square(values).sum(axis=0)
+        if not missing.all():
+            self.minima = np.fmin(self.minima, np.nanmin(X, axis=0))
+            self.maxima = np.fmax(self.maxima, np.nanmax(X, axis=0))
+        return self
+
+    def merge(self, other: "FeatureSketch") -> "FeatureSketch":
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge sketches with different bin edges")
+        self.counts += other.counts
+        self.n_rows += other.n_rows
+        self.sums += other.sums
+        self.sums_sq += other.sums_sq
+        self.minima = np.fmin(self.minima, other.minima)
+        self.maxima = np.fmax(self.maxima, other.maxima)
+        return self
+
+    def empty_like(self) -> "FeatureSketch":
+        return FeatureSketch(self.edges, self.names)
+
+    def histogram(self) -> np.ndarray:
+        """(n_features, n_bins) bin frequencies, NaNs excluded."""
+        counts = self.counts[:, :-1].astype(np.float64)
+        totals = counts.sum(axis=1, keepdims=True)
+        return counts / np.maximum(totals, 1)
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Estimated q-quantile of every feature."""
+        result = np.empty(self.edges.shape[0])
+        for j in range(self.edges.shape[0]):
+            bounds = np.concatenate(([self.minima[j]], self.edges[j], [self.maxima[j]]))
+            cumulative = np.concatenate(([0.0], np.cumsum(self.histogram()[j])))
+            result[j] = np.interp(q, cumulative, bounds)
+        return result
+
+    def mean(self) -> np.ndarray:
+        return self.sums / max(self.n_rows, 1)
+
+    def save(self, path: str):
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f, edges=self.edges, counts=self.counts, n_rows=self.n_rows, sums=self.sums,
+                sums_sq=self.sums_sq, minima=self.minima, maxima=self.maxima,
+                names=np.array(self.names),
+            )
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureSketch":
+        with np.load(path) as state:
+            sketch = cls(state["edges"], state["names"].tolist())
+            sketch.counts = state["counts"]
+            sketch.n_rows = int(state["n_rows"])
+            sketch.sums = state["sums"]
+            sketch.sums_sq = state["sums_sq"]
+            sketch.minima = state["minima"]
+            sketch.maxima = state["maxima"]
+        return sketch
+
+
+def population_stability_index(reference: np.ndarray, current: np.ndarray, eps: float = 1e-4) -> np.ndarray:
+    """PSI per row of two (n_features, n_bins) frequency matrices."""
+    reference = np.maximum(reference, eps)
+    current = np.maximum(current, eps)
+    return ((current - reference) * np.log(current / reference)).sum(axis=1)
+
+
+def binned_ks(reference: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """
+    Kolmogorov-Smirnov statistic per feature, evaluated at the bin edges (a
+    lower bound of the exact statistic).
+    """
+    return np.abs(np.cumsum(reference, axis=1) - np.cumsum(current, axis=1)).max(axis=1)
+
+
+class DriftMonitor:
+    """
+    Compares the distribution of inference inputs with the training split.
+
+    `build_reference` stores a sketch of the training features. Training
+    runs `stage_reference` instead, and `promote_reference` makes the staged
+    sketch the reference once its model is deployed, so the reference always
+    describes the data of the model being served. `update`
+    accumulates inference batches into a current sketch over the same bins;
+    the current state keeps its own copy of the reference it was counted
+    against, so rebuilding the reference for a new training run does not
+    disturb the running comparison until the next `update`, which then
+    starts counting against the new reference.
+    """
+
+    def __init__(self, state_dir: str = DEFAULT_STATE_DIR, n_bins: int = 20):
+        self.state_dir = state_dir
+        self.n_bins = n_bins
+        self.reference_path = os.path.join(state_dir, "reference.npz")
+        self.candidate_path = os.path.join(state_dir, "candidate_reference.npz")
+        self.current_path = os.path.join(state_dir, "current.npz")
+        self.meta_path = os.path.join(state_dir, "current.json")
+
+    def build_reference(
+        self, X: np.ndarray, names: Optional[List[str]] = None, path: Optional[str] = None
+    ) -> FeatureSketch:
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            reference = FeatureSketch.from_reference(X, names or FEATURE_TRANSFORM.names, n_bins=self.n_bins)
+            reference.save(path or self.reference_path)
+            logging.info("Built drift reference from %d training rows", reference.n_rows)
+            return reference
+        except Exception as e:
+            logging.error("Error in building drift reference: {}".format(e))
+            raise e
+
+    def stage_reference(self, X: np.ndarray, names: Optional[List[str]] = None) -> FeatureSketch:
+        """Builds the reference of a candidate model without replacing the live one."""
+        return self.build_reference(X, names, path=self.candidate_path)
+
+    def promote_reference(self) -> bool:
+        """Makes the staged reference the live one; False if none is staged."""
+        try:
+            os.replace(self.candidate_path, self.reference_path)
+        except FileNotFoundError:
+            logging.warning("No staged drift reference in %s", self.state_dir)
+            return False
+        # A new version for `update`, even if the staged file is older than the live one
+        os.utime(self.reference_path)
+        logging.info("Promoted the staged drift reference")
+        return True
+
+    def _reference_version(self) -> Optional[int]:
+        try:
+            return os.stat(self.reference_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_current(self):
+        """Returns (reference, current, reference_version) of the running comparison."""
+        try:
+            with open(self.meta_path) as f:
+                version = json.load(f)["reference_version"]
+            return (
+                FeatureSketch.load(os.path.join(self.state_dir, "current_reference.npz")),
+                FeatureSketch.load(self.current_path),
+                version,
+            )
+        except FileNotFoundError:
+            return None, None, None
+
+    def update(self, X: np.ndarray) -> Dict[str, float]:
+        """
+        Adds an inference batch to the current sketch.
+
+        Returns:
+            scores: drift scores after the update (see `scores`)
+        """
+        try:
+            reference, current, version = self._load_current()
+            latest = self._reference_version()
+            if latest is None and reference is None:
+                logging.warning("No drift reference found in %s; skipping drift update", self.state_dir)
+                return {}
+            if latest is not None and latest != version:
+                reference = FeatureSketch.load(self.reference_path)
+                current = reference.empty_like()
+                version = latest
+                reference.save(os.path.join(self.state_dir, "current_reference.npz"))
+            current.update(X)
+            current.save(self.current_path)
+            with open(self.meta_path + ".tmp", "w") as f:
+                json.dump({"reference_version": version}, f)
+            os.replace(self.meta_path + ".tmp", self.meta_path)
+            return self._scores(reference, current)
+        except Exception as e:
+            logging.error("Error in updating drift sketches: {}".format(e))
+            raise e
+
+    @staticmethod
+    def _scores(reference: FeatureSketch, current: FeatureSketch) -> Dict[str, float]:
+        if current.n_rows == 0:
+            return {"drift_rows": 0, "drift_psi_max": 0.0, "drift_ks_max": 0.0}
+        psi = population_stability_index(reference.histogram(), current.histogram())
+        ks = binned_ks(reference.histogram(), current.histogram())
+        scores = {"drift_rows": current.n_rows, "drift_psi_max": float(psi.max()), "drift_ks_max": float(ks.max())}
+        for name, feature_psi, feature_ks in zip(reference.names, psi, ks):
+            scores["drift_psi_" + name] = float(feature_psi)
+            scores["drift_ks_" + name] = float(feature_ks)
+        return scores
+
+    def scores(self) -> Dict[str, float]:
+        """
+        Returns:
+            scores: rows seen, the maximum PSI and KS over features and the
+                per-feature values; zeros before any inference data arrives
+        """
+        reference, current, _ = self._load_current()
+        if current is None:
+            return {"drift_rows": 0, "drift_psi_max": 0.0, "drift_ks_max": 0.0}
+        return self._scores(reference, current)
+
+
+def log_drift_metrics(scores: Dict[str, float]):
+    """Logs drift scores to the active MLflow run, if there is one."""
+    try:
+        import mlflow
+    except ImportError:
+        return
+    if scores and mlflow.active_run() is not None:
+        mlflow.log_metrics(scores)
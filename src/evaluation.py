@@ -1,5 +1,7 @@
 import logging
+import os
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from sklearn.metrics import mean_squared_error, r2_score
 
@@ -76,3 +78,249 @@ class RMSE(Evaluation):
             logging.error("Exception occurred in calculate_score method of the RMSE class:  {}".format(e))
             
             raise e
+
+
+class EvaluationEngine:
+    """
+    Computes a configurable set of regression and churn-classification
+    metrics in one pass over (y_true, y_pred), sharing the residuals and
+    squared errors between metrics.
+
+    Predictions are consumed in chunks through preallocated buffers and
+    reduced to running sums plus a fixed-size score histogram, so `update`
+    can be called repeatedly on streamed chunks and engines can be merged.
+    Scores are clipped to [0, 1] for the classification metrics; AUC is
+    computed from the histogram and thresholds that are multiples of
+    1 / n_bins are exact.
+    """
+
+    REGRESSION_METRICS = ("mse", "rmse", "mae", "r2_score")
+    CLASSIFICATION_METRICS = ("auc", "log_loss", "accuracy", "precision", "recall", "confusion_matrix")
+
+    def __init__(
+        self,
+        metrics=REGRESSION_METRICS + CLASSIFICATION_METRICS,
+        thresholds=(0.5,),
+        n_bins: int = 4096,
+        chunk_size: int = 1_000_000,
+    ):
+        unknown = set(metrics) - set(self.REGRESSION_METRICS + self.CLASSIFICATION_METRICS)
+        if unknown:
+            raise ValueError("Unsupported metrics: {}".format(sorted(unknown)))
+        self.metrics = tuple(metrics)
+        self.thresholds = tuple(thresholds)
+        self.n_bins = n_bins
+        self.chunk_size = chunk_size
+        self.n = 0
+        self.sum_y = 0.0
+        self.sum_y2 = 0.0
+        self.sse = 0.0
+        self.sae = 0.0
+        self.log_loss_sum = 0.0
+        self.pos_hist = np.zeros(n_bins, dtype=np.int64)
+        self.all_hist = np.zeros(n_bins, dtype=np.int64)
+        self._buffers = None
+
+    def _get_buffers(self, size: int):
+        if self._buffers is None or self._buffers[0].shape[0] < size:
+            self._buffers = tuple(np.empty(size, dtype=np.float64) for _ in range(4))
+        return tuple(buffer[:size] for buffer in self._buffers)
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> "EvaluationEngine":
+        """Accumulates one batch of labels and predictions."""
+        try:
+            y_true = np.ravel(np.asarray(y_true))
+            y_pred = np.ravel(np.asarray(y_pred))
+            for start in range(0, y_true.shape[0], self.chunk_size):
+                self._update_chunk(y_true[start:start + self.chunk_size], y_pred[start:start + self.chunk_size])
+            return self
+        except Exception as e:
+            logging.error("Exception occurred in update method of the EvaluationEngine class: {}".format(e))
+            raise e
+
+    def _update_chunk(self, y_true: np.ndarray, y_pred: np.ndarray):
+        y, p, work, aux = self._get_buffers(y_true.shape[0])
+        y[:] = y_true
+        p[:] = y_pred
+        self.n += y.shape[0]
+        self.sum_y += y.sum()
+        self.sum_y2 += np.dot(y, y)
+
+        np.subtract(p, y, out=work)
+        self.sse += np.dot(work, work)
+        np.abs(work, out=work)
+        self.sae += work.sum()
+
+        # Classification statistics on scores clipped to [0, 1]
+        np.clip(p, 0.0, 1.0, out=p)
+        if "log_loss" in self.metrics:
+            eps = 1e-15
+            np.clip(p, eps, 1 - eps, out=work)
+            # p if y == 1 else 1 - p, computed as 0.5 + (p - 0.5) * (2y - 1)
+            np.multiply(y, 2.0, out=aux)
+            aux -= 1.0
+            work -= 0.5
+            work *= aux
+            work += 0.5
+            np.log(work, out=work)
+            self.log_loss_sum -= work.sum()
+        bins = (p * self.n_bins).astype(np.intp)
+        np.minimum(bins, self.n_bins - 1, out=bins)
+        self.all_hist += np.bincount(bins, minlength=self.n_bins)
+        self.pos_hist += np.bincount(bins, weights=y, minlength=self.n_bins).astype(np.int64)
+
+    def merge(self, other: "EvaluationEngine") -> "EvaluationEngine":
+        """Adds another engine's accumulated state (same bins) to this one."""
+        self.n += other.n
+        self.sum_y += other.sum_y
+        self.sum_y2 += other.sum_y2
+        self.sse += other.sse
+        self.sae += other.sae
+        self.log_loss_sum += other.log_loss_sum
+        self.pos_hist += other.pos_hist
+        self.all_hist += other.all_hist
+        return self
+
+    def compute(self) -> dict:
+        """
+        Returns:
+            metrics: flat dict of metric name to float, ready for mlflow.log_metrics
+        """
+        if self.n == 0:
+            raise ValueError("No predictions have been accumulated")
+        results = {}
+        mse = self.sse / self.n
+        if "mse" in self.metrics:
+            results["mse"] = mse
+        if "rmse" in self.metrics:
+            results["rmse"] = float(np.sqrt(mse))
+        if "mae" in self.metrics:
+            results["mae"] = self.sae / self.n
+        if "r2_score" in self.metrics:
+            total = self.sum_y2 - self.sum_y ** 2 / self.n
+            results["r2_score"] = 1.0 - self.sse / total if total > 0 else 0.0
+        if "log_loss" in self.metrics:
+            results["log_loss"] = self.log_loss_sum / self.n
+
+        pos_hist = self.pos_hist
+        neg_hist = self.all_hist - pos_hist
+        n_pos, n_neg = int(pos_hist.sum()), int(neg_hist.sum())
+        if "auc" in self.metrics and n_pos and n_neg:
+            neg_below = np.cumsum(neg_hist) - neg_hist
+            results["auc"] = float(np.dot(pos_hist, neg_below + 0.5 * neg_hist) / (n_pos * n_neg))
+
+        # Predicted positive when score >= threshold, i.e. in bins at or above the threshold bin
+        pos_above = np.cumsum(pos_hist[::-1])[::-1]
+        neg_above = np.cumsum(neg_hist[::-1])[::-1]
+        for i, threshold in enumerate(self.thresholds):
+            b = min(int(np.ceil(threshold * self.n_bins)), self.n_bins - 1)
+            tp, fp = int(pos_above[b]), int(neg_above[b])
+            fn, tn = n_pos - tp, n_neg - fp
+            suffix = "" if len(self.thresholds) == 1 else "_at_{}".format(threshold)
+            if "precision" in self.metrics:
+                results["precision" + suffix] = tp / (tp + fp) if tp + fp else 0.0
+            if "recall" in self.metrics:
+                results["recall" + suffix] = tp / n_pos if n_pos else 0.0
+            if "accuracy" in self.metrics:
+                results["accuracy" + suffix] = (tp + tn) / self.n
+            if "confusion_matrix" in self.metrics and i == 0:
+                results.update({"tp": tp, "fp": fp, "fn": fn, "tn": tn})
+        return {name: float(value) for name, value in results.items()}
+
+
+class BootstrapEvaluation:
+    """
+    Percentile bootstrap confidence intervals for the holdout metrics.
+
+    Resamples are drawn as batched (resamples x rows) index matrices, turned
+    into per-resample row counts with one bincount and reduced against the
+    per-row statistics with a single matrix product, so there is no Python
+    loop per resample. Batches are spread over `n_jobs` threads and each is
+    sized to `max_bytes // n_jobs`, so the batches in flight together stay
+    under `max_bytes`; NumPy releases the GIL for the heavy work.
+    """
+
+    METRICS = ("mse", "rmse", "mae", "r2_score", "log_loss", "accuracy")
+
+    def __init__(
+        self,
+        n_resamples: int = 2000,
+        confidence: float = 0.95,
+        max_bytes: int = 256 * 2**20,
+        n_jobs: int = 0,
+        seed: int = 42,
+    ):
+        self.n_resamples = n_resamples
+        self.confidence = confidence
+        self.max_bytes = max_bytes
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.seed = seed
+
+    @staticmethod
+    def _row_statistics(y_true: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
+        residual = y_pred - y_true
+        p = np.clip(y_pred, 1e-15, 1 - 1e-15)
+        return np.column_stack([
+            residual * residual,
+            np.abs(residual),
+            y_true,
+            y_true * y_true,
+            -np.where(y_true > 0.5, np.log(p), np.log(1 - p)),
+            ((y_pred >= 0.5) == (y_true > 0.5)).astype(np.float64),
+        ])
+
+    @staticmethod
+    def _metrics(means: np.ndarray) -> np.ndarray:
+        """Maps per-resample means of the row statistics to METRICS columns."""
+        mse, mae, mean_y, mean_y2, log_loss, accuracy = means.T
+        variance = mean_y2 - mean_y * mean_y
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r2 = np.where(variance > 0, 1.0 - mse / variance, 0.0)
+        return np.column_stack([mse, np.sqrt(mse), mae, r2, log_loss, accuracy])
+
+    def _resample_batch(self, stats: np.ndarray, size: int, seed: np.random.SeedSequence) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        n_rows = stats.shape[0]
+        index = rng.integers(0, n_rows, size=(size, n_rows), dtype=np.int64)
+        # Offset each resample's indices into its own row of a flat count matrix
+        index += (np.arange(size, dtype=np.int64) * n_rows)[:, None]
+        counts = np.bincount(index.ravel(), minlength=size * n_rows).reshape(size, n_rows)
+        del index
+        return self._metrics(counts.astype(np.float64) @ stats / n_rows)
+
+    def run(self, y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+        """
+        Returns:
+            metrics: dict with each metric's point estimate plus
+                `<metric>_lower` / `<metric>_upper` confidence bounds
+        """
+        try:
+            y_true = np.ravel(np.asarray(y_true, dtype=np.float64))
+            y_pred = np.ravel(np.asarray(y_pred, dtype=np.float64))
+            stats = self._row_statistics(y_true, y_pred)
+            n_rows = stats.shape[0]
+
+            # Index, count and float count matrices: 24 bytes per resampled row,
+            # with up to `n_jobs` batches alive at once
+            per_batch = max(1, min(self.n_resamples, self.max_bytes // self.n_jobs // (n_rows * 24)))
+            sizes = [per_batch] * (self.n_resamples // per_batch)
+            if self.n_resamples % per_batch:
+                sizes.append(self.n_resamples % per_batch)
+            seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+
+            with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+                batches = list(pool.map(self._resample_batch, [stats] * len(sizes), sizes, seeds))
+            samples = np.concatenate(batches)
+
+            alpha = (1.0 - self.confidence) / 2
+            lower, upper = np.quantile(samples, [alpha, 1.0 - alpha], axis=0)
+            point = self._metrics(stats.mean(axis=0, keepdims=True))[0]
+            results = {}
+            for i, name in enumerate(self.METRICS):
+                results[name] = float(point[i])
+                results[name + "_lower"] = float(lower[i])
+                results[name + "_upper"] = float(upper[i])
+            return results
+        except Exception as e:
+            logging.error("Exception occurred in run method of the BootstrapEvaluation class: {}".format(e))
+            raise e
@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.drift import DEFAULT_STATE_DIR, FeatureSketch
+from src.schema import FEATURE_TRANSFORM
+
+
+class Explainer(ABC):
+    """
+    Per-feature contributions to a model's raw output (the margin, i.e.
+    log-odds for classifiers). For every row the contributions plus
+    `expected_value` add up to the raw output.
+    """
+
+    expected_value: float = 0.0
+
+    @abstractmethod
+    def _explain(self, X: np.ndarray) -> np.ndarray:
+        pass
+
+    def explain(self, X: np.ndarray, batch_size: int = 100_000, n_jobs: int = 1) -> np.ndarray:
+        """
+        Args:
+            X: float32 matrix in schema feature order
+            batch_size: rows explained per call into the backend
+            n_jobs: batches explained concurrently on a thread pool
+        Returns:
+            contributions: float32 array of shape (n_rows, n_features)
+        """
+        try:
+            X = np.asarray(X)
+            out = np.empty(X.shape, dtype=np.float32)
+            starts = range(0, X.shape[0], batch_size)
+
+            def run(start: int):
+                out[start:start + batch_size] = self._explain(X[start:start + batch_size])
+
+            if n_jobs > 1 and len(starts) > 1:
+                with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+                    list(pool.map(run, starts))
+            else:
+                for start in starts:
+                    run(start)
+            return out
+        except Exception as e:
+            logging.error("Error in explaining predictions: {}".format(e))
+            raise e
+
+
+class LinearExplainer(Explainer):
+    """Exact attributions of a linear model: coef * (x - baseline)."""
+
+    def __init__(self, coef: np.ndarray, intercept: float, baseline: np.ndarray):
+        self.coef = np.ascontiguousarray(np.ravel(coef), dtype=np.float32)
+        self.baseline = np.ascontiguousarray(baseline, dtype=np.float32)
+        self.expected_value = float(intercept + self.baseline @ self.coef)
+
+    def _explain(self, X: np.ndarray) -> np.ndarray:
+        contributions = np.subtract(X, self.baseline, dtype=np.float32)
+        contributions *= self.coef
+        return contributions
+
+
+class TreeExplainer(Explainer):
+    """
+    TreeSHAP attributions computed by the boosting library itself
+    (LightGBM pred_contrib, XGBoost pred_contribs, CatBoost ShapValues),
+    which runs the exact polynomial-time algorithm in native code.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.library = type(model).__module__.split(".")[0]
+        if self.library not in ("lightgbm", "xgboost", "catboost"):
+            raise ValueError("No tree explainer for {}".format(type(model).__name__))
+        probe = self._contributions(np.zeros((1, FEATURE_TRANSFORM.n_features), dtype=np.float32))
+        self.expected_value = float(probe[0, -1])
+
+    def _contributions(self, X: np.ndarray) -> np.ndarray:
+        """(n_rows, n_features + 1) contributions with the expected value last."""
+        if self.library == "lightgbm":
+            booster = getattr(self.model, "booster_", self.model)
+            return np.asarray(booster.predict(X, pred_contrib=True))
+        if self.library == "xgboost":
+            import xgboost as xgb
+
+            booster = self.model.get_booster() if hasattr(self.model, "get_booster") else self.model
+            return booster.predict(xgb.DMatrix(X), pred_contribs=True)
+        from catboost import Pool
+
+        return np.asarray(self.model.get_feature_importance(Pool(X), type="ShapValues"))
+
+    def _explain(self, X: np.ndarray) -> np.ndarray:
+        return self._contributions(X)[:, :-1]
+
+
+def default_baseline(state_dir: str = DEFAULT_STATE_DIR) -> np.ndarray:
+    """Training feature means from the drift reference sketch, or zeros if none was built."""
+    path = os.path.join(state_dir, "reference.npz")
+    if os.path.exists(path):
+        reference = FeatureSketch.load(path)
+        if reference.names == FEATURE_TRANSFORM.names:
+            return reference.mean()
+    logging.warning("No training reference found; explaining linear models against a zero baseline")
+    return np.zeros(FEATURE_TRANSFORM.n_features)
+
+
+def get_explainer(model, baseline: Optional[np.ndarray] = None) -> Explainer:
+    """Returns the explainer for a trained model (or a LinearScorer)."""
+    from sklearn.linear_model import LinearRegression, LogisticRegression
+
+    from src.scoring import LinearScorer
+
+    if isinstance(model, (LinearRegression, LogisticRegression, LinearScorer)):
+        baseline = default_baseline() if baseline is None else baseline
+        intercept = model.intercept_ if hasattr(model, "intercept_") else model.intercept
+        coef = model.coef_ if hasattr(model, "coef_") else model.coef
+        return LinearExplainer(coef, float(np.ravel(intercept)[0]), baseline)
+    return TreeExplainer(model)
+
+
+_explainers: Dict[str, Explainer] = {}
+_explainers_lock = threading.Lock()
+
+
+def get_explainer_for_uri(model_uri: str) -> Explainer:
+    """Loads the model at `model_uri` once per process and returns its explainer."""
+    with _explainers_lock:
+        explainer = _explainers.get(model_uri)
+        if explainer is None:
+            import mlflow.sklearn
+
+            explainer = get_explainer(mlflow.sklearn.load_model(model_uri))
+            _explainers[model_uri] = explainer
+        return explainer
+
+
+def top_contributions(
+    contributions: np.ndarray, names: List[str] = None, k: int = 3
+) -> List[List[Tuple[str, float]]]:
+    """The `k` features pushing each row's score up the most, strongest first."""
+    names = names or FEATURE_TRANSFORM.names
+    k = min(k, contributions.shape[1])
+    top = np.argpartition(-contributions, k - 1, axis=1)[:, :k]
+    top_values = np.take_along_axis(contributions, top, axis=1)
+    order = np.argsort(-top_values, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_values = np.take_along_axis(top_values, order, axis=1)
+    return [
+        [(names[j], float(value)) for j, value in zip(row, values)]
+        for row, values in zip(top, top_values)
+    ]
@@ -0,0 +1,149 @@
+import math
+import struct
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+US_STATES = (
+    "AK", "AL", "AR", "AZ", "CA", "CO", "CT", "DC", "DE", "FL", "GA", "HI", "IA",
+    "ID", "IL", "IN", "KS", "KY", "LA", "MA", "MD", "ME", "MI", "MN", "MO", "MS",
+    "MT", "NC", "ND", "NE", "NH", "NJ", "NM", "NV", "NY", "OH", "OK", "OR", "PA",
+    "RI", "SC", "SD", "TN", "TX", "UT", "VA", "VT", "WA", "WI", "WV", "WY",
+)
+
+
+_FLOAT32 = struct.Struct("f")
+
+
+def _round32(value: float) -> float:
+    """Rounds a Python float to the nearest float32, as a store into a float32 array does."""
+    try:
+        return _FLOAT32.unpack(_FLOAT32.pack(value))[0]
+    except OverflowError:
+        # Past the float32 range: infinity, like NumPy's cast
+        return math.copysign(math.inf, value)
+
+
+class CategoryEncoder:
+    """
+    Maps category labels to compact integer codes through a lookup table
+    compiled once from the known categories. A batch is factorized first,
+    so only its distinct labels are looked up and every row is a gather by
+    code. Unknown labels get -1, the same as pandas' missing-category code,
+    on both the batch and the single-value path.
+    """
+
+    def __init__(self, categories: Sequence[str]):
+        self.categories = tuple(categories)
+        self._index = pd.Index(self.categories)
+        self._lookup = {category: code for code, category in enumerate(self.categories)}
+
+    def encode(self, values) -> np.ndarray:
+        """Encodes a column (categorical or object Series, or array) into int32 codes."""
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, labels = pd.factorize(values.to_numpy() if isinstance(values, pd.Series) else np.asarray(values))
+        # Translate the (few) distinct labels once, then gather by code;
+        # the appended entry serves the -1 code of missing values
+        table = np.append(self._index.get_indexer(labels), -1).astype(np.int32)
+        return table[codes]
+
+    def encode_one(self, value) -> int:
+        return self._lookup.get(value, -1)
+
+
+class FeatureEngineering:
+    """
+    Call-usage aggregates derived from the raw schema columns.
+
+    Every feature is an element-wise NumPy expression over whole columns.
+    `compute_one` repeats the same float32 operations, in the same order,
+    on NumPy scalars, so a single row costs a few scalar operations
+    instead of a few dozen array calls and online and offline features
+    stay bit-identical.
+    """
+
+    periods = ("day", "eve", "night", "intl")
+    # number_customer_service_calls bucket edges: 0-1 low, 2-3 elevated, 4+ high
+    risk_edges = np.array([2, 4], dtype=np.float32)
+    _risk_edge_values = risk_edges.tolist()
+    _minute_columns = ["total_{}_minutes".format(period) for period in periods]
+    _call_columns = ["total_{}_calls".format(period) for period in periods]
+
+    names = [
+        "total_minutes",
+        "total_calls",
+        "day_minutes_share",
+        "intl_minutes_share",
+        "day_minutes_per_call",
+        "eve_minutes_per_call",
+        "night_minutes_per_call",
+        "intl_minutes_per_call",
+        "service_call_risk",
+    ]
+
+    @staticmethod
+    def _safe_divide(numerator: np.ndarray, denominator: np.ndarray, out: np.ndarray):
+        out[...] = 0
+        np.divide(numerator, denominator, out=out, where=denominator > 0)
+
+    def compute(self, columns: Mapping[str, np.ndarray], out: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            columns: float32 raw feature columns by name
+            out: (n_rows, len(names)) float32 destination
+        Returns:
+            out
+        """
+        minutes = [columns["total_{}_minutes".format(period)] for period in self.periods]
+        calls = [columns["total_{}_calls".format(period)] for period in self.periods]
+        total_minutes, total_calls = out[:, 0], out[:, 1]
+        # Summed pairwise in a fixed order rather than with a reduction, whose
+        # association can depend on the array length
+        np.add(minutes[0], minutes[1], out=total_minutes)
+        np.add(total_minutes, minutes[2], out=total_minutes)
+        np.add(total_minutes, minutes[3], out=total_minutes)
+        np.add(calls[0], calls[1], out=total_calls)
+        np.add(total_calls, calls[2], out=total_calls)
+        np.add(total_calls, calls[3], out=total_calls)
+
+        self._safe_divide(minutes[0], total_minutes, out[:, 2])
+        self._safe_divide(minutes[3], total_minutes, out[:, 3])
+        for j, (period_minutes, period_calls) in enumerate(zip(minutes, calls), start=4):
+            self._safe_divide(period_minutes, period_calls, out[:, j])
+        out[:, 8] = np.searchsorted(self.risk_edges, columns["number_customer_service_calls"], side="right")
+        return out
+
+    def compute_one(self, columns: Mapping[str, float]) -> list:
+        """
+        Args:
+            columns: raw feature values of one row by name, each already
+                rounded to float32
+        Returns:
+            values: the derived features of the row, in `names` order,
+                to be stored as float32
+        """
+        minutes = [columns[name] for name in self._minute_columns]
+        calls = [columns[name] for name in self._call_columns]
+        # A float64 sum or quotient of two float32 values, rounded to float32,
+        # is the float32 result, so only values reused by later steps are
+        # rounded here; the rest are rounded when stored
+        total_minutes = _round32(_round32(_round32(minutes[0] + minutes[1]) + minutes[2]) + minutes[3])
+        total_calls = _round32(_round32(_round32(calls[0] + calls[1]) + calls[2]) + calls[3])
+        service_calls = columns["number_customer_service_calls"]
+        if service_calls != service_calls:
+            # searchsorted places NaN after every edge
+            risk = len(self._risk_edge_values)
+        else:
+            risk = sum(service_calls >= edge for edge in self._risk_edge_values)
+        return [
+            total_minutes,
+            total_calls,
+            minutes[0] / total_minutes if total_minutes > 0 else 0.0,
+            minutes[3] / total_minutes if total_minutes > 0 else 0.0,
+        ] + [
+            period_minutes / period_calls if period_calls > 0 else 0.0
+            for period_minutes, period_calls in zip(minutes, calls)
+        ] + [risk]
@@ -0,0 +1,334 @@
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+from src.model_dev import widen_linear
+from src.schema import CHURN_SCHEMA, FEATURE_TRANSFORM
+
+DEFAULT_STATE_DIR = os.path.join(".cache", "incremental")
+
+# Relative singular value cutoff of LinearRegression's solver (its `tol`,
+# where the installed scikit-learn has one), so both drop the same
+# near-null directions, e.g. derived features equal to a float32-rounded sum
+_RCOND = LinearRegression().get_params().get("tol")
+
+
+def prefix_digest(path: str, end: int, n_samples: int = 64, block_bytes: int = 1 << 16) -> str:
+    """
+    Hash of the first `end` bytes of `path`: all of them when they fit in
+    `n_samples` blocks, otherwise `n_samples` evenly spaced blocks, the
+    last one ending at `end`, so checking a large source costs a constant
+    number of reads.
+    """
+    digest = hashlib.blake2b(str(end).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        if end <= n_samples * block_bytes:
+            digest.update(f.read(end))
+        else:
+            for position in np.linspace(0, end - block_bytes, n_samples).astype(np.int64):
+                f.seek(int(position))
+                digest.update(f.read(block_bytes))
+    return digest.hexdigest()
+
+
+class _ByteWindow(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a binary file."""
+
+    def __init__(self, f, start: int, end: int):
+        f.seek(start)
+        self._f = f
+        self._left = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self._f.readinto(memoryview(buffer)[:min(len(buffer), self._left)])
+        self._left -= n
+        return n
+
+
+def holdout_mask(row_ids: np.ndarray, test_size: float) -> np.ndarray:
+    """
+    Deterministic train/holdout assignment by global row number, so a row
+    lands on the same side whether it arrives in a delta or a full read.
+    """
+    hashed = (row_ids.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2**32)
+    return hashed < np.uint64(test_size * 2**32)
+
+
+class LinearSufficientStats:
+    """
+    Running triangular factor R of the QR decomposition of [1, X, y] over
+    every row seen so far.
+
+    The R of a concatenation is the R of the stacked per-delta factors, so
+    each delta is folded in with one QR of (previous R + delta rows). With
+    the constant column first, the block of R below it factors the centered
+    design, and its least squares solution is the minimum-norm one
+    LinearRegression finds on all rows seen so far, also when derived
+    features make the design rank deficient. Working on R rather than XᵀX
+    avoids squaring the design's condition number.
+    """
+
+    def __init__(self, n_features: int):
+        self.n_features = n_features
+        self.n_rows = 0
+        self.r = np.zeros((n_features + 2, n_features + 2))
+
+    def update(self, X: np.ndarray, y: np.ndarray):
+        augmented = np.empty((X.shape[0], self.n_features + 2))
+        augmented[:, 0] = 1.0
+        augmented[:, 1:-1] = X
+        augmented[:, -1] = y
+        self.r = np.linalg.qr(np.vstack([self.r, augmented]), mode="r")
+        self.n_rows += X.shape[0]
+
+    def solve(self) -> Tuple[np.ndarray, float]:
+        if self.n_rows == 0:
+            raise ValueError("No rows to solve for")
+        r = self.r
+        coef = np.linalg.lstsq(r[1:-1, 1:-1], r[1:-1, -1], rcond=_RCOND)[0]
+        intercept = (r[0, -1] - r[0, 1:-1] @ coef) / r[0, 0]
+        return coef, float(intercept)
+
+    def to_model(self) -> LinearRegression:
+        coef, intercept = self.solve()
+        model = LinearRegression()
+        model.coef_ = coef
+        model.intercept_ = intercept
+        model.n_features_in_ = self.n_features
+        return model
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {"n_rows": np.array(self.n_rows), "r": self.r}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "LinearSufficientStats":
+        stats = cls(arrays["r"].shape[0] - 2)
+        stats.n_rows = int(arrays["n_rows"])
+        stats.r = np.array(arrays["r"])
+        return stats
+
+
+class IncrementalTrainer:
+    """
+    Retrains from only the rows appended to the source since the last run.
+
+    The byte offset of the last fully processed line is the watermark.
+    It is written in one file, replaced atomically, together with the
+    linear sufficient statistics or the name of the boosting model file,
+    so an interrupted run can never leave a watermark that disagrees with
+    the model. Linear models keep sufficient statistics; boosting models
+    continue training from the previous estimator on the delta. Holdout
+    rows of every delta are kept as feature matrices, so the model can be
+    evaluated on rows it was not trained on. The delta is read in chunks
+    of `chunksize` rows. The state also records a hash of the source up
+    to the watermark (see `prefix_digest`); if the source shrinks or that
+    hash changes (it was replaced or rewritten) the state is discarded and
+    the run starts from scratch.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "LinearRegression",
+        state_dir: str = DEFAULT_STATE_DIR,
+        test_size: float = 0.2,
+        boost_rounds: int = 100,
+        chunksize: int = 1_000_000,
+    ):
+        self.model_name = model_name
+        self.state_dir = os.path.join(state_dir, model_name)
+        self.state_path = os.path.join(self.state_dir, "state.npz")
+        self.test_size = test_size
+        self.boost_rounds = boost_rounds
+        self.chunksize = chunksize
+
+    def _read_state(self, source_path: str) -> Tuple[dict, Dict[str, np.ndarray]]:
+        """The watermark metadata and the arrays stored with it, or empty ones without usable state."""
+        try:
+            with np.load(self.state_path) as saved:
+                arrays = {name: saved[name] for name in saved.files}
+        except FileNotFoundError:
+            return {}, {}
+        state = json.loads(str(arrays.pop("meta")))
+        if (
+            state.get("source") != os.path.abspath(source_path)
+            or state["offset"] > os.path.getsize(source_path)
+            or state.get("digest") != prefix_digest(source_path, state["offset"])
+        ):
+            logging.info("Source %s changed; discarding incremental state", source_path)
+            for pattern in ("holdout-*.npz", "model-*.joblib"):
+                for path in glob.glob(os.path.join(self.state_dir, pattern)):
+                    os.remove(path)
+            return {}, {}
+        return state, arrays
+
+    def _write_state(self, state: dict, arrays: Dict[str, np.ndarray]):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(state)), **arrays)
+        os.replace(tmp_path, self.state_path)
+
+    def _holdout_path(self, first_row: int) -> str:
+        return os.path.join(self.state_dir, "holdout-{:012d}.npz".format(first_row))
+
+    def holdout(self, source_path: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Feature matrix and labels of the holdout rows of every delta up to the watermark."""
+        state, _ = self._read_state(source_path)
+        X_parts, y_parts = [np.empty((0, FEATURE_TRANSFORM.n_features), dtype=FEATURE_TRANSFORM.dtype)], [
+            np.empty(0, dtype=FEATURE_TRANSFORM.dtype)
+        ]
+        for path in sorted(glob.glob(os.path.join(self.state_dir, "holdout-*.npz"))):
+            first_row = int(os.path.basename(path)[len("holdout-"):-len(".npz")])
+            # Parts at or past the watermark belong to an interrupted run
+            if first_row < state.get("rows", 0):
+                with np.load(path) as part:
+                    X_parts.append(part["X"])
+                    y_parts.append(part["y"])
+        return np.concatenate(X_parts), np.concatenate(y_parts)
+
+    def read_delta(self, source_path: str, state: dict) -> Tuple[Iterator[pd.DataFrame], int, list]:
+        """
+        Returns the complete lines appended after the watermark, as an
+        iterator of chunks of at most `chunksize` rows, and the new watermark.
+        """
+        with open(source_path, "rb") as f:
+            header = state.get("header")
+            if header is None:
+                header_line = f.readline()
+                header = header_line.decode().strip().split(",")
+                offset = len(header_line)
+            else:
+                offset = state["offset"]
+            # End of the last complete line, scanning back from the end of the file
+            end = f.seek(0, os.SEEK_END)
+            while end > offset:
+                start = max(offset, end - (1 << 16))
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline >= 0:
+                    end = start + newline + 1
+                    break
+                end = start
+        return self._iter_delta(source_path, offset, end, header), end, header
+
+    def _iter_delta(self, source_path: str, start: int, end: int, header: list) -> Iterator[pd.DataFrame]:
+        if end <= start:
+            return
+        with open(source_path, "rb") as f:
+            reader = pd.read_csv(
+                io.BufferedReader(_ByteWindow(f, start, end)),
+                names=header,
+                usecols=CHURN_SCHEMA.columns,
+                dtype=CHURN_SCHEMA.dtypes,
+                chunksize=self.chunksize,
+            )
+            with reader:
+                yield from reader
+
+    def _fit_boosting(self, previous, X: np.ndarray, y: np.ndarray):
+        """Continues training the previous estimator (None to start afresh) on the delta."""
+        if self.model_name == "LightGBM":
+            import lightgbm as lgb
+
+            model = lgb.LGBMClassifier(n_estimators=self.boost_rounds)
+            model.fit(X, y, init_model=previous.booster_ if previous is not None else None)
+        elif self.model_name == "XGBoost":
+            import xgboost as xgb
+
+            model = xgb.XGBClassifier(n_estimators=self.boost_rounds, eval_metric="logloss", use_label_encoder=False)
+            model.fit(X, y, xgb_model=previous.get_booster() if previous is not None else None)
+        elif self.model_name == "CatBoost":
+            from catboost import CatBoostClassifier
+
+            model = CatBoostClassifier(iterations=self.boost_rounds, verbose=False)
+            model.fit(X, y, init_model=previous)
+        else:
+            raise ValueError("Model {} not supported for incremental training".format(self.model_name))
+        return model
+
+    def run(self, source_path: str):
+        """
+        Args:
+            source_path: append-only CSV source
+        Returns:
+            model: trained model covering every row up to the new watermark
+            report: rows in the delta and totals
+        """
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            state, arrays = self._read_state(source_path)
+            first_row = state.get("rows", 0)
+            # Holdout parts an interrupted run left past the watermark
+            for path in glob.glob(os.path.join(self.state_dir, "holdout-*.npz")):
+                if int(os.path.basename(path)[len("holdout-"):-len(".npz")]) >= first_row:
+                    os.remove(path)
+            chunks, offset, header = self.read_delta(source_path, state)
+            linear = self.model_name == "LinearRegression"
+            if linear:
+                stats = (
+                    LinearSufficientStats.from_arrays(arrays)
+                    if "r" in arrays
+                    else LinearSufficientStats(len(FEATURE_TRANSFORM.linear_columns))
+                )
+            X_parts, y_parts = [], []
+            rows, train_rows = first_row, 0
+            for delta in chunks:
+                train = ~holdout_mask(np.arange(rows, rows + len(delta)), self.test_size)
+                X_delta = FEATURE_TRANSFORM.transform(delta)
+                y_delta = FEATURE_TRANSFORM.target(delta)
+                if linear:
+                    # Without the ordinal category codes, as LinearRegressionModel fits
+                    stats.update(X_delta[train][:, FEATURE_TRANSFORM.linear_columns], y_delta[train])
+                else:
+                    X_parts.append(X_delta[train])
+                    y_parts.append(y_delta[train])
+                if not train.all():
+                    with open(self._holdout_path(rows), "wb") as f:
+                        np.savez(f, X=X_delta[~train], y=y_delta[~train])
+                rows += len(delta)
+                train_rows += int(train.sum())
+            logging.info("Incremental training on %d new rows (%d for training)", rows - first_row, train_rows)
+
+            new_state = {
+                "source": os.path.abspath(source_path),
+                "header": header,
+                "offset": offset,
+                "digest": prefix_digest(source_path, offset),
+                "rows": rows,
+            }
+            previous_model = state.get("model")
+            if linear:
+                arrays = stats.to_arrays()
+                model = widen_linear(stats.to_model(), FEATURE_TRANSFORM.linear_columns, FEATURE_TRANSFORM.n_features)
+            else:
+                arrays = {}
+                previous = joblib.load(os.path.join(self.state_dir, previous_model)) if previous_model else None
+                if train_rows:
+                    model = self._fit_boosting(previous, np.concatenate(X_parts), np.concatenate(y_parts))
+                    new_state["model"] = "model-{:012d}.joblib".format(rows)
+                    joblib.dump(model, os.path.join(self.state_dir, new_state["model"]))
+                elif previous is not None:
+                    model, new_state["model"] = previous, previous_model
+                else:
+                    raise ValueError("No training rows available for incremental training")
+
+            # The only commit point: files written above are ignored until it names them
+            self._write_state(new_state, arrays)
+            if previous_model and previous_model != new_state.get("model"):
+                os.remove(os.path.join(self.state_dir, previous_model))
+            report = {"delta_rows": rows - first_row, "delta_train_rows": train_rows, "total_rows": rows}
+            return model, report
+        except Exception as e:
+            logging.error("Error in incremental training: {}".format(e))
+            raise e
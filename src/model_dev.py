@@ -1,6 +1,11 @@
 import logging
 from abc import ABC, abstractmethod
-from sklearn.linear_model import LinearRegression
+from typing import Dict, Tuple, Type
+
+import numpy as np
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from src.schema import FEATURE_TRANSFORM
 
 
 class Model(ABC):
@@ -8,6 +13,9 @@ class Model(ABC):
     Abstract base class for all models.
     """
 
+    # Keyword argument that caps the number of threads the library uses
+    threads_param = "n_jobs"
+
     @abstractmethod
     def train(self, X_train, y_train):
         """
@@ -19,6 +27,28 @@ class Model(ABC):
         """
         pass
 
+def widen_linear(model, columns, n_features: int):
+    """Expands a linear model fitted on `columns` to `n_features` inputs, with zero coefficients elsewhere."""
+    coef = np.zeros(model.coef_.shape[:-1] + (n_features,), dtype=model.coef_.dtype)
+    coef[..., columns] = model.coef_
+    model.coef_ = coef
+    model.n_features_in_ = n_features
+    return model
+
+
+def fit_linear(model, X_train, y_train):
+    """
+    Fits a linear model on FEATURE_TRANSFORM.linear_columns of the model
+    matrix, leaving the ordinal category codes out, and widens it back so
+    it scores, exports and explains like any model of the full matrix.
+    """
+    X_train = np.asarray(X_train)
+    if X_train.shape[1] != FEATURE_TRANSFORM.n_features:
+        return model.fit(X_train, y_train)
+    columns = FEATURE_TRANSFORM.linear_columns
+    model.fit(X_train[:, columns], y_train)
+    return widen_linear(model, columns, X_train.shape[1])
+
 class LinearRegressionModel(Model):
     """
     LinearRegressionModel that implements the Model interface.
@@ -26,11 +56,118 @@ class LinearRegressionModel(Model):
 
     def train(self, X_train, y_train, **kwargs):
         try:
-            reg = LinearRegression(**kwargs)
-            reg.fit(X_train, y_train)
-            return reg
+            return fit_linear(LinearRegression(**kwargs), X_train, y_train)
+        except Exception as e:
+            logging.error("Error in training model: {}".format(e))
+            raise e
+
+class LogisticRegressionModel(Model):
+    """
+    LogisticRegressionModel that implements the Model interface.
+    """
+
+    def train(self, X_train, y_train, **kwargs):
+        try:
+            kwargs.setdefault("max_iter", 1000)
+            return fit_linear(LogisticRegression(**kwargs), X_train, y_train)
+        except Exception as e:
+            logging.error("Error in training model: {}".format(e))
+            raise e
+
+class LightGBMModel(Model):
+    """
+    LightGBMModel that implements the Model interface.
+    """
+
+    def train(self, X_train, y_train, **kwargs):
+        try:
+            import lightgbm as lgb
+
+            clf = lgb.LGBMClassifier(**kwargs)
+            clf.fit(X_train, y_train)
+            return clf
+        except Exception as e:
+            logging.error("Error in training model: {}".format(e))
+            raise e
+
+class XGBoostModel(Model):
+    """
+    XGBoostModel that implements the Model interface.
+    """
+
+    def train(self, X_train, y_train, **kwargs):
+        try:
+            import xgboost as xgb
+
+            kwargs.setdefault("eval_metric", "logloss")
+            kwargs.setdefault("use_label_encoder", False)
+            clf = xgb.XGBClassifier(**kwargs)
+            clf.fit(X_train, y_train)
+            return clf
         except Exception as e:
             logging.error("Error in training model: {}".format(e))
             raise e
-            
-    
+
+class CatBoostModel(Model):
+    """
+    CatBoostModel that implements the Model interface.
+    """
+
+    threads_param = "thread_count"
+
+    def train(self, X_train, y_train, **kwargs):
+        try:
+            from catboost import CatBoostClassifier
+
+            kwargs.setdefault("verbose", False)
+            clf = CatBoostClassifier(**kwargs)
+            clf.fit(X_train, y_train)
+            return clf
+        except Exception as e:
+            logging.error("Error in training model: {}".format(e))
+            raise e
+
+
+MODELS: Dict[str, Type[Model]] = {
+    "LinearRegression": LinearRegressionModel,
+    "LogisticRegression": LogisticRegressionModel,
+    "LightGBM": LightGBMModel,
+    "XGBoost": XGBoostModel,
+    "CatBoost": CatBoostModel,
+}
+
+
+# Estimator class each registered family trains, by class name so the
+# optional libraries need not be imported to recognise their models
+ESTIMATOR_CLASSES = {
+    "LinearRegression": "LinearRegression",
+    "LogisticRegression": "LogisticRegression",
+    "LGBMClassifier": "LightGBM",
+    "XGBClassifier": "XGBoost",
+    "CatBoostClassifier": "CatBoost",
+}
+
+
+def model_spec(estimator) -> Tuple[str, dict]:
+    """Registry name and constructor parameters that retrain a model like `estimator`."""
+    name = ESTIMATOR_CLASSES.get(type(estimator).__name__)
+    if name is None:
+        raise ValueError("Model type {} not supported".format(type(estimator).__name__))
+    params = dict(estimator.get_params())
+    # Thread counts are set per worker by whoever retrains it
+    params.pop(MODELS[name].threads_param, None)
+    return name, params
+
+
+def get_model(model_name: str) -> Model:
+    """Returns a Model instance from the registry."""
+    if model_name not in MODELS:
+        raise ValueError("Model {} not supported".format(model_name))
+    return MODELS[model_name]()
+
+
+def predict_scores(model, X) -> np.ndarray:
+    """Churn scores of a trained model: the positive-class probability for classifiers, the raw prediction otherwise."""
+    if hasattr(model, "predict_proba"):
+        return np.asarray(model.predict_proba(X))[:, 1]
+    return np.ravel(model.predict(X))
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+
+import numpy as np
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from src import compact_model as cm
+
+
+def _flatten_trees(trees, parse_node) -> dict:
+    """
+    Flattens nested tree dicts into node arrays with absolute child indices.
+    `parse_node(node)` returns (feature, threshold, missing_left, value,
+    left_child, right_child), with children None for leaves.
+    """
+    arrays = {name: [] for name in ("feature", "threshold", "left", "right", "missing", "value")}
+    roots = []
+    max_depth = 0
+    for tree in trees:
+        roots.append(len(arrays["feature"]))
+        stack = [(tree, None, None, 0)]
+        while stack:
+            node, parent, side, depth = stack.pop()
+            index = len(arrays["feature"])
+            if parent is not None:
+                arrays[side][parent] = index
+            feature, threshold, missing_left, value, left, right = parse_node(node)
+            arrays["feature"].append(feature)
+            arrays["threshold"].append(threshold)
+            arrays["missing"].append(missing_left)
+            arrays["value"].append(value)
+            arrays["left"].append(-1)
+            arrays["right"].append(-1)
+            max_depth = max(max_depth, depth)
+            if left is not None:
+                stack.append((right, index, "right", depth + 1))
+                stack.append((left, index, "left", depth + 1))
+    arrays["roots"] = roots
+    return {name: np.asarray(values) for name, values in arrays.items()}, max_depth
+
+
+def _export_lightgbm(booster) -> bytes:
+    dump = booster.dump_model()
+
+    def parse_node(node):
+        if "leaf_value" in node:
+            return -1, 0.0, 0, node["leaf_value"], None, None
+        if node["decision_type"] != "<=":
+            raise ValueError("Unsupported LightGBM split {}".format(node["decision_type"]))
+        return (node["split_feature"], node["threshold"], int(node["default_left"]), 0.0,
+                node["left_child"], node["right_child"])
+
+    trees, max_depth = _flatten_trees([t["tree_structure"] for t in dump["tree_info"]], parse_node)
+    link = cm.LINK_SIGMOID if dump["objective"].startswith(("binary", "cross_entropy")) else cm.LINK_IDENTITY
+    return cm.pack(cm.KIND_TREES, dump["max_feature_idx"] + 1, link=link, trees=trees,
+                   split_rule=cm.SPLIT_LE, max_depth=max_depth + 1)
+
+
+def _export_xgboost(booster, n_features: int) -> bytes:
+    config = json.loads(booster.save_config())
+    objective = config["learner"]["objective"]["name"]
+    # Newer releases store a vector-valued base score as "[0.5]"
+    base_score = float(config["learner"]["learner_model_param"]["base_score"].strip("[]"))
+    link = cm.LINK_SIGMOID if objective == "binary:logistic" else cm.LINK_IDENTITY
+    if link == cm.LINK_SIGMOID:
+        base_score = float(np.log(base_score / (1 - base_score)))
+
+    def parse_node(node):
+        if "leaf" in node:
+            return -1, 0.0, 0, node["leaf"], None, None
+        children = {child["nodeid"]: child for child in node["children"]}
+        feature = int(node["split"].lstrip("f"))
+        # Thresholds are float32 in XGBoost; the JSON dump rounds them
+        return (feature, float(np.float32(node["split_condition"])), int(node["missing"] == node["yes"]), 0.0,
+                children[node["yes"]], children[node["no"]])
+
+    dumps = [json.loads(tree) for tree in booster.get_dump(dump_format="json")]
+    trees, max_depth = _flatten_trees(dumps, parse_node)
+    return cm.pack(cm.KIND_TREES, n_features, link=link, base_score=base_score, trees=trees,
+                   split_rule=cm.SPLIT_LT, max_depth=max_depth + 1)
+
+
+def export_model(model, path: str) -> str:
+    """
+    Writes a trained model in the compact binary format.
+
+    Supports LinearRegression, LogisticRegression, LightGBM and XGBoost
+    models; other models raise ValueError.
+    """
+    try:
+        if isinstance(model, LogisticRegression):
+            payload = cm.pack(cm.KIND_LINEAR, model.coef_.shape[1], link=cm.LINK_SIGMOID,
+                              base_score=float(model.intercept_[0]), coef=model.coef_[0])
+        elif isinstance(model, LinearRegression):
+            payload = cm.pack(cm.KIND_LINEAR, np.ravel(model.coef_).shape[0],
+                              base_score=float(model.intercept_), coef=np.ravel(model.coef_))
+        elif type(model).__module__.startswith("lightgbm"):
+            payload = _export_lightgbm(getattr(model, "booster_", model))
+        elif type(model).__module__.startswith("xgboost"):
+            booster = model.get_booster() if hasattr(model, "get_booster") else model
+            payload = _export_xgboost(booster, booster.num_features())
+        else:
+            raise ValueError("Compact export not supported for {}".format(type(model).__name__))
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(payload)
+        os.replace(path + ".tmp", path)
+        logging.info("Exported %s to %s (%d bytes)", type(model).__name__, path, len(payload))
+        return path
+    except Exception as e:
+        logging.error("Error exporting model: {}".format(e))
+        raise e
@@ -0,0 +1,312 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "predictions", "cache.npz")
+
+# Key, score and recency stamp of one hash-table slot
+SLOT_BYTES = 24
+
+_MISSING = float(np.iinfo(np.int64).min)
+_multipliers: Dict[int, np.ndarray] = {}
+
+
+def version_seed(model_version: str) -> np.uint64:
+    """64-bit seed derived from a model version (e.g. its URI)."""
+    return np.frombuffer(hashlib.blake2b(model_version.encode(), digest_size=8).digest(), dtype=np.uint64)[0]
+
+
+def _feature_multipliers(n_features: int) -> np.ndarray:
+    """Fixed odd 64-bit multipliers, one per schema position."""
+    if n_features not in _multipliers:
+        rng = np.random.default_rng(n_features)
+        _multipliers[n_features] = rng.integers(0, 2**63, n_features, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    return _multipliers[n_features]
+
+
+def row_keys(X: np.ndarray, quantum: float, seed: np.uint64, block_rows: int = 2048) -> np.ndarray:
+    """
+    64-bit hash of every row after rounding its features to multiples of
+    `quantum` (NaN kept distinct): a multilinear hash with one multiplier
+    per schema position, so reordered vectors hash differently, offset by
+    `seed` and finished with the splitmix64 mixer. Rows are processed in
+    blocks through preallocated buffers.
+    """
+    X = np.asarray(X)
+    n_rows, n_features = X.shape
+    multipliers = _feature_multipliers(n_features)
+    keys = np.empty(n_rows, dtype=np.uint64)
+    block_rows = max(1, min(block_rows, n_rows))
+    scaled = np.empty((block_rows, n_features))
+    quantized = np.empty((block_rows, n_features), dtype=np.int64)
+    for start in range(0, n_rows, block_rows):
+        block = X[start:start + block_rows]
+        rows = block.shape[0]
+        f, q = scaled[:rows], quantized[:rows]
+        np.divide(block, quantum, out=f)
+        np.rint(f, out=f)
+        np.copyto(f, _MISSING, where=np.isnan(f))
+        q[...] = f
+        u = q.view(np.uint64)
+        u *= multipliers
+        u.sum(axis=1, dtype=np.uint64, out=keys[start:start + rows])
+    keys += seed
+    keys ^= keys >> np.uint64(30)
+    keys *= np.uint64(0xBF58476D1CE4E5B9)
+    keys ^= keys >> np.uint64(27)
+    keys *= np.uint64(0x94D049BB133111EB)
+    keys ^= keys >> np.uint64(31)
+    # Zero marks an empty hash-table slot
+    keys[keys == 0] = 1
+    return keys
+
+
+class PredictionCache:
+    """
+    LRU cache of model scores keyed by a hash of the quantized,
+    schema-ordered feature vector together with the model version.
+
+    Features are rounded to multiples of `quantum`, so near-identical
+    inputs share an entry; the version seeds the hash, and a lookup under a
+    new version drops every entry of the previous one, so a newly deployed
+    model never serves stale scores.
+
+    Entries live in a linear-probing hash table of NumPy arrays, the largest
+    power of two that fits in `max_bytes`, kept at most half full; a batch
+    is probed and inserted with vectorized rounds rather than per-row
+    Python calls. Recency is a per-lookup stamp. When the table is full the
+    least recently used `evict_fraction` of the entries is evicted at once
+    and the table rebuilt from the survivors, which keeps eviction
+    amortized and the table free of tombstones. `lookup` splits a batch
+    into hits and misses in bulk so callers score only the misses;
+    `predict` does the whole round trip, returns the scores in the shape
+    and dtype `predict_fn` produces, and tracks the hit rate and the
+    scoring time the hits saved, estimated from the measured cost per row
+    of the misses. `save` only writes when entries changed since the cache
+    was loaded or last saved.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20, quantum: float = 1e-3, evict_fraction: float = 0.125):
+        size = 1 << max(1, (max_bytes // SLOT_BYTES).bit_length() - 1)
+        self.capacity = size // 2
+        self.quantum = quantum
+        self.evict_rows = max(1, int(self.capacity * evict_fraction))
+        self.model_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self._mask = size - 1
+        self._table = np.zeros(size, dtype=np.uint64)
+        self._scores = np.zeros(size)
+        self._stamps = np.zeros(size, dtype=np.int64)
+        self._count = 0
+        self._clock = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+        self._seconds_per_row = 0.0
+        # Shape past the first axis and dtype of the scores `predict_fn` returns
+        self._output_shape: Tuple[int, ...] = ()
+        self._output_dtype: Optional[np.dtype] = None
+        self._dirty = False
+
+    @property
+    def dirty(self) -> bool:
+        """Whether entries changed since the cache was loaded or last saved."""
+        return self._dirty
+
+    def _reset(self):
+        self._dirty = self._dirty or self._count > 0
+        self._table[:] = 0
+        self._count = 0
+
+    def _use_version(self, model_version: str):
+        if model_version != self.model_version:
+            if self._count:
+                self.invalidations += 1
+                logging.info("Model version changed; dropping %d cached predictions", self._count)
+            self._reset()
+            self.model_version = model_version
+
+    def _find(self, keys: np.ndarray) -> np.ndarray:
+        """Table slot of every key, -1 where absent."""
+        found = np.full(keys.shape[0], -1, dtype=np.int64)
+        pending = np.arange(keys.shape[0])
+        slots = (keys & np.uint64(self._mask)).astype(np.int64)
+        while pending.size:
+            occupant = self._table[slots]
+            match = occupant == keys[pending]
+            found[pending[match]] = slots[match]
+            probe = ~match & (occupant != 0)
+            pending, slots = pending[probe], (slots[probe] + 1) & self._mask
+        return found
+
+    def _insert(self, keys: np.ndarray, scores: np.ndarray, stamps: np.ndarray):
+        """Places keys that are absent and distinct, one slot per key per round."""
+        pending = np.arange(keys.shape[0])
+        slots = (keys & np.uint64(self._mask)).astype(np.int64)
+        while pending.size:
+            empty = self._table[slots] == 0
+            claimed, first = np.unique(slots[empty], return_index=True)
+            winners = pending[empty][first]
+            self._table[claimed] = keys[winners]
+            self._scores[claimed] = scores[winners]
+            self._stamps[claimed] = stamps[winners]
+            placed = np.zeros(keys.shape[0], dtype=bool)
+            placed[winners] = True
+            left = ~placed[pending]
+            pending, slots = pending[left], (slots[left] + 1) & self._mask
+        self._count += keys.shape[0]
+
+    def _evict(self, n: int):
+        occupied = np.flatnonzero(self._table)
+        n = min(n, occupied.size)
+        order = np.argpartition(self._stamps[occupied], n - 1) if n < occupied.size else np.arange(occupied.size)
+        survivors = occupied[order[n:]]
+        keys, scores, stamps = self._table[survivors], self._scores[survivors], self._stamps[survivors]
+        self._reset()
+        self._insert(keys, scores, stamps)
+        self.evictions += n
+
+    def lookup(self, X: np.ndarray, model_version: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Args:
+            X: float32 matrix in schema feature order
+            model_version: identifies the model producing the scores
+        Returns:
+            scores: float64 vector with the cached scores, NaN for misses
+            misses: row positions that have to be scored
+            keys: row keys, to pass back to `put` with the miss scores
+        """
+        keys = row_keys(X, self.quantum, version_seed(model_version))
+        scores = np.full(keys.shape[0], np.nan)
+        with self._lock:
+            self._use_version(model_version)
+            self._clock += 1
+            slots = self._find(keys)
+            hit = slots >= 0
+            self._stamps[slots[hit]] = self._clock
+            scores[hit] = self._scores[slots[hit]]
+        return scores, np.flatnonzero(~hit), keys
+
+    def put(self, keys: np.ndarray, scores: np.ndarray, model_version: str):
+        """Stores scores under their row keys, evicting least recently used entries past the cap."""
+        with self._lock:
+            if model_version != self.model_version:
+                # Scored by a model that is no longer current: do not cache
+                return
+            keys, first = np.unique(keys, return_index=True)
+            scores = np.asarray(scores, dtype=np.float64)[first]
+            slots = self._find(keys)
+            known = slots >= 0
+            self._dirty = self._dirty or keys.shape[0] > 0
+            self._scores[slots[known]] = scores[known]
+            self._stamps[slots[known]] = self._clock
+            keys, scores = keys[~known][-self.capacity:], scores[~known][-self.capacity:]
+            overflow = self._count + keys.shape[0] - self.capacity
+            if overflow > 0:
+                self._evict(max(overflow, self.evict_rows))
+            self._insert(keys, scores, np.full(keys.shape[0], self._clock, dtype=np.int64))
+
+    def predict(
+        self, X: np.ndarray, predict_fn: Callable[[np.ndarray], np.ndarray], model_version: str
+    ) -> np.ndarray:
+        """Scores `X`, calling `predict_fn` only on the rows that are not cached."""
+        try:
+            X = np.asarray(X)
+            scores, misses, keys = self.lookup(X, model_version)
+            n_hits = X.shape[0] - misses.size
+            if misses.size:
+                start = time.perf_counter()
+                missed = np.asarray(predict_fn(X if n_hits == 0 else X[misses]))
+                elapsed = time.perf_counter() - start
+                self._output_shape, self._output_dtype = missed.shape[1:], missed.dtype
+                missed = np.ravel(missed)
+                scores[misses] = missed
+                self.put(keys[misses], missed, model_version)
+            with self._lock:
+                if misses.size:
+                    # Smoothed scoring cost per row, used to price the hits
+                    per_row = elapsed / misses.size
+                    self._seconds_per_row = per_row if self.misses == 0 else 0.9 * self._seconds_per_row + 0.1 * per_row
+                self.hits += n_hits
+                self.misses += misses.size
+                self.saved_seconds += n_hits * self._seconds_per_row
+            if self._output_dtype is None:
+                return scores
+            return scores.reshape((-1,) + self._output_shape).astype(self._output_dtype, copy=False)
+        except Exception as e:
+            logging.error("Error in cached prediction: {}".format(e))
+            raise e
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            stats: hits, misses, hit rate, entries held, capacity and
+                table size, evictions, version invalidations and the
+                estimated scoring time saved by hits
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache_hits": self.hits,
+                "cache_misses": self.misses,
+                "cache_hit_rate": self.hits / lookups if lookups else 0.0,
+                "cache_entries": self._count,
+                "cache_capacity": self.capacity,
+                "cache_bytes": self._table.shape[0] * SLOT_BYTES,
+                "cache_evictions": self.evictions,
+                "cache_invalidations": self.invalidations,
+                "cache_saved_ms": self.saved_seconds * 1e3,
+            }
+
+    def save(self, path: str = DEFAULT_CACHE_PATH) -> bool:
+        """
+        Writes the entries, least recently used first, so a later process
+        can reuse them. Returns False, without writing, if no entry changed.
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            occupied = np.flatnonzero(self._table)
+            occupied = occupied[np.argsort(self._stamps[occupied], kind="stable")]
+            keys, scores = self._table[occupied], self._scores[occupied]
+            version = self.model_version or ""
+            output_dtype = "" if self._output_dtype is None else self._output_dtype.str
+            output_shape = np.array(self._output_shape, dtype=np.int64)
+            self._dirty = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f, keys=keys, scores=scores, version=np.array(version), quantum=self.quantum,
+                output_dtype=np.array(output_dtype), output_shape=output_shape,
+            )
+        os.replace(path + ".tmp", path)
+        return True
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_CACHE_PATH, **kwargs) -> "PredictionCache":
+        """Restores a saved cache, or returns an empty one if there is none or it used another quantum."""
+        cache = cls(**kwargs)
+        if not os.path.exists(path):
+            return cache
+        with np.load(path) as state:
+            version = str(state["version"])
+            if float(state["quantum"]) != cache.quantum or not version:
+                return cache
+            cache._use_version(version)
+            cache.put(state["keys"][-cache.capacity:], state["scores"][-cache.capacity:], version)
+            if "output_dtype" in state.files and str(state["output_dtype"]):
+                cache._output_dtype = np.dtype(str(state["output_dtype"]))
+                cache._output_shape = tuple(int(n) for n in state["output_shape"])
+        cache._dirty = False
+        return cache
@@ -0,0 +1,243 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_TRACE_PATH = os.path.join(".cache", "traces", "pipeline_trace.json")
+DEFAULT_PROFILE_DIR = os.path.join(".cache", "profiles")
+# Set to 1 to dump a cProfile of every instrumented step
+PROFILE_ENV = "CHURN_PROFILE_STEPS"
+
+
+def _io_counters() -> Dict[str, int]:
+    """Bytes read and written by this process so far (Linux only, zeros elsewhere)."""
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return {"read": int(counters["rchar"]), "written": int(counters["wchar"])}
+    except (OSError, KeyError, ValueError):
+        return {"read": 0, "written": 0}
+
+
+def _status_bytes(field: str) -> Optional[int]:
+    """A memory field of /proc/self/status (e.g. VmRSS, VmHWM) in bytes, or None off Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Restarts the kernel's RSS high-water mark (VmHWM) at the current RSS; False where unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _max_rss_bytes() -> int:
+    """Peak RSS of the whole process so far."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class _RssSampler(threading.Thread):
+    """Polls the current RSS and keeps its maximum, where the high-water mark cannot be reset."""
+
+    def __init__(self, interval: float = 0.01):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.interval = interval
+        self.peak = _status_bytes("VmRSS") or 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, _status_bytes("VmRSS") or 0)
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, _status_bytes("VmRSS") or 0)
+
+
+# Open StepProfiles, innermost last: resetting the high-water mark for a
+# nested step must not lose the peak an enclosing step reached before it
+_active: list = []
+_active_lock = threading.Lock()
+
+
+class StepProfile:
+    """
+    Context manager recording the resources one pipeline step uses: wall and
+    CPU time, the step's own peak RSS, rows processed and bytes read and
+    written.
+
+    On Linux the kernel's RSS high-water mark is reset when the step starts
+    (via /proc/self/clear_refs) and read when it ends, so the peak belongs
+    to this step rather than to whatever ran earlier in the process. Where
+    the reset is not permitted, a thread samples the RSS instead; off Linux
+    only the process-wide peak is available and is reported as is.
+
+    On exit the measurements are logged, sent to MLflow as `<step>_<metric>`
+    when a run is active, and appended as a complete event to a Chrome trace
+    file (open it in chrome://tracing or https://ui.perfetto.dev). The file
+    uses the JSON array format, whose closing bracket is optional, so every
+    step and process can append to it. With `profile=True` (or
+    CHURN_PROFILE_STEPS=1) the step also runs under cProfile and its hottest
+    functions are logged and dumped next to the trace.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rows: Optional[int] = None,
+        trace_path: str = DEFAULT_TRACE_PATH,
+        profile: Optional[bool] = None,
+        profile_dir: str = DEFAULT_PROFILE_DIR,
+        top_functions: int = 15,
+    ):
+        self.name = name
+        self.rows = rows
+        self.trace_path = trace_path
+        self.profile = os.environ.get(PROFILE_ENV, "0") == "1" if profile is None else profile
+        self.profile_dir = profile_dir
+        self.top_functions = top_functions
+        self.metrics: Dict[str, float] = {}
+        self._profiler = None
+        self._sampler: Optional[_RssSampler] = None
+        self._peak_seen = 0
+
+    def __enter__(self) -> "StepProfile":
+        self._start_epoch = time.time()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._start_io = _io_counters()
+        self._start_rss = _status_bytes("VmRSS") or 0
+        with _active_lock:
+            for outer in _active:
+                outer._note_peak()
+            _active.append(self)
+            self._peak_seen = self._start_rss
+            if not _reset_peak_rss() and self._start_rss:
+                self._sampler = _RssSampler()
+                self._sampler.start()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if self._profiler is not None:
+            self._profiler.disable()
+        wall = time.perf_counter() - self._start_wall
+        io_counters = _io_counters()
+        with _active_lock:
+            peak = self._stop_peak()
+            _active.remove(self)
+            for outer in _active:
+                outer._peak_seen = max(outer._peak_seen, peak)
+        self.metrics = {
+            "wall_seconds": wall,
+            "cpu_seconds": time.process_time() - self._start_cpu,
+            "start_rss_mb": self._start_rss / 2**20,
+            "peak_rss_mb": peak / 2**20,
+            "bytes_read": io_counters["read"] - self._start_io["read"],
+            "bytes_written": io_counters["written"] - self._start_io["written"],
+        }
+        if self.rows is not None:
+            self.metrics["rows"] = self.rows
+            self.metrics["rows_per_sec"] = self.rows / wall if wall > 0 else 0.0
+        try:
+            logging.info("Step %s resources: %s", self.name, self.metrics)
+            self._log_mlflow()
+            self._write_trace_event(failed=exc_type is not None)
+            if self._profiler is not None:
+                self._dump_profile()
+        except Exception as e:
+            # Instrumentation must never fail the step it measures
+            logging.warning("Could not record profile of step {}: {}".format(self.name, e))
+        return False
+
+    def _current_peak(self) -> int:
+        if self._sampler is not None:
+            return self._sampler.peak
+        return _status_bytes("VmHWM") or _max_rss_bytes()
+
+    def _note_peak(self):
+        """Records the peak so far before a nested step resets the high-water mark."""
+        self._peak_seen = max(self._peak_seen, self._current_peak())
+
+    def _stop_peak(self) -> int:
+        if self._sampler is not None:
+            return max(self._peak_seen, self._sampler.stop())
+        return max(self._peak_seen, self._current_peak())
+
+    def _log_mlflow(self):
+        try:
+            import mlflow
+        except ImportError:
+            return
+        if mlflow.active_run() is not None:
+            mlflow.log_metrics({"{}_{}".format(self.name, key): value for key, value in self.metrics.items()})
+
+    def _write_trace_event(self, failed: bool):
+        os.makedirs(os.path.dirname(self.trace_path) or ".", exist_ok=True)
+        event = {
+            "name": self.name,
+            "cat": "step",
+            "ph": "X",
+            "ts": int(self._start_epoch * 1e6),
+            "dur": int(self.metrics["wall_seconds"] * 1e6),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": dict(self.metrics, failed=failed),
+        }
+        with open(self.trace_path, "a") as f:
+            if f.tell() == 0:
+                f.write("[\n")
+            f.write(json.dumps(event) + ",\n")
+
+    def _dump_profile(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, "{}-{}-{}.prof".format(self.name, os.getpid(), int(self._start_epoch)))
+        self._profiler.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(self._profiler, stream=report).sort_stats("cumulative").print_stats(self.top_functions)
+        logging.info("Hot functions in step %s (full profile in %s):\n%s", self.name, path, report.getvalue())
+
+
+def profile_step(name: str, rows: Optional[int] = None, **kwargs) -> StepProfile:
+    """
+    Instruments a step body:
+
+        with profile_step("clean_df", rows=len(df)) as profile:
+            ...
+            profile.rows = len(result)  # optionally, once known
+    """
+    return StepProfile(name, rows=rows, **kwargs)
+
+
+def load_trace(path: str = DEFAULT_TRACE_PATH) -> list:
+    """Reads the events of a trace file written by StepProfile."""
+    with open(path) as f:
+        content = f.read().rstrip().rstrip(",").rstrip("]")
+    return json.loads(content + "]") if content else []
@@ -0,0 +1,192 @@
+import logging
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering import US_STATES, CategoryEncoder, FeatureEngineering
+
+
+class FeatureSchema:
+    """
+    Declares the model features (names, on-disk dtypes and order), the
+    categorical columns and their known categories, the derived features,
+    the target column and the source columns that are dropped before training.
+    """
+
+    def __init__(
+        self,
+        features: Sequence[Tuple[str, str]],
+        target: Tuple[str, str],
+        drop: Sequence[str],
+        categorical: Sequence[Tuple[str, Sequence[str]]] = (),
+        engineering: Optional[FeatureEngineering] = None,
+    ):
+        self.features = list(features)
+        self.target, self.target_dtype = target
+        self.drop = list(drop)
+        self.categorical = [(name, tuple(categories)) for name, categories in categorical]
+        self.engineering = engineering
+
+    @property
+    def inputs(self) -> List[str]:
+        """Raw columns the model features are computed from."""
+        return [name for name, _ in self.features] + [name for name, _ in self.categorical]
+
+    @property
+    def derived(self) -> List[str]:
+        return list(self.engineering.names) if self.engineering else []
+
+    @property
+    def names(self) -> List[str]:
+        """Feature names in model input order: raw, categorical codes, derived."""
+        return self.inputs + self.derived
+
+    @property
+    def columns(self) -> List[str]:
+        """Raw input columns followed by the target."""
+        return self.inputs + [self.target]
+
+    @property
+    def dtypes(self) -> Dict[str, str]:
+        """On-disk dtypes of every kept column, target included."""
+        dtypes = dict(self.features)
+        dtypes.update((name, "category") for name, _ in self.categorical)
+        dtypes[self.target] = self.target_dtype
+        return dtypes
+
+    def compile(self) -> "FeatureTransform":
+        return FeatureTransform(self)
+
+
+class FeatureTransform:
+    """
+    Preprocessing transform compiled from a FeatureSchema. Turns raw frames,
+    column mappings or single rows into a C-contiguous float32 matrix in
+    schema order, writing each column once into a preallocated buffer.
+    Categorical columns are encoded through precompiled lookup tables and
+    derived features are computed from the written raw columns; single
+    rows take a scalar path with the same float32 operations and no pandas.
+
+    Category codes are ordinal labels, not quantities: `linear_columns`
+    lists the features without them, for models that would otherwise fit a
+    slope over an arbitrary category order.
+    """
+
+    dtype = np.float32
+
+    def __init__(self, schema: FeatureSchema):
+        self.schema = schema
+        self.names = schema.names
+        self.n_features = len(self.names)
+        self.numeric = [name for name, _ in schema.features]
+        self.encoders = [(name, CategoryEncoder(categories)) for name, categories in schema.categorical]
+        self.n_inputs = len(schema.inputs)
+        self.code_columns = list(range(len(self.numeric), self.n_inputs))
+        self.linear_columns = [j for j in range(self.n_features) if j not in self.code_columns]
+
+    def _derive(self, out: np.ndarray, chunk_rows: int = 16_384) -> np.ndarray:
+        if self.schema.engineering is not None:
+            # Row blocks keep the strided column reads and writes in cache
+            for start in range(0, out.shape[0], chunk_rows):
+                block = out[start:start + chunk_rows]
+                columns = {name: block[:, j] for j, name in enumerate(self.numeric)}
+                self.schema.engineering.compute(columns, block[:, self.n_inputs:])
+        return out
+
+    def transform(
+        self,
+        data: Union[pd.DataFrame, Mapping[str, Sequence], np.ndarray],
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Args:
+            data: frame or mapping with (at least) the schema features, or an
+                already ordered 2-D array
+            out: optional preallocated (n_rows, n_features) float32 buffer
+        Returns:
+            X: np.ndarray of shape (n_rows, n_features), dtype float32
+        """
+        try:
+            if isinstance(data, np.ndarray):
+                if data.ndim != 2 or data.shape[1] != self.n_features:
+                    raise ValueError(
+                        "Expected an array with {} columns, got shape {}".format(self.n_features, data.shape)
+                    )
+                if out is None:
+                    return np.ascontiguousarray(data, dtype=self.dtype)
+                out[...] = data
+                return out
+
+            if (
+                isinstance(data, pd.DataFrame)
+                and list(data.columns) == self.names
+                and all(dtype == self.dtype for dtype in data.dtypes)
+            ):
+                # Already the model matrix (e.g. views of a SharedSplit): no copy
+                if out is None:
+                    return np.ascontiguousarray(data.to_numpy(), dtype=self.dtype)
+                out[...] = data.to_numpy()
+                return out
+
+            n_rows = len(data[self.numeric[0]])
+            if out is None:
+                out = np.empty((n_rows, self.n_features), dtype=self.dtype)
+            for j, name in enumerate(self.numeric):
+                column = data[name]
+                out[:, j] = column.to_numpy() if isinstance(column, pd.Series) else column
+            for j, (name, encoder) in enumerate(self.encoders, start=len(self.numeric)):
+                out[:, j] = encoder.encode(data[name])
+            return self._derive(out)
+        except Exception as e:
+            logging.error("Error in feature transform: {}".format(e))
+            raise e
+
+    def transform_row(self, row: Mapping[str, float]) -> np.ndarray:
+        """Transforms a single record into a (1, n_features) float32 matrix."""
+        out = np.empty((1, self.n_features), dtype=self.dtype)
+        raw = out[0, :len(self.numeric)]
+        raw[:] = [row[name] for name in self.numeric]
+        for j, (name, encoder) in enumerate(self.encoders, start=len(self.numeric)):
+            out[0, j] = encoder.encode_one(row[name])
+        if self.schema.engineering is not None:
+            # Read back after the float32 rounding, so the arithmetic matches the batch path
+            out[0, self.n_inputs:] = self.schema.engineering.compute_one(dict(zip(self.numeric, raw.tolist())))
+        return out
+
+    def target(self, data: Union[pd.DataFrame, Mapping[str, Sequence]]) -> np.ndarray:
+        """Extracts the target column as a float32 vector."""
+        column = data[self.schema.target]
+        column = column.to_numpy() if isinstance(column, pd.Series) else column
+        return np.asarray(column, dtype=self.dtype)
+
+
+CHURN_SCHEMA = FeatureSchema(
+    features=[
+        ("account_length", "int32"),
+        ("international_plan", "int8"),
+        ("voice_mail_plan", "int8"),
+        ("number_vmail_messages", "int32"),
+        ("total_day_minutes", "float32"),
+        ("total_day_calls", "int32"),
+        ("total_eve_minutes", "float32"),
+        ("total_eve_calls", "int32"),
+        ("total_night_minutes", "float32"),
+        ("total_night_calls", "int32"),
+        ("total_intl_minutes", "float32"),
+        ("total_intl_calls", "int32"),
+        ("number_customer_service_calls", "int32"),
+        ("area_code_encoded", "int8"),
+    ],
+    target=("churn", "int8"),
+    categorical=[("state", US_STATES)],
+    engineering=FeatureEngineering(),
+    drop=[
+        "total_day_charge",
+        "total_eve_charge",
+        "total_night_charge",
+        "total_intl_charge",
+    ],
+)
+
+FEATURE_TRANSFORM = CHURN_SCHEMA.compile()
@@ -0,0 +1,65 @@
+import logging
+import threading
+from typing import Dict
+
+import numpy as np
+
+
+class LinearScorer:
+    """
+    In-process scorer for a fitted linear model. Scores a float32 batch with
+    a single dot product into a preallocated output buffer.
+
+    Each thread gets its own buffer. The returned array is a view into it
+    and is overwritten by that thread's next call; copy it if it has to
+    outlive the call.
+    """
+
+    def __init__(self, coef: np.ndarray, intercept: float, batch_size: int = 10_000):
+        self.coef = np.ascontiguousarray(np.ravel(coef), dtype=np.float32)
+        self.intercept = np.float32(intercept)
+        self.batch_size = batch_size
+        self._local = threading.local()
+
+    @classmethod
+    def from_model(cls, model, batch_size: int = 10_000) -> "LinearScorer":
+        from sklearn.linear_model import LinearRegression
+
+        if not isinstance(model, LinearRegression):
+            raise TypeError("In-process scoring supports LinearRegression, got {}".format(type(model).__name__))
+        return cls(model.coef_, model.intercept_, batch_size=batch_size)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            X: float32 matrix in schema feature order
+        Returns:
+            prediction: np.ndarray view of length n_rows
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+        buffer = getattr(self._local, "out", None)
+        if buffer is None or n_rows > buffer.shape[0]:
+            buffer = np.empty(max(n_rows, self.batch_size), dtype=np.float32)
+            self._local.out = buffer
+        out = buffer[:n_rows]
+        np.dot(X, self.coef, out=out)
+        out += self.intercept
+        return out
+
+
+_scorers: Dict[str, LinearScorer] = {}
+_scorers_lock = threading.Lock()
+
+
+def get_scorer(model_uri: str) -> LinearScorer:
+    """Loads the model at `model_uri` once per process and returns its scorer."""
+    with _scorers_lock:
+        scorer = _scorers.get(model_uri)
+        if scorer is None:
+            import mlflow.sklearn
+
+            logging.info("Loading model from %s for in-process scoring", model_uri)
+            scorer = LinearScorer.from_model(mlflow.sklearn.load_model(model_uri))
+            _scorers[model_uri] = scorer
+        return scorer
@@ -0,0 +1,160 @@
+import logging
+import math
+import multiprocessing as mp
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.compact_model import CompactModel
+
+_STOP = None
+
+
+def _worker_loop(connection, model_name: str, model_size: int, input_name: str, output_name: str,
+                 max_rows: int, n_features: int):
+    """Scores row ranges of the shared input arena into the shared output arena until told to stop."""
+    # Workers share the parent's resource tracker, so attaching does not
+    # make a worker responsible for (or able to) unlink the segments
+    model_segment = shared_memory.SharedMemory(name=model_name)
+    input_segment = shared_memory.SharedMemory(name=input_name)
+    output_segment = shared_memory.SharedMemory(name=output_name)
+    model = X = out = None
+    try:
+        # The model arrays are views of the shared segment: no per-worker copy
+        model = CompactModel(model_segment.buf[:model_size])
+        X = np.ndarray((max_rows, n_features), dtype=np.float32, buffer=input_segment.buf)
+        out = np.ndarray((max_rows,), dtype=np.float64, buffer=output_segment.buf)
+        while True:
+            task = connection.recv()
+            if task is _STOP:
+                break
+            start, stop = task
+            try:
+                out[start:stop] = model.predict(X[start:stop])
+                connection.send(stop - start)
+            except Exception as e:
+                connection.send(e)
+    finally:
+        del model, X, out
+        for segment in (model_segment, input_segment, output_segment):
+            segment.close()
+
+
+class SharedScoringPool:
+    """
+    Local pool of scoring processes that share one copy of the model.
+
+    The compact model bytes are placed in a shared-memory segment that every
+    worker maps, so an extra worker costs a process but no model copy.
+    Requests are written once into a shared input arena; each worker is
+    sent only a (start, stop) row range over a pipe, scores it straight from
+    the arena and writes the scores to a shared output arena. Nothing but
+    the descriptors is pickled. Batches are split across workers with at
+    least `min_rows_per_worker` rows each, so small requests do not pay for
+    fan-out. Batches larger than the arena are scored in arena-sized windows.
+
+    There is one arena, so `predict` calls are serialized: the parallelism is
+    across workers within a batch, not across concurrent requests. That
+    matches a MicroBatcher front end, which scores one batch at a time;
+    giving it `pool.input` as its batch buffer assembles every batch in the
+    arena, so the pool scores it without a copy.
+    """
+
+    def __init__(
+        self,
+        model_bytes: bytes,
+        n_workers: int = 0,
+        max_batch_rows: int = 1_000_000,
+        min_rows_per_worker: int = 4096,
+        start_method: str = "spawn",
+    ):
+        probe = CompactModel(model_bytes)
+        self.n_features = probe.n_features
+        self.n_workers = n_workers or mp.cpu_count()
+        self.max_batch_rows = max_batch_rows
+        self.min_rows_per_worker = min_rows_per_worker
+        self._lock = threading.Lock()
+
+        self._model_segment = shared_memory.SharedMemory(create=True, size=len(model_bytes))
+        self._model_segment.buf[:len(model_bytes)] = model_bytes
+        self._input_segment = shared_memory.SharedMemory(create=True, size=max_batch_rows * self.n_features * 4)
+        self._output_segment = shared_memory.SharedMemory(create=True, size=max_batch_rows * 8)
+        self.input = np.ndarray((max_batch_rows, self.n_features), dtype=np.float32, buffer=self._input_segment.buf)
+        self._output = np.ndarray((max_batch_rows,), dtype=np.float64, buffer=self._output_segment.buf)
+
+        context = mp.get_context(start_method)
+        self._connections = []
+        self._processes = []
+        for _ in range(self.n_workers):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker_loop,
+                args=(child, self._model_segment.name, len(model_bytes), self._input_segment.name,
+                      self._output_segment.name, max_batch_rows, self.n_features),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        logging.info(
+            "Started %d scoring workers sharing a %d-byte model", self.n_workers, len(model_bytes)
+        )
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "SharedScoringPool":
+        with open(path, "rb") as f:
+            return cls(f.read(), **kwargs)
+
+    def _score_window(self, n_rows: int, out: np.ndarray):
+        n_workers = max(1, min(self.n_workers, math.ceil(n_rows / self.min_rows_per_worker)))
+        bounds = np.linspace(0, n_rows, n_workers + 1).astype(int)
+        for connection, start, stop in zip(self._connections, bounds[:-1], bounds[1:]):
+            connection.send((int(start), int(stop)))
+        errors = [connection.recv() for connection in self._connections[:n_workers]]
+        for error in errors:
+            if isinstance(error, Exception):
+                raise error
+        out[:] = self._output[:n_rows]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            X: float32 matrix in schema feature order. Rows already written
+                to the start of `pool.input` are scored without a copy.
+        Returns:
+            scores: float64 vector, as CompactModel.predict
+        """
+        try:
+            X = np.asarray(X)
+            scores = np.empty(X.shape[0])
+            with self._lock:
+                for start in range(0, X.shape[0], self.max_batch_rows):
+                    window = X[start:start + self.max_batch_rows]
+                    if not (start == 0 and window.ctypes.data == self.input.ctypes.data):
+                        self.input[:window.shape[0]] = window
+                    self._score_window(window.shape[0], scores[start:start + window.shape[0]])
+            return scores
+        except Exception as e:
+            logging.error("Error in shared scoring pool: {}".format(e))
+            raise e
+
+    def close(self):
+        for connection in self._connections:
+            try:
+                connection.send(_STOP)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        del self.input, self._output
+        for segment in (self._model_segment, self._input_segment, self._output_segment):
+            segment.close()
+            segment.unlink()
+
+    def __enter__(self) -> "SharedScoringPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
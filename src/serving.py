@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.schema import FEATURE_TRANSFORM, FeatureTransform
+
+
+class ServingStats:
+    """
+    Queue depth, batch-size histogram and a rolling window of per-request
+    latencies for the micro-batching server.
+    """
+
+    def __init__(self, latency_window: int = 10_000):
+        self.queue_depth = 0
+        self.requests = 0
+        self.batches = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self._latencies = np.zeros(latency_window)
+        self._latency_count = 0
+
+    def record_batch(self, size: int):
+        self.batches += 1
+        # Power-of-two buckets keep the histogram small for any max batch size
+        bucket = 1 << (size - 1).bit_length()
+        self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+
+    def record_latency(self, seconds: float):
+        self._latencies[self._latency_count % self._latencies.shape[0]] = seconds
+        self._latency_count += 1
+        self.requests += 1
+
+    def snapshot(self) -> dict:
+        latencies = self._latencies[: min(self._latency_count, self._latencies.shape[0])]
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e3 if latencies.size else (0.0, 0.0)
+        return {
+            "queue_depth": self.queue_depth,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {"<={}".format(k): v for k, v in sorted(self.batch_sizes.items())},
+            "latency_p50_ms": float(p50),
+            "latency_p99_ms": float(p99),
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row prediction requests into micro-batches.
+
+    A batch is dispatched as soon as it holds `max_batch_size` rows or the
+    oldest request in it has waited `max_wait_ms`, whichever comes first, and
+    is scored with one vectorized `predict_fn` call. The call runs in the
+    loop's default executor, so the event loop keeps accepting requests and
+    filling the next batch while a batch is scored; one batch is scored at a
+    time, which lets every batch reuse the same row buffer. A `buffer` of
+    at least `max_batch_size` rows can be passed in, e.g. a scoring pool's
+    shared input arena, so batches are assembled where they are scored.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        n_features: int,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        buffer: Optional[np.ndarray] = None,
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1e3
+        self.stats = ServingStats()
+        if buffer is None:
+            buffer = np.empty((max_batch_size, n_features), dtype=np.float32)
+        elif buffer.shape[0] < max_batch_size or buffer.shape[1] != n_features:
+            raise ValueError("Batch buffer of shape {} cannot hold {} rows of {} features".format(
+                buffer.shape, max_batch_size, n_features
+            ))
+        self._buffer = buffer
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, row: np.ndarray) -> float:
+        """Queues one (n_features,) row and waits for its score."""
+        future = asyncio.get_running_loop().create_future()
+        self.stats.queue_depth += 1
+        self._queue.put_nowait((row, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[Tuple[np.ndarray, asyncio.Future, float]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            size = len(batch)
+            self.stats.queue_depth -= size
+            for i, (row, _, _) in enumerate(batch):
+                self._buffer[i] = row
+            try:
+                scores = (await loop.run_in_executor(None, self.predict_fn, self._buffer[:size])).tolist()
+            except Exception as e:
+                logging.error("Error scoring micro-batch: {}".format(e))
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats.record_batch(size)
+            now = time.perf_counter()
+            for (_, future, started), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(score)
+                self.stats.record_latency(now - started)
+
+
+class PredictionServer:
+    """
+    Minimal asyncio HTTP/1.1 front end for a MicroBatcher.
+
+    POST /predict takes a JSON object mapping feature names to values and
+    returns {"prediction": score}. GET /metrics returns ServingStats, plus
+    the challenger comparison when a ShadowScorer is attached.
+    Connections are kept alive so a client can pipeline requests.
+    """
+
+    def __init__(self, batcher: MicroBatcher, transform: FeatureTransform = FEATURE_TRANSFORM, shadow=None):
+        self.batcher = batcher
+        self.transform = transform
+        self.shadow = shadow
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: str, body: dict):
+        payload = json.dumps(body).encode()
+        writer.write(
+            "HTTP/1.1 {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n".format(
+                status, len(payload)
+            ).encode()
+            + payload
+        )
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                content_length = 0
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode().partition(":")
+                    if name.strip().lower() == "content-length":
+                        content_length = int(value)
+                body = await reader.readexactly(content_length) if content_length else b""
+
+                if method == "POST" and path == "/predict":
+                    try:
+                        row = self.transform.transform_row(json.loads(body))[0]
+                        score = await self.batcher.predict(row)
+                        await self._respond(writer, "200 OK", {"prediction": score})
+                    except (KeyError, ValueError) as e:
+                        await self._respond(writer, "400 Bad Request", {"error": str(e)})
+                    except Exception as e:
+                        await self._respond(writer, "500 Internal Server Error", {"error": str(e)})
+                elif method == "GET" and path == "/metrics":
+                    metrics = self.batcher.stats.snapshot()
+                    if self.shadow is not None:
+                        metrics["shadow"] = self.shadow.stats()
+                    await self._respond(writer, "200 OK", metrics)
+                else:
+                    await self._respond(writer, "404 Not Found", {"error": path})
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        await self.batcher.start()
+        server = await asyncio.start_server(self._handle, host, port)
+        logging.info("Serving predictions on http://%s:%d", host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
@@ -0,0 +1,240 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+_STOP = None
+
+
+class ShadowComparison:
+    """
+    Streaming comparison of challenger and champion scores on the same rows.
+
+    Keeps running sums (for means, the delta variance and the score
+    correlation), decision counts at `threshold` and a fixed histogram of
+    the score delta (challenger - champion) over [-delta_range,
+    delta_range], so memory does not grow with traffic and two comparisons
+    merge by addition. Delta quantiles are read from the histogram;
+    deltas outside the range fall into the edge bins.
+    """
+
+    def __init__(self, threshold: float = 0.5, n_bins: int = 400, delta_range: float = 1.0):
+        self.threshold = threshold
+        self.delta_range = delta_range
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.n_rows = 0
+        self.sums = np.zeros(5)  # champion, challenger, champion^2, challenger^2, champion * challenger
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.champion_positive = 0
+        self.challenger_positive = 0
+        self.flips = 0
+
+    def update(self, champion: np.ndarray, challenger: np.ndarray) -> "ShadowComparison":
+        champion = np.ravel(np.asarray(champion, dtype=np.float64))
+        challenger = np.ravel(np.asarray(challenger, dtype=np.float64))
+        if champion.shape != challenger.shape:
+            raise ValueError("Score shapes differ: {} vs {}".format(champion.shape, challenger.shape))
+        if champion.size == 0:
+            return self
+        delta = challenger - champion
+        n_bins = self.counts.shape[0]
+        bins = ((delta + self.delta_range) * (n_bins / (2 * self.delta_range))).astype(np.intp)
+        np.clip(bins, 0, n_bins - 1, out=bins)
+        self.counts += np.bincount(bins, minlength=n_bins)
+        self.n_rows += delta.size
+        self.sums += (
+            champion.sum(), challenger.sum(), np.dot(champion, champion),
+            np.dot(challenger, challenger), np.dot(champion, challenger),
+        )
+        abs_delta = np.abs(delta)
+        self.sum_abs_delta += float(abs_delta.sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+        champion_positive = champion >= self.threshold
+        challenger_positive = challenger >= self.threshold
+        self.champion_positive += int(champion_positive.sum())
+        self.challenger_positive += int(challenger_positive.sum())
+        self.flips += int(np.count_nonzero(champion_positive != challenger_positive))
+        return self
+
+    def merge(self, other: "ShadowComparison") -> "ShadowComparison":
+        if self.counts.shape != other.counts.shape or self.delta_range != other.delta_range:
+            raise ValueError("Cannot merge comparisons with different delta bins")
+        self.counts += other.counts
+        self.n_rows += other.n_rows
+        self.sums += other.sums
+        self.sum_abs_delta += other.sum_abs_delta
+        self.max_abs_delta = max(self.max_abs_delta, other.max_abs_delta)
+        self.champion_positive += other.champion_positive
+        self.challenger_positive += other.challenger_positive
+        self.flips += other.flips
+        return self
+
+    def delta_quantile(self, q: float) -> float:
+        """Estimated q-quantile of the delta, interpolated within histogram bins."""
+        edges = np.linspace(-self.delta_range, self.delta_range, self.counts.shape[0] + 1)
+        cumulative = np.concatenate(([0.0], np.cumsum(self.counts) / max(self.n_rows, 1)))
+        return float(np.interp(q, cumulative, edges))
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Returns:
+            metrics: rows compared, score means, the delta mean, spread and
+                quantiles, decision rates at `threshold`, the fraction of
+                rows whose decision flips and the score correlation
+        """
+        n = self.n_rows
+        if n == 0:
+            return {"shadow_rows": 0}
+        champion_sum, challenger_sum, champion_sq, challenger_sq, cross = self.sums
+        champion_mean, challenger_mean = champion_sum / n, challenger_sum / n
+        champion_var = max(champion_sq / n - champion_mean ** 2, 0.0)
+        challenger_var = max(challenger_sq / n - challenger_mean ** 2, 0.0)
+        covariance = cross / n - champion_mean * challenger_mean
+        delta_var = max(champion_var + challenger_var - 2 * covariance, 0.0)
+        denominator = np.sqrt(champion_var * challenger_var)
+        return {
+            "shadow_rows": n,
+            "champion_mean": float(champion_mean),
+            "challenger_mean": float(challenger_mean),
+            "delta_mean": float(challenger_mean - champion_mean),
+            "delta_std": float(np.sqrt(delta_var)),
+            "abs_delta_mean": self.sum_abs_delta / n,
+            "abs_delta_max": self.max_abs_delta,
+            "delta_p05": self.delta_quantile(0.05),
+            "delta_p50": self.delta_quantile(0.5),
+            "delta_p95": self.delta_quantile(0.95),
+            "champion_positive_rate": self.champion_positive / n,
+            "challenger_positive_rate": self.challenger_positive / n,
+            "decision_flip_rate": self.flips / n,
+            "score_correlation": float(covariance / denominator) if denominator > 0 else 0.0,
+        }
+
+
+class ShadowScorer:
+    """
+    Scores a challenger model on the batches the champion served, off the
+    request path.
+
+    `submit` copies the batch and its champion scores into a bounded queue
+    and returns immediately; when the queue is full the batch is dropped
+    (and counted) rather than waited on, so a slow challenger can never
+    hold up a response. A single daemon thread drains the queue, scores the
+    challenger and folds both score vectors into a ShadowComparison. The
+    time `submit` adds to each request is recorded, next to the
+    challenger's own scoring time, so the cost of shadowing is visible.
+    """
+
+    def __init__(
+        self,
+        challenger_fn: Callable[[np.ndarray], np.ndarray],
+        max_queue: int = 32,
+        threshold: float = 0.5,
+        latency_window: int = 10_000,
+    ):
+        self.challenger_fn = challenger_fn
+        self.comparison = ShadowComparison(threshold=threshold)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        # Counters are shared with request threads; the comparison only with
+        # `stats`, so submitting never waits on a comparison update
+        self._lock = threading.Lock()
+        self._comparison_lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.scored = 0
+        self.failed = 0
+        self._submit_seconds = np.zeros(latency_window)
+        self._challenger_seconds = np.zeros(latency_window)
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def submit(self, X: np.ndarray, champion_scores: np.ndarray) -> bool:
+        """Queues a served batch for challenger scoring; returns False if it was dropped."""
+        start = time.perf_counter()
+        accepted = False
+        if not self._queue.full():
+            try:
+                # Copies: callers may reuse their batch and score buffers
+                self._queue.put_nowait((
+                    np.array(X, dtype=np.float32), np.array(champion_scores, dtype=np.float64)
+                ))
+                accepted = True
+            except queue.Full:
+                pass
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._submit_seconds[self.submitted % self._submit_seconds.shape[0]] = elapsed
+            self.submitted += 1
+            self.dropped += not accepted
+        return accepted
+
+    def wrap(self, champion_fn: Callable[[np.ndarray], np.ndarray]) -> Callable[[np.ndarray], np.ndarray]:
+        """Returns a predict function that serves `champion_fn` and shadows every batch."""
+
+        def predict(X: np.ndarray) -> np.ndarray:
+            scores = champion_fn(X)
+            self.submit(X, scores)
+            return scores
+
+        return predict
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is _STOP:
+                    return
+                X, champion_scores = task
+                start = time.perf_counter()
+                challenger_scores = self.challenger_fn(X)
+                elapsed = time.perf_counter() - start
+                with self._comparison_lock:
+                    self.comparison.update(champion_scores, challenger_scores)
+                with self._lock:
+                    self._challenger_seconds[self.scored % self._challenger_seconds.shape[0]] = elapsed
+                    self.scored += 1
+            except Exception as e:
+                # The challenger must never take the serving process down
+                logging.warning("Shadow scoring failed: {}".format(e))
+                with self._lock:
+                    self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every queued batch has been scored."""
+        self._queue.join()
+
+    def close(self, timeout: float = 5.0):
+        self._queue.put(_STOP, timeout=timeout)
+        self._thread.join(timeout=timeout)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            stats: batches submitted, dropped, scored and failed, the queue
+                depth, the per-request overhead of `submit`, the challenger's
+                scoring time and the comparison metrics
+        """
+        with self._lock:
+            submit = self._submit_seconds[:min(self.submitted, self._submit_seconds.shape[0])].copy()
+            challenger = self._challenger_seconds[:min(self.scored, self._challenger_seconds.shape[0])].copy()
+            stats = {
+                "shadow_submitted": self.submitted,
+                "shadow_dropped": self.dropped,
+                "shadow_scored": self.scored,
+                "shadow_failed": self.failed,
+                "shadow_drop_rate": self.dropped / self.submitted if self.submitted else 0.0,
+            }
+        stats.update({
+            "shadow_queue_depth": self._queue.qsize(),
+            "shadow_overhead_p50_ms": float(np.percentile(submit, 50) * 1e3) if submit.size else 0.0,
+            "shadow_overhead_p99_ms": float(np.percentile(submit, 99) * 1e3) if submit.size else 0.0,
+            "challenger_mean_ms": float(challenger.mean() * 1e3) if challenger.size else 0.0,
+        })
+        with self._comparison_lock:
+            stats.update(self.comparison.snapshot())
+        return stats
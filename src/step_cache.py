@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.schema import CHURN_SCHEMA, FeatureSchema
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "steps")
+_MISSING = object()
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Content hash of step inputs. Frames, series and arrays are hashed by
+    value; everything else by its JSON representation.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+            columns = part.columns if isinstance(part, pd.DataFrame) else [part.name]
+            digest.update(json.dumps([str(c) for c in columns]).encode())
+            digest.update(json.dumps([str(d) for d in np.atleast_1d(part.dtypes)]).encode())
+        elif isinstance(part, np.ndarray):
+            digest.update(str((part.dtype, part.shape)).encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def schema_fingerprint(schema: FeatureSchema = CHURN_SCHEMA) -> str:
+    return fingerprint(
+        schema.features, schema.categorical, schema.derived, schema.target, schema.target_dtype, schema.drop
+    )
+
+
+class StepCache:
+    """
+    Project-level memoization of step outputs on local disk, keyed by a
+    content hash of everything the output depends on.
+
+    Entries are evicted least-recently-used first once the cache grows past
+    `max_bytes`; a hit refreshes the entry's mtime. Hit/miss counts are
+    persisted so they accumulate across runs.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = 2 * 2**30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats_path = os.path.join(cache_dir, "stats.json")
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".joblib")
+
+    def _record(self, field: str):
+        with self._lock:
+            stats = self.stats()
+            stats[field] += 1
+            tmp_path = self.stats_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, self.stats_path)
+
+    def stats(self) -> dict:
+        try:
+            with open(self.stats_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"hits": 0, "misses": 0}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        try:
+            value = joblib.load(path)
+        except FileNotFoundError:
+            self._record("misses")
+            return default
+        except Exception as e:
+            logging.warning("Discarding unreadable step cache entry {}: {}".format(path, e))
+            os.remove(path)
+            self._record("misses")
+            return default
+        os.utime(path)
+        self._record("hits")
+        return value
+
+    def put(self, key: str, value: Any):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        joblib.dump(value, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.evict()
+
+    def get_or_compute(self, key: str, compute) -> Any:
+        """Returns the cached value for `key`, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".joblib"):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logging.info("Evicting step cache entry %s", path)
+            os.remove(path)
+            total -= size
@@ -0,0 +1,105 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
+
+from src.model_dev import get_model, predict_scores
+
+
+def _fit_candidate(
+    model_name: str,
+    params: dict,
+    n_threads: int,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+) -> Tuple[str, object, float, float]:
+    """Fits one candidate inside a worker process within its thread budget."""
+    started = time.perf_counter()
+    model = get_model(model_name)
+    params = dict(params)
+    params.setdefault(model.threads_param, n_threads)
+    # Also caps BLAS/OpenMP pools that the library does not control itself
+    with threadpool_limits(limits=n_threads):
+        trained = model.train(X_train, y_train, **params)
+        score = roc_auc_score(y_val, predict_scores(trained, X_val))
+    return model_name, trained, float(score), time.perf_counter() - started
+
+
+class ParallelTrainer:
+    """
+    Fits several candidate models concurrently in a process pool and selects
+    the best by validation ROC AUC.
+
+    Each worker gets `n_cpus // max_workers` threads (at least one), passed
+    to the library and enforced on native thread pools, so the candidates
+    share the cores instead of oversubscribing them.
+    """
+
+    def __init__(
+        self,
+        candidates: List[str],
+        max_workers: int = 0,
+        params: Optional[Dict[str, dict]] = None,
+        validation_size: float = 0.2,
+        refit: bool = True,
+    ):
+        self.candidates = candidates
+        n_cpus = os.cpu_count() or 1
+        self.max_workers = max_workers or min(len(candidates), n_cpus)
+        self.threads_per_worker = max(1, n_cpus // self.max_workers)
+        self.params = params or {}
+        self.validation_size = validation_size
+        self.refit = refit
+        self.results: Dict[str, dict] = {}
+
+    def fit(self, X_train: np.ndarray, y_train: np.ndarray):
+        """
+        Args:
+            X_train: float32 feature matrix
+            y_train: churn labels
+        Returns:
+            best_name: str
+            best_model: trained model (refit on all of X_train if `refit`)
+        """
+        try:
+            X_fit, X_val, y_fit, y_val = train_test_split(
+                X_train, y_train, test_size=self.validation_size, stratify=y_train, random_state=42
+            )
+            logging.info(
+                "Training %d candidates on %d workers with %d threads each",
+                len(self.candidates), self.max_workers, self.threads_per_worker,
+            )
+            models = {}
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [
+                    pool.submit(
+                        _fit_candidate, name, self.params.get(name, {}), self.threads_per_worker,
+                        X_fit, y_fit, X_val, y_val,
+                    )
+                    for name in self.candidates
+                ]
+                for future in futures:
+                    name, model, score, seconds = future.result()
+                    logging.info("Candidate %s: validation AUC %.4f in %.1fs", name, score, seconds)
+                    self.results[name] = {"val_auc": score, "seconds": seconds}
+                    models[name] = model
+
+            best_name = max(self.results, key=lambda name: self.results[name]["val_auc"])
+            best_model = models[best_name]
+            if self.refit:
+                params = dict(self.params.get(best_name, {}))
+                model = get_model(best_name)
+                params.setdefault(model.threads_param, os.cpu_count() or 1)
+                best_model = model.train(X_train, y_train, **params)
+            return best_name, best_model
+        except Exception as e:
+            logging.error("Error in parallel training: {}".format(e))
+            raise e
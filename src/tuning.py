@@ -0,0 +1,229 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+import optuna
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from src.model_dev import get_model, predict_scores
+
+DEFAULT_STORAGE = "sqlite:///" + os.path.join(".cache", "optuna.db")
+
+
+def suggest_params(trial: optuna.trial.BaseTrial, family: str, max_rounds: int) -> dict:
+    """Samples constructor parameters for one model family."""
+    if family == "LogisticRegression":
+        return {"C": trial.suggest_float("C", 1e-3, 1e2, log=True)}
+    if family == "LightGBM":
+        return {
+            "n_estimators": max_rounds,
+            "learning_rate": trial.suggest_float("learning_rate", 1e-2, 0.3, log=True),
+            "num_leaves": trial.suggest_int("num_leaves", 8, 256, log=True),
+            "min_child_samples": trial.suggest_int("min_child_samples", 5, 100),
+            "subsample": trial.suggest_float("subsample", 0.5, 1.0),
+            "subsample_freq": 1,
+            "colsample_bytree": trial.suggest_float("colsample_bytree", 0.5, 1.0),
+        }
+    if family == "XGBoost":
+        return {
+            "n_estimators": max_rounds,
+            "learning_rate": trial.suggest_float("learning_rate", 1e-2, 0.3, log=True),
+            "max_depth": trial.suggest_int("max_depth", 2, 10),
+            "min_child_weight": trial.suggest_float("min_child_weight", 1e-1, 10.0, log=True),
+            "subsample": trial.suggest_float("subsample", 0.5, 1.0),
+            "colsample_bytree": trial.suggest_float("colsample_bytree", 0.5, 1.0),
+        }
+    if family == "CatBoost":
+        return {
+            "iterations": max_rounds,
+            "learning_rate": trial.suggest_float("learning_rate", 1e-2, 0.3, log=True),
+            "depth": trial.suggest_int("depth", 3, 10),
+            "l2_leaf_reg": trial.suggest_float("l2_leaf_reg", 1.0, 10.0, log=True),
+        }
+    raise ValueError("Model {} not supported".format(family))
+
+
+def _report(trial: optuna.trial.Trial, score: float, rounds: int):
+    trial.report(score, rounds)
+    if trial.should_prune():
+        trial.set_user_attr("rounds", rounds)
+        raise optuna.TrialPruned()
+
+
+def _fit_with_pruning(trial, family: str, params: dict, n_threads: int, X_fit, y_fit, X_val, y_val):
+    """Fits one trial, reporting validation AUC after every boosting round."""
+    if family == "LightGBM":
+        import lightgbm as lgb
+
+        def callback(env):
+            auc = next(result[2] for result in env.evaluation_result_list if result[1] == "auc")
+            _report(trial, auc, env.iteration + 1)
+
+        model = lgb.LGBMClassifier(n_jobs=n_threads, **params)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], eval_metric="auc", callbacks=[callback], verbose=False)
+        return model
+
+    if family == "XGBoost":
+        import xgboost as xgb
+
+        class Callback(xgb.callback.TrainingCallback):
+            def after_iteration(self, model, epoch, evals_log):
+                _report(trial, evals_log["validation_0"]["auc"][-1], epoch + 1)
+                return False
+
+        model = xgb.XGBClassifier(n_jobs=n_threads, eval_metric="auc", use_label_encoder=False, **params)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], callbacks=[Callback()], verbose=False)
+        return model
+
+    # No per-round hook for this family: train fully and report once
+    model = get_model(family)
+    params = dict(params)
+    params.setdefault(model.threads_param, n_threads)
+    return model.train(X_fit, y_fit, **params)
+
+
+class Objective:
+    """Picklable Optuna objective over the configured model families."""
+
+    def __init__(self, families: List[str], max_rounds: int, n_threads: int, data: Tuple[np.ndarray, ...]):
+        self.families = families
+        self.max_rounds = max_rounds
+        self.n_threads = n_threads
+        self.data = data
+
+    def __call__(self, trial: optuna.trial.Trial) -> float:
+        X_fit, X_val, y_fit, y_val = self.data
+        family = trial.suggest_categorical("model", self.families)
+        params = suggest_params(trial, family, self.max_rounds)
+        started = time.perf_counter()
+        try:
+            model = _fit_with_pruning(trial, family, params, self.n_threads, X_fit, y_fit, X_val, y_val)
+        finally:
+            trial.set_user_attr("seconds", time.perf_counter() - started)
+        trial.set_user_attr("rounds", self.max_rounds if family != "LogisticRegression" else 1)
+        return float(roc_auc_score(y_val, predict_scores(model, X_val)))
+
+
+def _optimize(study_name: str, storage: str, objective: Objective, n_trials: int, timeout: float):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.load_study(study_name=study_name, storage=storage)
+    study.optimize(objective, n_trials=n_trials, timeout=timeout)
+
+
+class HyperparameterSearch:
+    """
+    Optuna study over the supported model families, persisted to a local
+    SQLite storage so an interrupted study resumes where it stopped.
+
+    `n_trials` counts the trials already finished in the storage, and the
+    remainder is divided exactly between at most `n_jobs` processes sharing
+    the storage. Boosting models report validation AUC every round so the
+    median or hyperband pruner can stop bad trials early.
+    """
+
+    def __init__(
+        self,
+        families: List[str],
+        study_name: str = "churn",
+        storage: str = DEFAULT_STORAGE,
+        pruner: str = "median",
+        n_trials: int = 100,
+        timeout: float = 3600,
+        n_jobs: int = 0,
+        max_rounds: int = 500,
+    ):
+        self.families = families
+        self.study_name = study_name
+        self.storage = storage
+        self.pruner = pruner
+        self.n_trials = n_trials
+        self.timeout = timeout
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.max_rounds = max_rounds
+
+    def _create_study(self) -> optuna.Study:
+        if self.storage.startswith("sqlite:///"):
+            os.makedirs(os.path.dirname(self.storage[len("sqlite:///"):]) or ".", exist_ok=True)
+        if self.pruner == "hyperband":
+            pruner = optuna.pruners.HyperbandPruner(min_resource=10, max_resource=self.max_rounds)
+        else:
+            pruner = optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=10)
+        return optuna.create_study(
+            study_name=self.study_name,
+            storage=self.storage,
+            direction="maximize",
+            pruner=pruner,
+            load_if_exists=True,
+        )
+
+    def run(self, X_train: np.ndarray, y_train: np.ndarray):
+        """
+        Args:
+            X_train: float32 feature matrix
+            y_train: churn labels
+        Returns:
+            study: optuna.Study
+            report: dict with trial throughput and pruning savings
+        """
+        try:
+            study = self._create_study()
+            already_done = len(study.trials)
+            data = tuple(train_test_split(X_train, y_train, test_size=0.2, stratify=y_train, random_state=42))
+            objective = Objective(self.families, self.max_rounds, max(1, (os.cpu_count() or 1) // self.n_jobs), data)
+            # `n_trials` is the study's total: a resumed study only runs the rest
+            finished = sum(t.state.is_finished() for t in study.trials)
+            remaining = max(0, self.n_trials - finished)
+            n_workers = min(self.n_jobs, remaining)
+            if remaining:
+                logging.info("Running %d of %d trials in %d workers", remaining, self.n_trials, n_workers)
+            else:
+                logging.info("Study %s already holds %d finished trials", self.study_name, finished)
+
+            started = time.perf_counter()
+            if n_workers:
+                with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                    futures = [
+                        pool.submit(
+                            _optimize, self.study_name, self.storage, objective,
+                            remaining // n_workers + (worker < remaining % n_workers), self.timeout,
+                        )
+                        for worker in range(n_workers)
+                    ]
+                    for future in futures:
+                        future.result()
+            elapsed = time.perf_counter() - started
+
+            study = optuna.load_study(study_name=self.study_name, storage=self.storage)
+            return study, self.report(study, already_done, elapsed)
+        except Exception as e:
+            logging.error("Error in hyperparameter search: {}".format(e))
+            raise e
+
+    def report(self, study: optuna.Study, skip: int, elapsed: float) -> dict:
+        """Throughput and the share of boosting rounds avoided by pruning in this run."""
+        trials = [t for t in study.trials[skip:] if t.state.is_finished()]
+        pruned = [t for t in trials if t.state == optuna.trial.TrialState.PRUNED]
+        rounds_run = sum(t.user_attrs.get("rounds", self.max_rounds) for t in trials)
+        rounds_saved = sum(self.max_rounds - t.user_attrs.get("rounds", self.max_rounds) for t in pruned)
+        seconds = sum(t.user_attrs.get("seconds", 0.0) for t in trials)
+        seconds_per_round = seconds / rounds_run if rounds_run else 0.0
+        report = {
+            "trials": len(trials),
+            "pruned_trials": len(pruned),
+            "trials_per_hour": len(trials) / elapsed * 3600 if elapsed else 0.0,
+            "pruned_rounds_fraction": rounds_saved / (rounds_run + rounds_saved) if rounds_run else 0.0,
+            "pruned_seconds_saved": rounds_saved * seconds_per_round,
+        }
+        logging.info("Hyperparameter search report: %s", report)
+        return report
+
+    def refit_best(self, study: optuna.Study, X_train: np.ndarray, y_train: np.ndarray):
+        """Trains the best trial's model family and parameters on the full training set."""
+        best = study.best_trial
+        family = best.params["model"]
+        params = suggest_params(optuna.trial.FixedTrial(best.params), family, self.max_rounds)
+        return family, get_model(family).train(X_train, y_train, **params)
@@ -1,26 +1,94 @@
 import logging
 import pandas as pd
 from zenml import step
-from src.data_cleaning import (DataCleaning, DataDivideStrategy, DataPreprocessStrategy)
+from src.data_cache import file_sha256
+from src.data_cleaning import (COLUMN_DTYPES, DataCleaning, DataDivideStrategy, DataPreprocessStrategy,
+                               IndexSplitStrategy)
+from src.drift import DriftMonitor
+from src.profiling import profile_step
+from src.schema import CHURN_SCHEMA, FEATURE_TRANSFORM
+from src.step_cache import StepCache, fingerprint, schema_fingerprint
 from typing import Tuple
 from typing_extensions import Annotated
+from .ingest_data import IngestData
 
 @step
-def clean_df(df: pd.DataFrame) -> Tuple[
+def clean_df(df: pd.DataFrame, use_step_cache: bool = True, split_mode: str = "copy") -> Tuple[
     Annotated[pd.DataFrame, "x_train"],
     Annotated[pd.DataFrame, "x_test"],
     Annotated[pd.Series, "y_train"],
     Annotated[pd.Series, "y_test"]] :
+    """
+    Args:
+        df: raw data
+        use_step_cache: reuse a split computed earlier for identical inputs
+        split_mode: "copy" materializes the four splits with train_test_split,
+            "index" returns views of one stratified, memory-mapped matrix
+
+    Also stages the drift-monitoring reference sketch of the training split;
+    it replaces the live reference only once the model is deployed.
+    """
     try:
-        process_strategy = DataPreprocessStrategy()
-        data_cleaning = DataCleaning(df, process_strategy)
-        processed_data = data_cleaning.handle_data()
+        with profile_step("clean_df", rows=len(df)):
+            process_strategy = DataPreprocessStrategy()
+            if split_mode == "index":
+                processed_data = DataCleaning(df, process_strategy).handle_data()
+                X_train, X_test, y_train, y_test = DataCleaning(processed_data, IndexSplitStrategy()).handle_data()
+                DriftMonitor().stage_reference(FEATURE_TRANSFORM.transform(X_train))
+                logging.info("Data cleaning completed")
+                return X_train, X_test, y_train, y_test
+
+            divide_strategy = DataDivideStrategy()
+
+            def clean():
+                data_cleaning = DataCleaning(df, process_strategy)
+                processed_data = data_cleaning.handle_data()
+                data_cleaning = DataCleaning(processed_data, divide_strategy)
+                return data_cleaning.handle_data()
 
-        divide_strategy = DataDivideStrategy()
-        data_cleaning = DataCleaning(processed_data, divide_strategy)
-        X_train, X_test, y_train, y_test = data_cleaning.handle_data()
-        logging.info("Data cleaning completed")
-        return X_train, X_test, y_train, y_test
+            if use_step_cache:
+                cache = StepCache()
+                key = fingerprint(
+                    "clean_df", df, schema_fingerprint(process_strategy.schema),
+                    divide_strategy.test_size, divide_strategy.random_state,
+                )
+                X_train, X_test, y_train, y_test = cache.get_or_compute(key, clean)
+                logging.info("Step cache stats: %s", cache.stats())
+            else:
+                X_train, X_test, y_train, y_test = clean()
+            DriftMonitor().stage_reference(FEATURE_TRANSFORM.transform(X_train))
+            logging.info("Data cleaning completed")
+            return X_train, X_test, y_train, y_test
     except Exception as e:
         logging.error("Error in cleaning data: {}".format(e))
-        raise e
\ No newline at end of file
+        raise e
+
+
+@step
+def stream_clean_df(data_path: str, chunksize: int = 1_000_000) -> Tuple[
+    Annotated[pd.DataFrame, "x_train"],
+    Annotated[pd.DataFrame, "x_test"],
+    Annotated[pd.Series, "y_train"],
+    Annotated[pd.Series, "y_test"]]:
+    """
+    Ingests and splits `data_path` with bounded memory: the labels are read
+    first, then the source is streamed through `iter_clean_chunks` and each
+    chunk is written into the memory-mapped split matrix, so only one
+    chunk of raw rows is held at a time. Returns the same views as
+    clean_df's "index" mode.
+    """
+    try:
+        with profile_step("stream_clean_df") as profile:
+            target = CHURN_SCHEMA.target
+            y = pd.read_csv(data_path, usecols=[target], dtype={target: COLUMN_DTYPES[target]})[target].to_numpy()
+            profile.rows = len(y)
+            strategy = IndexSplitStrategy()
+            chunks = IngestData(data_path, use_cache=False).iter_clean_chunks(chunksize)
+            shared = strategy.split_chunks(y, chunks, source_key=file_sha256(data_path))
+            X_train, X_test, y_train, y_test = strategy.frames(shared, pd.RangeIndex(len(y)))
+            DriftMonitor().stage_reference(FEATURE_TRANSFORM.transform(X_train))
+            logging.info("Streaming data cleaning completed")
+            return X_train, X_test, y_train, y_test
+    except Exception as e:
+        logging.error("Error in streaming data cleaning: {}".format(e))
+        raise e
@@ -1,7 +1,42 @@
+from typing import List
+
 from zenml.steps import BaseParameters
 
 
 class ModelNameConfig(BaseParameters):
     """Model Configurations"""
 
-    model_name: str = "LinearRegression"
\ No newline at end of file
+    model_name: str = "LinearRegression"
+    # When set, these models are trained in parallel and the best one by
+    # validation AUC is returned instead of `model_name`
+    candidates: List[str] = []
+    max_workers: int = 0
+    # Reuse a model trained earlier on identical data and configuration
+    use_step_cache: bool = True
+
+
+class TuningConfig(BaseParameters):
+    """Hyperparameter search configuration"""
+
+    families: List[str] = ["LogisticRegression", "LightGBM", "XGBoost", "CatBoost"]
+    study_name: str = "churn"
+    storage: str = "sqlite:///.cache/optuna.db"
+    pruner: str = "median"
+    n_trials: int = 100
+    # Wall-clock limit per worker; with n_jobs workers this bounds CPU time
+    timeout: float = 3600
+    n_jobs: int = 0
+    max_rounds: int = 500
+
+
+class CrossValidationConfig(BaseParameters):
+    """K-fold evaluation configuration"""
+
+    # Empty: the family and parameters of the trained model
+    model_name: str = ""
+    n_folds: int = 5
+    # EvaluationEngine metric compared with the deployed model's
+    metric: str = "r2_score"
+    max_workers: int = 0
+    # Stop once the candidate provably cannot beat the deployed model
+    early_abort: bool = True
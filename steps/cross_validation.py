@@ -0,0 +1,79 @@
+import logging
+import time
+from typing import Optional, Tuple
+
+import pandas as pd
+from sklearn.base import BaseEstimator
+from zenml import step
+
+from src.cross_validation import CrossValidator
+from src.model_dev import model_spec
+from src.profiling import profile_step
+from .config import CrossValidationConfig
+import mlflow
+from mlflow.entities import Metric
+from mlflow.tracking import MlflowClient
+from zenml.client import Client
+from typing_extensions import Annotated
+
+experiment_tracker = Client().active_stack.experiment_tracker
+
+
+def _champion_score(metric: str) -> Optional[float]:
+    """
+    The deployed model's cross-validated score, or None if it was not
+    cross-validated: its holdout score is not comparable with a mean fold
+    score, so the candidate is then not measured against it.
+    """
+    # Deferred: only needed when a model is deployed, and pulls in the deployer
+    from pipelines.service import deployed_model_metrics
+
+    metrics = deployed_model_metrics()
+    name = "cv_{}_mean".format(metric)
+    if name not in metrics and metric in metrics:
+        logging.info("Deployed model has no %s; skipping the comparison with it", name)
+    return metrics.get(name)
+
+
+@step(enable_cache=False, experiment_tracker=experiment_tracker.name)
+def cross_validate_model(
+    model: BaseEstimator,
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    config: CrossValidationConfig,
+) -> Tuple[Annotated[float, "cv_score"], Annotated[bool, "beats_champion"]]:
+    """
+    Cross-validates the trained model's family and parameters (or
+    `config.model_name`) on the training split with the folds fitted in
+    parallel, stopping early once it cannot beat the deployed model.
+
+    Returns:
+        cv_score: mean fold score on `config.metric`
+        beats_champion: whether the candidate beats the deployed model
+            (True when nothing comparable is deployed)
+    """
+    try:
+        with profile_step("cross_validate_model", rows=len(X_train)):
+            model_name, params = (config.model_name, {}) if config.model_name else model_spec(model)
+            champion = _champion_score(config.metric) if config.early_abort else None
+            validator = CrossValidator(
+                model_name, n_folds=config.n_folds, metric=config.metric, max_workers=config.max_workers,
+                params=params,
+            )
+            metrics = validator.run(X_train.assign(churn=y_train.to_numpy()), champion_score=champion)
+            if champion is not None:
+                metrics["cv_champion_" + config.metric] = champion
+
+            # Summary and per-fold metrics (fold number as the step) in bulk requests
+            timestamp = int(time.time() * 1000)
+            batch = [Metric(name, value, timestamp, 0) for name, value in metrics.items()]
+            batch += [Metric(name, value, timestamp, fold) for fold, name, value in validator.fold_series()]
+            client, run_id = MlflowClient(), mlflow.active_run().info.run_id
+            for start in range(0, len(batch), 1000):  # MLflow's per-request limit
+                client.log_batch(run_id, metrics=batch[start:start + 1000])
+            logging.info("Cross-validation metrics of %s: %s", model_name, metrics)
+
+        return metrics["cv_{}_mean".format(config.metric)], validator.beats(champion)
+    except Exception as e:
+        logging.error("Error in cross-validating the model: {}".format(e))
+        raise e
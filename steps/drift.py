@@ -0,0 +1,43 @@
+import logging
+from zenml import step
+
+from src.drift import DriftMonitor
+import mlflow
+from zenml.client import Client
+from typing_extensions import Annotated
+
+experiment_tracker = Client().active_stack.experiment_tracker
+
+@step(enable_cache=False, experiment_tracker=experiment_tracker.name)
+def drift_score(metric: str = "psi") -> Annotated[float, "drift"]:
+    """
+    Reports how far the inference inputs seen so far have drifted from the
+    training split the deployed model was built on.
+
+    Args:
+        metric: "psi" or "ks"; the maximum over features is returned
+    """
+    try:
+        scores = DriftMonitor().scores()
+        mlflow.log_metrics(scores)
+        logging.info("Drift over %d inference rows: PSI %.4f, KS %.4f",
+                     scores["drift_rows"], scores["drift_psi_max"], scores["drift_ks_max"])
+        return scores["drift_{}_max".format(metric)]
+    except Exception as e:
+        logging.error("Error in computing drift scores: {}".format(e))
+        raise e
+
+@step(enable_cache=False)
+def commit_drift_reference(deploy_decision: bool) -> Annotated[bool, "reference_committed"]:
+    """
+    Makes the drift reference staged by the cleaning step the live one when
+    its model is deployed; otherwise the deployed model's reference stays.
+    """
+    try:
+        if not deploy_decision:
+            logging.info("Model not deployed; keeping the current drift reference")
+            return False
+        return DriftMonitor().promote_reference()
+    except Exception as e:
+        logging.error("Error in committing the drift reference: {}".format(e))
+        raise e
@@ -1,8 +1,11 @@
 import logging
 from zenml import step
 import pandas as pd
-from sklearn.base import RegressorMixin
-from src.evaluation import MSE, RMSE, R2
+from sklearn.base import BaseEstimator
+from src.evaluation import BootstrapEvaluation, EvaluationEngine
+from src.model_dev import predict_scores
+from src.profiling import profile_step
+from src.schema import FEATURE_TRANSFORM
 
 import mlflow
 from zenml.client import Client
@@ -12,35 +15,42 @@ from typing_extensions import Annotated
 experiment_tracker = Client().active_stack.experiment_tracker
 
 @step(experiment_tracker=experiment_tracker.name)
-def evaluate_model( model: RegressorMixin, X_test: pd.DataFrame, y_test: pd.DataFrame) -> Tuple[Annotated[float, "r2_score"], Annotated[float, "rmse"]]:
+def evaluate_model( model: BaseEstimator, X_test: pd.DataFrame, y_test: pd.DataFrame) -> Tuple[Annotated[float, "r2_score"], Annotated[float, "rmse"]]:
     
     try:
-        # prediction = model.predict(x_test)
-        # evaluation = Evaluation()
-        # r2_score = evaluation.r2_score(y_test, prediction)
-        # mlflow.log_metric("r2_score", r2_score)
-        # mse = evaluation.mean_squared_error(y_test, prediction)
-        # mlflow.log_metric("mse", mse)
-        # rmse = np.sqrt(mse)
-        # mlflow.log_metric("rmse", rmse)
+        with profile_step("evaluate_model", rows=len(X_test)):
+            prediction = predict_scores(model, FEATURE_TRANSFORM.transform(X_test))
 
-        prediction = model.predict(X_test)
+            # All metrics in one pass over the holdout, logged in one call
+            engine = EvaluationEngine()
+            metrics = engine.update(y_test.to_numpy(), prediction).compute()
+            mlflow.log_metrics(metrics)
+            logging.info("Evaluation metrics: %s", metrics)
 
-        # Using the MSE class for mean squared error calculation
-        mse_class = MSE()
-        mse = mse_class.calculate_scores(y_test, prediction)
-        mlflow.log_metric("mse", mse)
-
-        # Using the R2Score class for R2 score calculation
-        r2_class = R2()
-        r2 = r2_class.calculate_scores(y_test, prediction)
-        mlflow.log_metric("r2_score", r2)
-        # Using the RMSE class for root mean squared error calculation
-        rmse_class = RMSE()
-        rmse = rmse_class.calculate_scores(y_test, prediction)
-        mlflow.log_metric("rmse", rmse)
-        
-        return r2, rmse
+        return metrics["r2_score"], metrics["rmse"]
     except Exception as e:
         logging.error("Error in evaluating the model: {}".format(e))
-        raise e
\ No newline at end of file
+        raise e
+
+@step(experiment_tracker=experiment_tracker.name)
+def evaluate_model_bootstrap(
+    model: BaseEstimator,
+    X_test: pd.DataFrame,
+    y_test: pd.DataFrame,
+    n_resamples: int = 2000,
+    confidence: float = 0.95,
+) -> Tuple[Annotated[float, "r2_score_lower"], Annotated[float, "rmse_upper"]]:
+    """
+    Evaluates the model with bootstrap confidence intervals and returns the
+    pessimistic bound of each gating metric.
+    """
+    try:
+        prediction = predict_scores(model, FEATURE_TRANSFORM.transform(X_test))
+        bootstrap = BootstrapEvaluation(n_resamples=n_resamples, confidence=confidence)
+        metrics = bootstrap.run(y_test.to_numpy(), prediction)
+        mlflow.log_metrics(metrics)
+        logging.info("Bootstrap evaluation metrics: %s", metrics)
+        return metrics["r2_score_lower"], metrics["rmse_upper"]
+    except Exception as e:
+        logging.error("Error in bootstrap evaluation of the model: {}".format(e))
+        raise e
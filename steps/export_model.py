@@ -0,0 +1,24 @@
+import logging
+from zenml import step
+
+from src.model_export import export_model
+from sklearn.base import BaseEstimator
+
+@step(enable_cache=False)
+def export_compact_model(
+    model: BaseEstimator, deploy_decision: bool = True, path: str = "models/model.cmdl"
+) -> str:
+    """
+    Exports the trained model in the compact binary format for fast-starting
+    scoring workers, only if `deploy_decision` says it is being deployed, so
+    `path` always holds the served model. Returns the written path, or ""
+    if nothing was exported or the model type has no compact representation.
+    """
+    try:
+        if not deploy_decision:
+            logging.info("Model not deployed; keeping the compact model at %s", path)
+            return ""
+        return export_model(model, path)
+    except ValueError as e:
+        logging.warning("Skipping compact export: {}".format(e))
+        return ""
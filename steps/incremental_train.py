@@ -0,0 +1,44 @@
+import logging
+from typing import Tuple
+
+import pandas as pd
+from zenml import step
+
+from src.drift import DriftMonitor
+from src.incremental import IncrementalTrainer
+from src.schema import FEATURE_TRANSFORM
+from sklearn.base import BaseEstimator
+from .config import ModelNameConfig
+import mlflow
+from zenml.client import Client
+from typing_extensions import Annotated
+
+experiment_tracker = Client().active_stack.experiment_tracker
+
+@step(enable_cache=False, experiment_tracker=experiment_tracker.name)
+def incremental_train_model(data_path: str, config: ModelNameConfig) -> Tuple[
+    Annotated[BaseEstimator, "model"],
+    Annotated[pd.DataFrame, "x_holdout"],
+    Annotated[pd.Series, "y_holdout"]]:
+    """
+    Updates the model with only the rows appended to `data_path` since the
+    last run, using the persisted watermark and model state.
+
+    Returns the model with the holdout rows of every delta so far, which
+    the model was never trained on, to evaluate it with. Those rows sample
+    the whole source, so they also stand in for the training split as the
+    staged drift reference, without a full read of the source.
+    """
+    try:
+        trainer = IncrementalTrainer(model_name=config.model_name)
+        trained_model, report = trainer.run(data_path)
+        mlflow.log_metrics(report)
+        # Not fitted under autolog: the deployer needs the run's "model" artifact
+        mlflow.sklearn.log_model(trained_model, "model")
+        X_holdout, y_holdout = trainer.holdout(data_path)
+        DriftMonitor().stage_reference(X_holdout)
+        X_holdout = pd.DataFrame(X_holdout, columns=FEATURE_TRANSFORM.names, copy=False)
+        return trained_model, X_holdout, pd.Series(y_holdout, name="churn")
+    except Exception as e:
+        logging.error("Error in incremental training: {}".format(e))
+        raise e
@@ -1,34 +1,79 @@
 import logging
+from typing import Iterator, List, Optional
+
 import pandas as pd
 from zenml import step
 
+from src.data_cache import DataCache
+from src.data_cleaning import COLUMN_DTYPES, DataCleaning, DataPreprocessStrategy
+from src.profiling import profile_step
+
 class IngestData:
     """
     Data ingestion class which ingests data from the source and returns a DataFrame.
     """
 
-    def __init__(self, data_path: str):
+    def __init__(self, data_path: str, use_cache: bool = True):
         """Initialize the data ingestion class."""
         self.data_path = data_path  # Store data_path as an instance variable
+        self.use_cache = use_cache
 
-    def get_data(self):
+    def get_data(self, columns: Optional[List[str]] = None):
         logging.info(f"Ingesting data from {self.data_path}")
-        data = pd.read_csv(self.data_path)
-        print("Columns in the ingested dataframe: ", data.columns.tolist())
-        print(data.head())  # Print the first few rows of the dataframe for verification
+        if self.use_cache:
+            data = DataCache().load(self.data_path, columns=columns)
+        else:
+            data = pd.read_csv(self.data_path, usecols=columns)
+        logging.info("Columns in the ingested dataframe: %s", data.columns.tolist())
         return data
 
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Streams the source in typed chunks of at most `chunksize` rows, parsing
+        only the columns kept by DataPreprocessStrategy.
+
+        Args:
+            chunksize: int
+        Yields:
+            chunk: pd.DataFrame
+        """
+        logging.info(f"Streaming data from {self.data_path} in chunks of {chunksize} rows")
+        reader = pd.read_csv(
+            self.data_path,
+            usecols=list(COLUMN_DTYPES),
+            dtype=COLUMN_DTYPES,
+            chunksize=chunksize,
+        )
+        with reader:
+            for chunk in reader:
+                yield chunk
+
+    def iter_clean_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        """Streams typed chunks and preprocesses each one before yielding it."""
+        preprocess_strategy = DataPreprocessStrategy()
+        for chunk in self.iter_chunks(chunksize):
+            yield DataCleaning(chunk, preprocess_strategy).handle_data()
+
 @step
-def ingest_df(data_path: str) -> pd.DataFrame:
+def ingest_df(data_path: str, chunksize: int = 0, use_cache: bool = True) -> pd.DataFrame:
     """
     Args:
         Data path
+        chunksize: if > 0, parse the source in typed chunks of this many
+            rows. The chunks are still concatenated into the returned frame,
+            so this does not bound memory; `stream_clean_df` does
+        use_cache: read through the columnar data cache
     Returns:
         df: pd.DataFrame
     """
     try:
-        ingest_data = IngestData(data_path)
-        df = ingest_data.get_data()
+        with profile_step("ingest_df") as profile:
+            ingest_data = IngestData(data_path, use_cache=use_cache)
+            if chunksize > 0:
+                df = pd.concat(ingest_data.iter_chunks(chunksize), ignore_index=True)
+            else:
+                df = ingest_data.get_data()
+            profile.rows = len(df)
         return df
     except Exception as e:
         logging.error(f"Error while ingesting data: {e}")
@@ -2,33 +2,65 @@ import logging
 import pandas as pd
 from zenml import step
 
-from src.model_dev import (LinearRegressionModel)
-from sklearn.base import RegressorMixin
+from src.model_dev import get_model
+from src.profiling import profile_step
+from src.schema import FEATURE_TRANSFORM
+from src.step_cache import StepCache, fingerprint, schema_fingerprint
+from src.training_engine import ParallelTrainer
+from sklearn.base import BaseEstimator
 from .config import ModelNameConfig
 import mlflow
 from zenml.client import Client
 
 experiment_tracker = Client().active_stack.experiment_tracker
 
+def _train(X_train: pd.DataFrame, y_train: pd.Series, config: ModelNameConfig):
+    X = FEATURE_TRANSFORM.transform(X_train)
+    y = y_train.to_numpy()
+    if config.candidates:
+        trainer = ParallelTrainer(config.candidates, max_workers=config.max_workers)
+        best_name, trained_model = trainer.fit(X, y)
+        mlflow.log_metrics(
+            {"val_auc_{}".format(name): result["val_auc"] for name, result in trainer.results.items()}
+        )
+        mlflow.log_param("model_name", best_name)
+        # Fitted in worker processes, out of autolog's reach: the deployer
+        # needs the winner logged as the run's "model" artifact
+        mlflow.sklearn.log_model(trained_model, "model")
+        return trained_model
+    model = get_model(config.model_name)
+    if config.model_name == "LinearRegression":
+        mlflow.sklearn.autolog()
+    else:
+        mlflow.autolog()
+    return model.train(X, y)
+
 @step(experiment_tracker=experiment_tracker.name)
 def train_model(X_train: pd.DataFrame,
     X_test: pd.DataFrame,
     y_train: pd.Series,
     y_test: pd.Series,
     config: ModelNameConfig,
-    ) -> RegressorMixin:
+    ) -> BaseEstimator:
     
     try:
-        model = None
-        if config.model_name == "LinearRegression":
-            mlflow.sklearn.autolog()
-            model = LinearRegressionModel()
-            trained_model = model.train(X_train, y_train)
+        with profile_step("train_model", rows=len(X_train)):
+            if config.use_step_cache:
+                cache = StepCache()
+                key = fingerprint("train_model", X_train, y_train, schema_fingerprint(), config.dict())
+                trained_model = cache.get(key)
+                if trained_model is not None:
+                    logging.info("Reusing cached model; step cache stats: %s", cache.stats())
+                    mlflow.log_metrics({"step_cache_" + name: value for name, value in cache.stats().items()})
+                    # No training ran, so nothing was autologged: the deployer
+                    # needs the run's "model" artifact
+                    mlflow.sklearn.log_model(trained_model, "model")
+                    return trained_model
+
+            trained_model = _train(X_train, y_train, config)
+            if config.use_step_cache:
+                cache.put(key, trained_model)
             return trained_model
-        else:
-            raise ValueError("Model {} not supported".format(config.model_name))
     except Exception as e:
         logging.error("Error in training model: {}".format(e))
         raise e
-
-        
@@ -0,0 +1,45 @@
+import logging
+import pandas as pd
+from zenml import step
+
+from src.schema import FEATURE_TRANSFORM
+from src.tuning import HyperparameterSearch
+from sklearn.base import BaseEstimator
+from .config import TuningConfig
+import mlflow
+from zenml.client import Client
+
+experiment_tracker = Client().active_stack.experiment_tracker
+
+@step(experiment_tracker=experiment_tracker.name)
+def tune_model(X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    y_train: pd.Series,
+    y_test: pd.Series,
+    config: TuningConfig,
+    ) -> BaseEstimator:
+    """
+    Runs (or resumes) an Optuna study over the configured model families and
+    returns the best model refit on the full training set.
+    """
+    try:
+        X = FEATURE_TRANSFORM.transform(X_train)
+        y = y_train.to_numpy()
+        search = HyperparameterSearch(
+            families=config.families,
+            study_name=config.study_name,
+            storage=config.storage,
+            pruner=config.pruner,
+            n_trials=config.n_trials,
+            timeout=config.timeout,
+            n_jobs=config.n_jobs,
+            max_rounds=config.max_rounds,
+        )
+        study, report = search.run(X, y)
+        family, trained_model = search.refit_best(study, X, y)
+        mlflow.log_params({"model_name": family, **study.best_params})
+        mlflow.log_metrics({"best_val_auc": study.best_value, **report})
+        return trained_model
+    except Exception as e:
+        logging.error("Error in tuning model: {}".format(e))
+        raise e
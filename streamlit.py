@@ -1,10 +1,24 @@
-import json
-import numpy as np
-import pandas as pd
 import streamlit as st
 from PIL import Image
-from pipelines.deployment_pipeline import prediction_service_loader
-from run_deployment import main
+import time
+
+import pandas as pd
+
+from pipelines.service import get_service_handle
+from src.prediction_cache import PredictionCache
+from src.explanations import top_contributions
+from src.feature_engineering import US_STATES
+from src.schema import FEATURE_TRANSFORM
+
+# Streamlit reruns this script on every interaction; the handle lives in an
+# imported module, so the model is resolved and warmed once per process.
+# Repeated slider settings are answered from the prediction cache.
+service_handle = get_service_handle(cache=PredictionCache(max_bytes=8 * 2**20))
+if service_handle.model_uri is None:
+    try:
+        service_handle.warm_up()
+    except RuntimeError:
+        pass
 
 def main():
     st.title("End to End Customer Churn Prediction Pipeline with ZenML")
@@ -22,6 +36,7 @@ def main():
     This app is designed to predict whether a customer will churn based on the features listed below. You can input the values for these features and get a churn prediction. 
     | Feature                             | Description                                           | 
     | ----------------------------------- | ----------------------------------------------------- | 
+    | state                               | US state of the customer                              | 
     | account_length                      | The duration of the customer account in days          | 
     | international_plan                  | Whether the customer has an international plan (0/1)  | 
     | voice_mail_plan                     | Whether the customer has a voice mail plan (0/1)      | 
@@ -39,6 +54,7 @@ def main():
     """
     )
 
+    state = st.sidebar.selectbox("State", US_STATES)
     account_length = st.sidebar.slider("Account Length", min_value=0, max_value=500, value=100)
     international_plan = st.sidebar.selectbox("International Plan", [0, 1])
     voice_mail_plan = st.sidebar.selectbox("Voice Mail Plan", [0, 1])
@@ -55,41 +71,67 @@ def main():
     total_intl_minutes = st.sidebar.slider("Total International Minutes", min_value=0, max_value=60, value=30)
 
     if st.button("Predict"):
-        service = prediction_service_loader(
-            pipeline_name="continuous_deployment_pipeline",
-            pipeline_step_name="mlflow_model_deployer_step",
-            running=False,
-        )
-        if service is None:
-            st.write(
-                "No service could be found. The pipeline will be run first to create a service."
-            )
-            run_main()
+        if service_handle.model_uri is None:
+            try:
+                service_handle.warm_up()
+            except RuntimeError:
+                st.write(
+                    "No service could be found. The pipeline will be run first to create a service."
+                )
+                from run_deployment import main as run_main
+
+                run_main(["--config", "deploy"], standalone_mode=False)
+                service_handle.warm_up()
 
-        df = pd.DataFrame(
+        start = time.perf_counter()
+        data = FEATURE_TRANSFORM.transform_row(
             {
-                "account_length": [account_length],
-                "international_plan": [international_plan],
-                "voice_mail_plan": [voice_mail_plan],
-                "number_vmail_messages": [number_vmail_messages],
-                "total_day_calls": [total_day_calls],
-                "total_eve_calls": [total_eve_calls],
-                "total_night_calls": [total_night_calls],
-                "total_intl_calls": [total_intl_calls],
-                "number_customer_service_calls": [number_customer_service_calls],
-                "area_code_encoded": [area_code_encoded],
-                "total_day_minutes": [total_day_minutes],
-                "total_eve_minutes": [total_eve_minutes],
-                "total_night_minutes": [total_night_minutes],
-                "total_intl_minutes": [total_intl_minutes],
+                "state": state,
+                "account_length": account_length,
+                "international_plan": international_plan,
+                "voice_mail_plan": voice_mail_plan,
+                "number_vmail_messages": number_vmail_messages,
+                "total_day_calls": total_day_calls,
+                "total_eve_calls": total_eve_calls,
+                "total_night_calls": total_night_calls,
+                "total_intl_calls": total_intl_calls,
+                "number_customer_service_calls": number_customer_service_calls,
+                "area_code_encoded": area_code_encoded,
+                "total_day_minutes": total_day_minutes,
+                "total_eve_minutes": total_eve_minutes,
+                "total_night_minutes": total_night_minutes,
+                "total_intl_minutes": total_intl_minutes,
             }
         )
-        json_list = json.loads(json.dumps(list(df.T.to_dict().values())))
-        data = np.array(json_list)
-        pred = service.predict(data)
+        transform_ms = (time.perf_counter() - start) * 1e3
+        pred, timings = service_handle.predict(data)
         st.success(
             "The churn prediction for the given customer details is: {}".format(pred)
         )
+        contributions, expected_value = service_handle.explain(data)
+        top = top_contributions(contributions, k=5)[0]
+        st.markdown("#### Why this score")
+        st.table(pd.DataFrame(
+            {"Feature": [name for name, _ in top], "Contribution": [value for _, value in top]}
+        ))
+        st.caption("Contributions are relative to an average customer ({:.3f}).".format(expected_value))
+        st.caption(
+            "Latency: transform {:.2f} ms, model lookup {:.2f} ms, scoring {:.2f} ms, "
+            "total {:.2f} ms (warm-up {:.1f} ms)".format(
+                transform_ms,
+                timings["resolve_ms"],
+                timings["score_ms"],
+                transform_ms + timings["resolve_ms"] + timings["score_ms"],
+                service_handle.warmup_ms,
+            )
+        )
+        cache_stats = service_handle.cache.stats()
+        if cache_stats["cache_hits"] + cache_stats["cache_misses"]:
+            st.caption(
+                "Prediction cache: {:.0%} hit rate, {:.1f} ms of scoring saved".format(
+                    cache_stats["cache_hit_rate"], cache_stats["cache_saved_ms"]
+                )
+            )
 
 if __name__ == "__main__":
     main()
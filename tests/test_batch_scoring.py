@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.batch_scoring import BatchScorer
+from src.model_dev import LinearRegressionModel
+from src.schema import FEATURE_TRANSFORM
+
+SOURCE = "Data/data.csv"
+CHUNKSIZE = 500
+
+
+@pytest.fixture(scope="module")
+def model():
+    data = pd.read_csv(SOURCE)
+    return LinearRegressionModel().train(FEATURE_TRANSFORM.transform(data), FEATURE_TRANSFORM.target(data))
+
+
+def _read_parts(output_dir: str) -> pd.DataFrame:
+    parts = sorted(name for name in os.listdir(output_dir) if name.endswith(".parquet"))
+    return pd.concat([pd.read_parquet(os.path.join(output_dir, name)) for name in parts], ignore_index=True)
+
+
+def test_resume_past_the_first_chunk_matches_a_full_run(model, tmp_path):
+    full_dir, resumed_dir = str(tmp_path / "full"), str(tmp_path / "resumed")
+    BatchScorer(model, full_dir, chunksize=CHUNKSIZE, max_workers=1, model_version="v1").run(SOURCE)
+    scorer = BatchScorer(model, resumed_dir, chunksize=CHUNKSIZE, max_workers=1, model_version="v1")
+    scorer.run(SOURCE)
+    # A crash after the first three chunks
+    for chunk_index in scorer.completed_chunks() - {0, 1, 2}:
+        os.remove(os.path.join(resumed_dir, "part-{:05d}.parquet".format(chunk_index)))
+
+    report = scorer.run(SOURCE)
+
+    assert report["chunks_skipped"] == 3
+    assert report["rows"] == len(pd.read_csv(SOURCE)) - 3 * CHUNKSIZE
+    pd.testing.assert_frame_equal(_read_parts(resumed_dir), _read_parts(full_dir))
+
+
+def test_resume_with_another_model_is_refused(model, tmp_path):
+    output_dir = str(tmp_path / "out")
+    BatchScorer(model, output_dir, chunksize=CHUNKSIZE, max_workers=1, model_version="v1").run(SOURCE)
+    os.remove(os.path.join(output_dir, "part-00001.parquet"))
+
+    with pytest.raises(ValueError, match="another input, chunking or model"):
+        BatchScorer(model, output_dir, chunksize=CHUNKSIZE, max_workers=1, model_version="v2").run(SOURCE)
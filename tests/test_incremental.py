@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.incremental import IncrementalTrainer, holdout_mask
+from src.model_dev import LinearRegressionModel
+from src.schema import FEATURE_TRANSFORM
+
+SOURCE = "Data/data.csv"
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Writes the first `n_rows` rows of the repo's data as an append-only source."""
+    data = pd.read_csv(SOURCE)
+    path = tmp_path / "data.csv"
+
+    def write(n_rows):
+        data.iloc[:n_rows].to_csv(path, index=False)
+        return data.iloc[:n_rows], str(path)
+
+    return write
+
+
+def _train_rows(data: pd.DataFrame, test_size: float = 0.2):
+    train = ~holdout_mask(np.arange(len(data)), test_size)
+    return FEATURE_TRANSFORM.transform(data)[train], FEATURE_TRANSFORM.target(data)[train]
+
+
+def test_incremental_linear_matches_full_fit(source, tmp_path):
+    trainer = IncrementalTrainer(state_dir=str(tmp_path / "state"), chunksize=400)
+    _, path = source(1500)
+    trainer.run(path)
+    data, path = source(3000)
+    model, report = trainer.run(path)
+
+    assert (report["delta_rows"], report["total_rows"]) == (1500, 3000)
+    X, y = _train_rows(data)
+    full = LinearRegressionModel().train(X.astype(np.float64), y)
+    np.testing.assert_allclose(model.coef_, full.coef_, rtol=1e-4, atol=1e-6)
+    np.testing.assert_allclose(model.intercept_, full.intercept_, rtol=1e-4, atol=1e-6)
+
+
+def test_holdout_is_every_delta_row_not_trained_on(source, tmp_path):
+    trainer = IncrementalTrainer(state_dir=str(tmp_path / "state"))
+    _, path = source(1000)
+    trainer.run(path)
+    data, path = source(2500)
+    trainer.run(path)
+
+    X_holdout, y_holdout = trainer.holdout(path)
+    held_out = holdout_mask(np.arange(len(data)), 0.2)
+    np.testing.assert_array_equal(X_holdout, FEATURE_TRANSFORM.transform(data)[held_out])
+    np.testing.assert_array_equal(y_holdout, FEATURE_TRANSFORM.target(data)[held_out])
+
+
+def test_replaced_source_restarts(source, tmp_path):
+    trainer = IncrementalTrainer(state_dir=str(tmp_path / "state"))
+    _, path = source(3000)
+    trainer.run(path)
+    data, path = source(1000)
+    model, report = trainer.run(path)
+
+    assert report["total_rows"] == 1000
+    assert len(trainer.holdout(path)[1]) == int(holdout_mask(np.arange(1000), 0.2).sum())
+
+
+def test_rewritten_source_of_the_same_size_restarts(source, tmp_path):
+    trainer = IncrementalTrainer(state_dir=str(tmp_path / "state"))
+    data, path = source(2000)
+    trainer.run(path)
+    # Same bytes per row, different rows
+    data.iloc[::-1].to_csv(path, index=False)
+    model, report = trainer.run(path)
+
+    assert (report["delta_rows"], report["total_rows"]) == (2000, 2000)
+    X, y = _train_rows(data.iloc[::-1].reset_index(drop=True))
+    full = LinearRegressionModel().train(X.astype(np.float64), y)
+    np.testing.assert_allclose(model.coef_, full.coef_, rtol=1e-4, atol=1e-6)
+
+
+def test_boosting_with_empty_delta_returns_the_estimator(source, tmp_path):
+    pytest.importorskip("lightgbm")
+    trainer = IncrementalTrainer(model_name="LightGBM", state_dir=str(tmp_path / "state"), boost_rounds=5)
+    data, path = source(1000)
+    first, _ = trainer.run(path)
+    model, report = trainer.run(path)
+
+    assert report["delta_rows"] == 0
+    X = FEATURE_TRANSFORM.transform(data)
+    np.testing.assert_array_equal(model.predict_proba(X), first.predict_proba(X))
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model_dev import LinearRegressionModel, LogisticRegressionModel
+from src.schema import CHURN_SCHEMA, FEATURE_TRANSFORM
+
+SOURCE = "Data/data.csv"
+
+
+@pytest.fixture(scope="module")
+def data():
+    data = pd.read_csv(SOURCE)
+    # Rows that exercise the guarded divisions, NaN inputs and unknown states
+    edge = data.iloc[:4].copy()
+    edge.loc[edge.index[0], ["total_day_calls", "total_eve_calls", "total_night_calls", "total_intl_calls"]] = 0
+    edge.loc[edge.index[1], ["total_day_minutes", "total_eve_minutes", "total_night_minutes", "total_intl_minutes"]] = 0
+    edge.loc[edge.index[2], ["total_intl_minutes", "number_customer_service_calls"]] = np.nan
+    edge.loc[edge.index[3], "state"] = "XX"
+    return pd.concat([data, edge], ignore_index=True)
+
+
+def test_single_rows_match_the_batch(data):
+    batch = FEATURE_TRANSFORM.transform(data)
+    rows = np.vstack([FEATURE_TRANSFORM.transform_row(row) for row in data.to_dict("records")])
+
+    assert rows.dtype == batch.dtype == np.float32
+    np.testing.assert_array_equal(rows, batch)
+
+
+def test_string_and_categorical_states_encode_alike(data):
+    categorical = data.astype({"state": CHURN_SCHEMA.dtypes["state"]})
+
+    np.testing.assert_array_equal(FEATURE_TRANSFORM.transform(categorical), FEATURE_TRANSFORM.transform(data))
+    assert FEATURE_TRANSFORM.transform(data.tail(1))[0, FEATURE_TRANSFORM.code_columns].tolist() == [-1]
+
+
+@pytest.mark.parametrize("model", [LinearRegressionModel, LogisticRegressionModel])
+def test_linear_models_ignore_category_codes(data, model):
+    data = data.dropna()
+    X, y = FEATURE_TRANSFORM.transform(data), FEATURE_TRANSFORM.target(data)
+    fitted = model().train(X, y)
+
+    assert fitted.n_features_in_ == FEATURE_TRANSFORM.n_features
+    assert np.all(np.atleast_2d(fitted.coef_)[:, FEATURE_TRANSFORM.code_columns] == 0)
+    shuffled = X.copy()
+    shuffled[:, FEATURE_TRANSFORM.code_columns] = np.random.default_rng(0).permutation(
+        shuffled[:, FEATURE_TRANSFORM.code_columns]
+    )
+    np.testing.assert_array_equal(fitted.predict(shuffled), fitted.predict(X))